@@ -0,0 +1,94 @@
+"""Peak memory of building a chat prompt from a transcript file, by input size.
+
+Usage: PYTHONPATH=. python benchmarks/bench_prompt_memory.py [--sizes 10000,100000,1000000]
+
+For each size, writes a transcript of that many lines and runs the CLI
+in a fresh process, printing to /dev/null and saving with --save:
+- "stream": `--lines FILE` (iter_prompt, chunks straight to stdout and the file)
+- "build": the lines read into a list, then build_prompt, print and
+  write_atomic, as the session and interactive paths did before
+Reports each child's peak RSS in MB; streaming should stay flat.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import os, resource, sys
+sys.stdout = open(os.devnull, "w")
+how, path, out = sys.argv[1:]
+if how == "stream":
+    from src.app.main import main
+    main(["--lines", path, "--save", out])
+else:
+    from src.lib.journal import write_atomic
+    from src.lib.prompt_builder import build_prompt
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    prompt = build_prompt("chat", {"lines": lines})
+    print(prompt)
+    write_atomic(out, prompt)
+try:
+    # Linux: ru_maxrss survives exec, so it would report the parent's peak if
+    # that was higher; VmHWM is this process's own
+    with open("/proc/self/status") as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_kb = peak / 1024 if sys.platform == "darwin" else peak
+print(peak_kb / 1024, file=sys.stderr)
+"""
+
+
+def write_transcript(path: str, lines: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            f.write(f"[2026-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}] 呼吸に注意を向けている line {i}\n")
+
+
+def peak_rss_mb(how: str, transcript: str, out: str) -> float:
+    """Peak RSS (MB) of one child process building the prompt `how` ("stream" or "build")."""
+    env = dict(os.environ, PYTHONPATH=ROOT, SPEECH_DRY_RUN="1")
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, how, transcript, out],
+        cwd=ROOT,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(proc.stderr.strip().splitlines()[-1])
+
+
+def measure(sizes: List[int]) -> Dict[int, Dict[str, float]]:
+    results: Dict[int, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        transcript = os.path.join(tmp, "transcript.txt")
+        out = os.path.join(tmp, "prompt.txt")
+        for size in sizes:
+            write_transcript(transcript, size)
+            results[size] = {how: peak_rss_mb(how, transcript, out) for how in ("stream", "build")}
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated line counts")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    print(f"{'lines':>10}  {'stream MB':>10}  {'build MB':>10}")
+    for size, mb in measure(sizes).items():
+        print(f"{size:>10}  {mb['stream']:>10.1f}  {mb['build']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Time the session turn loop end to end in dry-run mode.
+
+Usage: PYTHONPATH=. python benchmarks/bench_session.py [--turns 300]
+
+Runs `run_session` with voice input from STT_DRY_RUN_SCRIPT and speech in
+SPEECH_DRY_RUN, so each turn goes through the listener thread, the event
+loop, SessionCore and the speech queue. Prints one JSON line with the
+per-turn cost.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    os.environ.update(
+        SPEECH_DRY_RUN="1",
+        STT_DRY_RUN="1",
+        STT_DRY_RUN_SCRIPT="|".join([f"line {i}" for i in range(args.turns)] + ["/read", "/undo", "/done"]),
+    )
+    from src.lib.session import SessionConfig, run_session
+
+    cfg = SessionConfig(minutes=10, interval_sec=3600, use_voice_input=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        lines = run_session(cfg)
+        elapsed = time.perf_counter() - t0
+    if len(lines) != args.turns - 1:
+        print(f"expected {args.turns - 1} lines, got {len(lines)}", file=sys.stderr)
+        return 1
+    print(json.dumps({"turns": args.turns + 3, "elapsed": elapsed, "per_turn_us": elapsed / (args.turns + 3) * 1e6}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Compare STT backends on a folder of WAV fixtures.
+
+Usage: PYTHONPATH=. python benchmarks/bench_stt.py FIXTURES [--backends google,vosk] [--json out.json]
+
+Each `name.wav` is transcribed whole by every backend. If `name.txt` sits
+next to it, its text is the reference for the character error rate.
+Reports model load time, per-file latency (mean/p95) and the real-time
+factor (processing seconds per second of audio; below 1.0 is faster than
+real time).
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import wave
+from typing import Dict, List, Optional, Tuple
+
+from src.lib.stt import AudioSegment, backend_names, get_backend
+
+
+def _load_fixture(path: str) -> Tuple[AudioSegment, Optional[str]]:
+    with wave.open(path, "rb") as w:
+        if w.getnchannels() != 1:
+            raise ValueError(f"{path}: expected mono audio")
+        segment = AudioSegment(w.readframes(w.getnframes()), w.getframerate(), w.getsampwidth())
+    ref_path = os.path.splitext(path)[0] + ".txt"
+    ref = None
+    if os.path.exists(ref_path):
+        with open(ref_path, encoding="utf-8") as f:
+            ref = f.read().strip()
+    return segment, ref
+
+
+def _edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def _normalize(text: str) -> str:
+    return "".join(text.lower().split())
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def bench_backend(name: str, fixtures: List[str], lang: str) -> Dict:
+    t0 = time.perf_counter()
+    backend = get_backend(name)
+    load_sec = time.perf_counter() - t0
+
+    latencies: List[float] = []
+    audio_sec = 0.0
+    errors = 0
+    ref_chars = 0
+    for path in fixtures:
+        segment, ref = _load_fixture(path)
+        t0 = time.perf_counter()
+        result = backend.transcribe(segment, lang)
+        latencies.append(time.perf_counter() - t0)
+        audio_sec += segment.duration
+        if ref is not None:
+            errors += _edit_distance(_normalize(result.text), _normalize(ref))
+            ref_chars += len(_normalize(ref))
+    total = sum(latencies)
+    return {
+        "backend": name,
+        "files": len(fixtures),
+        "audio_sec": round(audio_sec, 3),
+        "load_sec": round(load_sec, 3),
+        "latency_mean_sec": round(total / len(latencies), 4) if latencies else 0.0,
+        "latency_p95_sec": round(_percentile(latencies, 95), 4),
+        "rtf": round(total / audio_sec, 4) if audio_sec else 0.0,
+        "cer": round(errors / ref_chars, 4) if ref_chars else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", help="Directory of .wav files (with optional .txt references)")
+    parser.add_argument("--backends", default=",".join(backend_names()), help="Comma-separated backend names")
+    parser.add_argument("--lang", default="ja-JP")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    fixtures = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not fixtures:
+        print(f"No .wav files in {args.fixtures}", file=sys.stderr)
+        return 2
+
+    results = []
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            results.append(bench_backend(name, fixtures, args.lang))
+        except (KeyError, RuntimeError) as e:
+            print(f"skip {name}: {e}", file=sys.stderr)
+
+    print(f"{'backend':<10} {'files':>5} {'audio s':>8} {'load s':>7} {'mean s':>7} {'p95 s':>7} {'RTF':>6} {'CER':>6}")
+    for r in results:
+        cer = "-" if r["cer"] is None else f"{r['cer']:.3f}"
+        print(
+            f"{r['backend']:<10} {r['files']:>5} {r['audio_sec']:>8.1f} {r['load_sec']:>7.2f} "
+            f"{r['latency_mean_sec']:>7.3f} {r['latency_p95_sec']:>7.3f} {r['rtf']:>6.3f} {cer:>6}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
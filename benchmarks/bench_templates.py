@@ -0,0 +1,59 @@
+"""Per-call prompt render cost: the old if-chain vs the template registry.
+
+Usage: PYTHONPATH=. python benchmarks/bench_templates.py [--number 50000]
+
+Reports microseconds per call for each mode with the legacy builder,
+the registry as configured (compiled templates, no cache), the same
+renderers with the LRU cache forced on for a repeated record, and
+render_many over a batch.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from typing import Dict, List, Optional
+
+from benchmarks.legacy_prompt import legacy_build_prompt
+from src.lib.templates import TemplateRegistry, default_registry
+
+SAMPLES: Dict[str, Dict] = {
+    "chat": {"lines": ["hello", " world "]},
+    "diary": {"title": " My Day ", "body": "It was fine."},
+    "music": {"genre": "psytrance", "bpm": 145, "mood": "hypnotic"},
+    "image": {"subject": "cat", "style": "cartoon"},
+}
+
+
+def _us(fn, number: int) -> float:
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50000, help="Calls per measurement")
+    args = parser.parse_args(argv)
+    n = args.number
+
+    plain = default_registry()
+    cached = default_registry()
+    for mode in SAMPLES:
+        cached.register(mode, plain.get(mode), cache=True)
+    print(f"{'mode':<6} {'legacy':>8} {'registry':>8} {'cached':>8} {'many':>8}   (us/call)")
+    for mode, data in SAMPLES.items():
+        assert plain.render(mode, data) == legacy_build_prompt(mode, data)
+        batch = [data] * 1000
+        row = [
+            _us(lambda: legacy_build_prompt(mode, data), n),
+            _us(lambda: plain.render(mode, data), n),
+            _us(lambda: cached.render(mode, data), n),
+            _us(lambda: plain.render_many(mode, batch), max(1, n // 1000)) / 1000,
+        ]
+        print(f"{mode:<6} " + " ".join(f"{v:>8.2f}" for v in row))
+    compile_us = _us(lambda: TemplateRegistry().register("t", "Music: {genre|'x':strip}{[ @ {bpm} BPM]}"), 2000)
+    print(f"compile one template: {compile_us:.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
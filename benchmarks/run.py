@@ -0,0 +1,353 @@
+"""Run the benchmark suite and compare it with the checked-in baseline.
+
+Usage: PYTHONPATH=. python benchmarks/run.py [--only a,b] [--json out.json] [--runs N] [--update-baseline]
+
+Each benchmark reports one number with a direction (lower or higher is
+better). A result worse than its baseline by more than the benchmark's
+tolerance (a fraction: 0.3 means 30%) is a regression, and the run exits 1.
+Baselines are machine-specific: refresh them with --update-baseline
+(`make bench-baseline`) on the machine that runs the comparison. With
+--runs N each benchmark runs N times and reports the median; recording a
+baseline that way sets each tolerance from the spread it showed. Socket
+and process-spawn benchmarks (IO_BOUND) never gate tighter than
+IO_MIN_TOLERANCE.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_TOLERANCE = 0.3
+# A recorded tolerance is TOLERANCE_MARGIN x the worst run's distance from
+# the median, and never under MIN_TOLERANCE
+TOLERANCE_MARGIN = 2.0
+MIN_TOLERANCE = 0.15
+# Wall-clock socket and process-spawn timings swing by half between quiet
+# runs on a shared machine; they only flag gross regressions
+IO_BOUND = {"cli_cold_start", "serve_web", "prompt_api"}
+IO_MIN_TOLERANCE = 0.6
+
+sys.path[:0] = [ROOT, os.path.join(ROOT, "scripts")]
+
+
+@dataclass
+class Result:
+    name: str
+    value: float
+    unit: str
+    better: str = "lower"  # or "higher"
+
+
+def _median_us(fn: Callable[[], object], number: int, repeat: int = 15) -> float:
+    """Median microseconds per call over `repeat` rounds.
+
+    Microbenchmarks take a few ms per round, so a stall anywhere moves a
+    best-of-few; the median of many rounds holds still.
+    """
+    return statistics.median(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def bench_parse_command() -> Result:
+    from bench_commands import CASES
+
+    from src.lib.eyesfree import parse_command
+
+    utterances = [u for group in CASES.values() for u in group]
+
+    def run() -> None:
+        for u in utterances:
+            parse_command(u)
+
+    return Result("parse_command", _median_us(run, 200) / len(utterances), "us/op")
+
+
+def bench_build_prompt() -> Result:
+    from bench_templates import SAMPLES
+
+    from src.lib.prompt_builder import build_prompt
+
+    items = list(SAMPLES.items())
+
+    def run() -> None:
+        for mode, data in items:
+            build_prompt(mode, data)
+
+    return Result("build_prompt", _median_us(run, 5000) / len(items), "us/op")
+
+
+def bench_build_bulk() -> Result:
+    from src.lib.bulk import run_build
+
+    modes = ["chat", "diary", "music", "image"]
+    lines = [json.dumps({"id": i, "mode": modes[i % 4], "seed": f"seed {i}"}) + "\n" for i in range(20000)]
+    best = min(run_build(iter(lines), io.StringIO()).elapsed for _ in range(5))
+    return Result("build_bulk", len(lines) / best, "records/s", "higher")
+
+
+def bench_session_turn() -> Result:
+    samples = []
+    for _ in range(5):
+        proc = subprocess.run(
+            [sys.executable, os.path.join(HERE, "bench_session.py"), "--turns", "1000"],
+            env=_child_env(),
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1])["per_turn_us"])
+    return Result("session_turn", min(samples), "us/turn")
+
+
+def bench_cli_cold_start() -> Result:
+    samples = []
+    for _ in range(7):
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "src.app.main", "--help"],
+            env=_child_env(),
+            cwd=ROOT,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        samples.append(time.perf_counter() - t0)
+    return Result("cli_cold_start", min(samples) * 1000, "ms")
+
+
+def bench_serve_web() -> Result:
+    from serve_web import make_server
+
+    requests = 200
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, "index.html"), "w", encoding="utf-8") as f:
+            f.write("<!doctype html><p>" + "x" * 4000)
+        server = make_server(0, root, host="127.0.0.1", quiet=True)
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            rounds = []
+            for _ in range(3):
+                # One keep-alive connection, as a browser loading pages would use
+                conn = http.client.HTTPConnection("127.0.0.1", port)
+                t0 = time.perf_counter()
+                for _ in range(requests):
+                    conn.request("GET", "/index.html")
+                    resp = conn.getresponse()
+                    resp.read()
+                    if resp.status != 200:
+                        raise RuntimeError(f"serve_web returned {resp.status}")
+                rounds.append(time.perf_counter() - t0)
+                conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+    return Result("serve_web", requests / min(rounds), "req/s", "higher")
+
+
+def bench_prompt_api() -> Result:
+    from serve_web import make_server
+
+    batch = json.dumps(
+        {"requests": [{"mode": ("diary", "music", "image")[i % 3], "data": {"seed": f"v{i}"}} for i in range(50)]}
+    ).encode("utf-8")
+    rounds = []
+    with tempfile.TemporaryDirectory() as root:
+        # No response cache: measures parsing, building and transport
+        server = make_server(0, root, host="127.0.0.1", quiet=True, api_cache_size=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            for _ in range(5):
+                t0 = time.perf_counter()
+                for _ in range(20):
+                    conn.request("POST", "/api/prompt/batch", body=batch, headers={"Content-Type": "application/json"})
+                    resp = conn.getresponse()
+                    resp.read()
+                    if resp.status != 200:
+                        raise RuntimeError(f"prompt API returned {resp.status}")
+                rounds.append(time.perf_counter() - t0)
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+    return Result("prompt_api", 20 * 50 / min(rounds), "prompts/s", "higher")
+
+
+def bench_transcript_search() -> Result:
+    import random
+
+    from src.lib.transcript_index import TranscriptIndex, expand_inputs
+
+    rng = random.Random(7)
+    kana = "あいうえおかきくけこさしすせそたちつてとなにぬねのまみむめもやゆよらりるれろわん"
+    words = ["".join(rng.choice(kana) for _ in range(rng.randint(2, 4))) for _ in range(3000)]
+    # Zipf-like: a few words are common, most are rare
+    weights = [1.0 / (i + 1) for i in range(len(words))]
+    queries = [words[i] for i in (3, 30, 300, 2000)] + [f"{words[10]} {words[50]}", words[100] + words[5]]
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "transcripts")
+        os.makedirs(src)
+        for i in range(1000):
+            with open(os.path.join(src, f"{i:04d}.txt"), "w", encoding="utf-8") as f:
+                for j in range(40):
+                    line = "、".join(rng.choices(words, weights, k=8))
+                    f.write(f"[2024-01-{1 + i % 28:02d}T10:{j:02d}:00] {line}。\n")
+        with TranscriptIndex(os.path.join(tmp, "index")) as index:
+            index.update(expand_inputs([src]))
+        with TranscriptIndex(os.path.join(tmp, "index")) as index:
+            us = _median_us(lambda: [index.search(q) for q in queries], number=3, repeat=5) / len(queries)
+    return Result("transcript_search", round(us / 1000, 3), "ms/query")
+
+
+def bench_prompt_stream_rss() -> Result:
+    from bench_prompt_memory import peak_rss_mb, write_transcript
+
+    with tempfile.TemporaryDirectory() as tmp:
+        transcript = os.path.join(tmp, "transcript.txt")
+        # 1M lines (~60 MB): a materialized prompt would show up several times over
+        write_transcript(transcript, 1_000_000)
+        mb = min(peak_rss_mb("stream", transcript, os.path.join(tmp, "prompt.txt")) for _ in range(2))
+    return Result("prompt_stream_rss", round(mb, 1), "MB")
+
+
+BENCHMARKS: Dict[str, Callable[[], Result]] = {
+    "parse_command": bench_parse_command,
+    "build_prompt": bench_build_prompt,
+    "build_bulk": bench_build_bulk,
+    "session_turn": bench_session_turn,
+    "cli_cold_start": bench_cli_cold_start,
+    "serve_web": bench_serve_web,
+    "prompt_api": bench_prompt_api,
+    "transcript_search": bench_transcript_search,
+    "prompt_stream_rss": bench_prompt_stream_rss,
+}
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("benchmarks", {})
+
+
+def compare(result: Result, base: Optional[Dict]) -> Optional[float]:
+    """Relative change, signed so that positive is worse; None without a baseline."""
+    if not base or not base.get("value"):
+        return None
+    change = (result.value - base["value"]) / base["value"]
+    return change if result.better == "lower" else -change
+
+
+def summarize(runs: List[Result]) -> Tuple[Result, float]:
+    """The median result, and how much worse than it the worst run was."""
+    ordered = sorted(runs, key=lambda r: r.value)
+    median = ordered[len(ordered) // 2]
+    spread = max(compare(r, asdict(median)) or 0.0 for r in ordered)
+    return median, spread
+
+
+def min_tolerance(name: str) -> float:
+    return IO_MIN_TOLERANCE if name in IO_BOUND else MIN_TOLERANCE
+
+
+def tolerance_for(name: str, spread: float) -> float:
+    return round(max(min_tolerance(name), TOLERANCE_MARGIN * spread), 2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", help="Comma-separated benchmark names (default: all)")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--runs", type=int, default=1, help="Run each benchmark N times and report the median")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the baseline (with --runs > 1, tolerances too)",
+    )
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}; have {', '.join(BENCHMARKS)}", file=sys.stderr)
+        return 2
+
+    baseline = load_baseline(args.baseline)
+    # Whole rounds, so each benchmark's runs are spread over the session
+    # rather than back to back: the spread then covers the machine's drift
+    runs: Dict[str, List[Result]] = {name: [] for name in names}
+    for round_no in range(max(1, args.runs)):
+        if args.runs > 1:
+            print(f"round {round_no + 1}/{args.runs}", file=sys.stderr, flush=True)
+        for name in names:
+            runs[name].append(BENCHMARKS[name]())
+
+    results: List[Result] = []
+    spreads: Dict[str, float] = {}
+    regressions = 0
+    print(f"{'benchmark':<16} {'value':>12} {'unit':<10} {'baseline':>12} {'change':>8}")
+    for name in names:
+        result, spreads[name] = summarize(runs[name])
+        results.append(result)
+        base = baseline.get(name)
+        change = compare(result, base)
+        tolerance = max(min_tolerance(name), (base or {}).get("tolerance", DEFAULT_TOLERANCE))
+        status = ""
+        if change is not None and change > tolerance:
+            status = f"  REGRESSION (> {tolerance:.0%})"
+            regressions += 1
+        base_text = f"{base['value']:>12.2f}" if base else f"{'-':>12}"
+        change_text = f"{change:>+8.1%}" if change is not None else f"{'-':>8}"
+        spread_text = f"  (runs within {spreads[name]:+.1%} of median)" if args.runs > 1 else ""
+        print(f"{name:<16} {result.value:>12.2f} {result.unit:<10} {base_text} {change_text}{status}{spread_text}", flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+    if args.update_baseline:
+        merged = dict(baseline)
+        for r in results:
+            entry = asdict(r)
+            entry.pop("name")
+            entry["value"] = round(entry["value"], 3)
+            if args.runs > 1:
+                entry["tolerance"] = tolerance_for(r.name, spreads[r.name])
+            else:
+                entry["tolerance"] = baseline.get(r.name, {}).get("tolerance", DEFAULT_TOLERANCE)
+            merged[r.name] = entry
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"benchmarks": merged}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{regressions} regression(s) against {args.baseline}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
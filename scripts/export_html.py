@@ -0,0 +1,554 @@
+"""Export the example pages to dist/: minified, content-hashed and precompressed.
+
+Usage: python scripts/export_html.py [--out dist] [--workers N] [--force] [--no-minify] [sources...]
+
+- HTML keeps its name (it is the URL people open) and is revalidated;
+  every other asset is written as `name.<hash>.ext` and may be cached
+  forever. References to assets inside HTML are rewritten to the hashed
+  names, and `manifest.json` maps each source path to its output.
+- Compressible outputs get `.gz` (and `.br` when the `brotli` module is
+  installed) siblings, which scripts/serve_web.py serves as is.
+- `.export-cache.json` in the output directory records each source's
+  size, mtime and hash. A source whose size and mtime are unchanged is
+  skipped without being read, so a repeat export only stats files; one
+  that was touched is re-hashed and skipped if its content is the same.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:  # optional: only .gz siblings without it
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover - depends on environment
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Same trees `make export-html` used to copy
+DEFAULT_SOURCES = ("examples", "picture_diary/src", "picture_diary/v2")
+MANIFEST = "manifest.json"
+CACHE_FILE = ".export-cache.json"
+# Bump when the minifiers change so old cache entries are rebuilt
+PIPELINE_VERSION = "1"
+# Sources modified this recently are hashed even if size and mtime match
+RACY_NS = 2_000_000_000
+HASH_LEN = 10
+COMPRESSIBLE = {".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".map"}
+MIN_COMPRESS_SIZE = 256
+PAGE_SUFFIXES = (".html", ".htm")
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# --- minifiers -------------------------------------------------------------
+
+_CSS_TOKEN = re.compile(r"""/\*.*?\*/|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|\s+|[^"'/\s]+|/""", re.S)
+_CSS_TIGHT = set("{};,:>")
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace; strings are kept verbatim."""
+    out: List[str] = []
+    pending_space = False
+    for m in _CSS_TOKEN.finditer(css):
+        tok = m.group()
+        if tok.startswith("/*"):
+            # Comments can separate tokens just like whitespace
+            pending_space = True
+            continue
+        if tok.isspace():
+            pending_space = True
+            continue
+        if pending_space and out:
+            prev = out[-1][-1]
+            # ':' stays spaced on its left: `a :hover` is not `a:hover`
+            if prev not in _CSS_TIGHT and tok[0] not in _CSS_TIGHT - {":"}:
+                out.append(" ")
+        pending_space = False
+        if tok == "}" and out and out[-1] == ";":
+            out.pop()
+        out.append(tok)
+    return "".join(out).strip()
+
+
+_JS_IDENT = re.compile(r"[\w$\u0080-\uffff]")
+# After these (or at the start), '/' begins a regex literal rather than a division
+_JS_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_JS_REGEX_KEYWORDS = {
+    "return", "typeof", "case", "do", "else", "in", "of", "new", "delete",
+    "void", "throw", "instanceof", "yield", "await",
+}
+
+
+def _skip_string(src: str, i: int) -> int:
+    quote = src[i]
+    i += 1
+    while i < len(src):
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == quote or c == "\n":
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_template(src: str, i: int) -> int:
+    """End of the template literal starting at `i`, nested `${}` included."""
+    i += 1
+    while i < len(src):
+        c = src[i]
+        if c == "\\":
+            i += 2
+        elif c == "`":
+            return i + 1
+        elif src.startswith("${", i):
+            i += 2
+            depth = 1
+            while i < len(src) and depth:
+                c = src[i]
+                if c in "'\"":
+                    i = _skip_string(src, i)
+                    continue
+                if c == "`":
+                    i = _skip_template(src, i)
+                    continue
+                if c == "{":
+                    depth += 1
+                elif c == "}":
+                    depth -= 1
+                i += 1
+        else:
+            i += 1
+    return i
+
+
+def _skip_regex(src: str, i: int) -> int:
+    i += 1
+    in_class = False
+    while i < len(src):
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "\n":
+            return i
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "/":
+            i += 1
+            while i < len(src) and _JS_IDENT.match(src[i]):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def _regex_allowed(out: List[str]) -> bool:
+    text = "".join(out[-3:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _JS_REGEX_AFTER:
+        return True
+    word = re.search(r"[\w$]+$", text)
+    return bool(word) and word.group() in _JS_REGEX_KEYWORDS
+
+
+def minify_js(js: str) -> str:
+    """Remove comments and indentation without touching strings or regexes.
+
+    Line breaks are kept wherever one could end a statement (ASI), so this
+    is a whitespace minifier, not a mangler: the output runs the same.
+    """
+    out: List[str] = []
+    i, n = 0, len(js)
+    pending = ""  # "", " " or "\n": whitespace seen since the last token
+    while i < n:
+        c = js[i]
+        if c in " \t\r\n\f\v":
+            if c == "\n" or pending == "\n":
+                pending = "\n"
+            else:
+                pending = " "
+            i += 1
+            continue
+        if js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        if js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            comment = js[i:] if end < 0 else js[i:end + 2]
+            pending = "\n" if "\n" in comment or pending == "\n" else (pending or " ")
+            i = n if end < 0 else end + 2
+            continue
+        if c in "'\"":
+            end = _skip_string(js, i)
+        elif c == "`":
+            end = _skip_template(js, i)
+        elif c == "/" and _regex_allowed(out):
+            end = _skip_regex(js, i)
+        elif _JS_IDENT.match(c):
+            end = i + 1
+            while end < n and _JS_IDENT.match(js[end]):
+                end += 1
+        else:
+            end = i + 1
+        tok = js[i:end]
+        if pending and out:
+            prev = out[-1][-1]
+            if pending == "\n":
+                # Safe to join: no statement can end right after these, or before a closer
+                if prev not in "{;,([" and tok[0] not in "})],;":
+                    out.append("\n")
+            elif (
+                (_JS_IDENT.match(prev) and _JS_IDENT.match(tok[0]))
+                or (prev in "+-" and tok[0] == prev)
+                or (prev == "/" or tok[0] == "/")
+            ):
+                out.append(" ")
+        pending = ""
+        out.append(tok)
+        i = end
+    return "".join(out)
+
+
+_HTML_RAW = re.compile(
+    r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)|(<!--.*?-->)|(<[^>]*>)",
+    re.S | re.I,
+)
+_SCRIPT_TYPE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]+)""", re.I)
+_JS_TYPES = {"", "text/javascript", "application/javascript", "module"}
+
+
+def _collapse(text: str) -> str:
+    return re.sub(r"\s+", lambda m: "\n" if "\n" in m.group() else " ", text)
+
+
+def minify_html(html: str) -> str:
+    """Collapse whitespace between tags, drop comments, minify inline JS/CSS.
+
+    <pre> and <textarea> bodies, tags themselves (attribute values) and
+    non-JS scripts (JSON, templates) are left alone. Whitespace runs become
+    one space or one newline, so inline layout renders the same.
+    """
+    out: List[str] = []
+    pos = 0
+    dropped = False
+    for m in _HTML_RAW.finditer(html):
+        text = _collapse(html[pos:m.start()])
+        if dropped and out and out[-1][-1:].isspace():
+            text = text.lstrip()  # no blank line where a comment was
+        out.append(text)
+        dropped = False
+        pos = m.end()
+        if m.group(1):
+            open_tag, name, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+            if name == "script":
+                kind = _SCRIPT_TYPE.search(open_tag)
+                if (kind.group(1).lower() if kind else "") in _JS_TYPES and body.strip():
+                    body = minify_js(body)
+            elif name == "style":
+                body = minify_css(body)
+            out.append(open_tag + body + close_tag)
+        elif m.group(5):
+            comment = m.group(5)
+            if comment.startswith("<!--[if") or comment.startswith("<!--<!"):
+                out.append(comment)  # conditional comments are markup
+            else:
+                dropped = True
+        else:
+            out.append(m.group(6))
+    out.append(_collapse(html[pos:]))
+    return "".join(out).strip() + "\n"
+
+
+MINIFIERS: Dict[str, Callable[[str], str]] = {
+    ".html": minify_html,
+    ".htm": minify_html,
+    ".css": minify_css,
+    ".js": minify_js,
+    ".mjs": minify_js,
+}
+
+# --- build -----------------------------------------------------------------
+
+
+@dataclass
+class Job:
+    source: str  # absolute path
+    rel: str  # path under the output directory, '/'-separated
+    key: str  # source hash (+ pipeline inputs)
+    hashed: bool  # write under a content-hashed name
+    minify: bool
+    refs: Dict[str, str] = field(default_factory=dict)  # asset URL rewrites for pages
+
+
+@dataclass
+class Built:
+    rel: str
+    key: str
+    output: str  # '/'-separated path under the output directory
+    files: List[str]  # every file written, siblings included
+    size_in: int
+    size_out: int
+    size_gz: int = 0
+    size_br: int = 0
+
+
+@dataclass
+class ExportSummary:
+    built: int = 0
+    skipped: int = 0
+    removed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    elapsed: float = 0.0
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    """Write via a temp file and rename so a running server never sees half a file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o666 & ~_UMASK)  # mkstemp creates 0600; pages must be readable
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def hashed_name(rel: str, digest: str) -> str:
+    stem, ext = os.path.splitext(rel)
+    return f"{stem}.{digest[:HASH_LEN]}{ext}"
+
+
+def _rewrite_refs(html: str, refs: Dict[str, str]) -> str:
+    if not refs:
+        return html
+    pattern = re.compile(
+        r"""(\b(?:src|href)\s*=\s*["'])(%s)(["'?#])""" % "|".join(re.escape(k) for k in sorted(refs, key=len, reverse=True))
+    )
+    return pattern.sub(lambda m: m.group(1) + refs[m.group(2)] + m.group(3), html)
+
+
+def build_one(job: Job, out_dir: str) -> Built:
+    """Minify, hash and precompress one source; runs in a worker process."""
+    with open(job.source, "rb") as f:
+        raw = f.read()
+    ext = os.path.splitext(job.rel)[1].lower()
+    data = raw
+    minifier = MINIFIERS.get(ext) if job.minify else None
+    if minifier is not None or job.refs:
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            text = None
+        if text is not None:
+            if job.refs:
+                text = _rewrite_refs(text, job.refs)
+            if minifier is not None:
+                text = minifier(text)
+            data = text.encode("utf-8")
+    output = hashed_name(job.rel, _digest(data)) if job.hashed else job.rel
+    path = os.path.join(out_dir, *output.split("/"))
+    _write_bytes(path, data)
+    built = Built(job.rel, job.key, output, [output], len(raw), len(data))
+    if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+        # mtime=0 keeps .gz bytes (and so their ETags) stable across rebuilds
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gz) < len(data):
+            _write_bytes(path + ".gz", gz)
+            built.files.append(output + ".gz")
+            built.size_gz = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            if len(br) < len(data):
+                _write_bytes(path + ".br", br)
+                built.files.append(output + ".br")
+                built.size_br = len(br)
+    return built
+
+
+def discover(sources: Iterable[str], root: str = ROOT) -> Dict[str, str]:
+    """Output path ('/'-separated, relative to root) -> absolute source path."""
+    found: Dict[str, str] = {}
+    for source in sources:
+        top = os.path.join(root, source)
+        if os.path.isfile(top):
+            found[os.path.relpath(top, root).replace(os.sep, "/")] = top
+            continue
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                if name.startswith(".") or name.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(dirpath, name)
+                found[os.path.relpath(path, root).replace(os.sep, "/")] = path
+    return found
+
+
+def _load_cache(out_dir: str) -> Dict[str, Dict]:
+    try:
+        with open(os.path.join(out_dir, CACHE_FILE), encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != PIPELINE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def _fresh(entry: Optional[Dict], key: str, out_dir: str) -> bool:
+    return (
+        entry is not None
+        and entry.get("key") == key
+        and all(os.path.isfile(os.path.join(out_dir, *p.split("/"))) for p in entry.get("files", []))
+    )
+
+
+def _ref(from_rel: str, to_rel: str) -> str:
+    return os.path.relpath(to_rel, os.path.dirname(from_rel) or ".").replace(os.sep, "/")
+
+
+def _run_jobs(jobs: List[Job], out_dir: str, workers: int) -> List[Built]:
+    if workers <= 1 or len(jobs) <= 1:
+        return [build_one(job, out_dir) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(build_one, jobs, [out_dir] * len(jobs)))
+
+
+def export(
+    sources: Iterable[str] = DEFAULT_SOURCES,
+    out_dir: str = "dist",
+    *,
+    root: str = ROOT,
+    workers: int = 0,
+    minify: bool = True,
+    force: bool = False,
+) -> ExportSummary:
+    """Export `sources` (paths under `root`) into `out_dir` incrementally.
+
+    - workers: processes for changed files; 0 means one per CPU.
+    - Assets are built before pages, because a page's output depends on
+      the hashed names of the assets it references.
+    """
+    t0 = time.perf_counter()
+    out_dir = os.path.abspath(out_dir)
+    workers = workers or os.cpu_count() or 1
+    found = discover(sources, root)
+    cache = {} if force else _load_cache(out_dir)
+    new_cache: Dict[str, Dict] = {}
+    summary = ExportSummary()
+    salt = f"{PIPELINE_VERSION}:{int(minify)}:"
+
+    def key_of(path: str, extra: str, entry: Optional[Dict]) -> Tuple[str, Optional[List]]:
+        st = os.stat(path)
+        stamp: Optional[List] = [st.st_size, st.st_mtime_ns, _digest(extra.encode()) if extra else ""]
+        if time.time_ns() - st.st_mtime_ns < RACY_NS:
+            stamp = None  # could still change within the same mtime tick: hash it next time too
+        elif entry is not None and entry.get("stamp") == stamp:
+            return entry["key"], stamp
+        with open(path, "rb") as f:
+            return _digest(salt.encode() + f.read() + extra.encode()), stamp
+
+    pages = {rel: path for rel, path in found.items() if rel.lower().endswith(PAGE_SUFFIXES)}
+    assets = {rel: path for rel, path in found.items() if rel not in pages}
+
+    for group, hashed in ((assets, True), (pages, False)):
+        jobs: List[Job] = []
+        stamps: Dict[str, Optional[List]] = {}
+        for rel, path in group.items():
+            refs: Dict[str, str] = {}
+            extra = ""
+            if not hashed:
+                for asset in assets:
+                    refs[_ref(rel, asset)] = _ref(rel, new_cache[asset]["output"])
+                extra = json.dumps(refs, sort_keys=True)
+            key, stamps[rel] = key_of(path, extra, cache.get(rel))
+            if _fresh(cache.get(rel), key, out_dir):
+                new_cache[rel] = dict(cache[rel], stamp=stamps[rel])
+                summary.skipped += 1
+                continue
+            jobs.append(Job(path, rel, key, hashed, minify, refs))
+        for built in _run_jobs(jobs, out_dir, workers):
+            entry = asdict(built)
+            entry["stamp"] = stamps[built.rel]
+            new_cache[built.rel] = entry
+            summary.built += 1
+            summary.bytes_in += built.size_in
+            summary.bytes_out += built.size_out
+
+    # Outputs no current source produces (deleted sources, old hashed names)
+    keep = {p for entry in new_cache.values() for p in entry["files"]}
+    for entry in cache.values():
+        for p in entry.get("files", []):
+            if p not in keep:
+                try:
+                    os.remove(os.path.join(out_dir, *p.split("/")))
+                    summary.removed += 1
+                except OSError:
+                    pass
+
+    manifest = {rel: entry["output"] for rel, entry in sorted(new_cache.items())}
+    _write_json(os.path.join(out_dir, MANIFEST), manifest)
+    _write_json(os.path.join(out_dir, CACHE_FILE), {"version": PIPELINE_VERSION, "files": new_cache})
+    summary.elapsed = time.perf_counter() - t0
+    return summary
+
+
+def _write_json(path: str, obj: Dict) -> None:
+    text = json.dumps(obj, indent=2, sort_keys=True, ensure_ascii=False) + "\n"
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return  # unchanged: keep the mtime (and the server's ETag)
+    except OSError:
+        pass
+    _write_bytes(path, text.encode("utf-8"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=list(DEFAULT_SOURCES), help="Files or directories under the repo")
+    parser.add_argument("--out", default=os.path.join(ROOT, "dist"))
+    parser.add_argument("--workers", type=int, default=0, help="Processes for changed files (0 = all CPUs)")
+    parser.add_argument("--force", action="store_true", help="Ignore the build cache")
+    parser.add_argument("--no-minify", dest="minify", action="store_false")
+    args = parser.parse_args(argv)
+
+    summary = export(args.sources, args.out, workers=args.workers, minify=args.minify, force=args.force)
+    saved = ""
+    if summary.bytes_in:
+        saved = f", {summary.bytes_in} -> {summary.bytes_out} bytes"
+    print(
+        f"Exported to {args.out}: {summary.built} built, {summary.skipped} unchanged, "
+        f"{summary.removed} stale removed{saved} in {summary.elapsed * 1000:.0f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""HTTP load generator for the static server.
+
+Usage: python scripts/load_test.py URL [-c 16] [-n 2000 | -d 10] [--no-keepalive] [--conditional] [--gzip]
+
+Each of `-c` threads sends requests back to back (one persistent HTTP/1.1
+connection per thread unless --no-keepalive) until `-n` requests in total
+or `-d` seconds. --conditional revalidates with the ETag of the first
+response, which measures the 304 path. Prints requests/sec, latency
+percentiles and status counts.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def _connect(url: urllib.parse.SplitResult) -> http.client.HTTPConnection:
+    cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    return cls(url.hostname, url.port, timeout=30)
+
+
+class Worker(threading.Thread):
+    def __init__(
+        self,
+        url: urllib.parse.SplitResult,
+        headers: Dict[str, str],
+        keepalive: bool,
+        budget: Callable[[], bool],
+    ) -> None:
+        super().__init__(daemon=True)
+        self.url = url
+        self.headers = headers
+        self.keepalive = keepalive
+        self.budget = budget
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.bytes = 0
+        self.errors = 0
+
+    def run(self) -> None:
+        target = self.url.path or "/"
+        if self.url.query:
+            target += "?" + self.url.query
+        conn: Optional[http.client.HTTPConnection] = None
+        while self.budget():
+            if conn is None:
+                conn = _connect(self.url)
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", target, headers=self.headers)
+                resp = conn.getresponse()
+                self.bytes += len(resp.read())
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                conn.close()
+                conn = None
+                continue
+            self.latencies.append(time.perf_counter() - t0)
+            self.statuses[resp.status] += 1
+            if not self.keepalive or resp.will_close:
+                conn.close()
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="Total requests (ignored with -d)")
+    parser.add_argument("-d", "--duration", type=float, help="Run for this many seconds instead")
+    parser.add_argument("--no-keepalive", dest="keepalive", action="store_false")
+    parser.add_argument("--conditional", action="store_true", help="Send If-None-Match from the first response")
+    parser.add_argument("--gzip", action="store_true", help="Send Accept-Encoding: br, gzip")
+    args = parser.parse_args(argv)
+
+    url = urllib.parse.urlsplit(args.url)
+    headers: Dict[str, str] = {}
+    if args.gzip:
+        headers["Accept-Encoding"] = "br, gzip"
+    if args.conditional:
+        conn = _connect(url)
+        conn.request("GET", url.path or "/", headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        etag = resp.getheader("ETag")
+        if not etag:
+            print("No ETag in the response; can't run conditional requests", file=sys.stderr)
+            return 2
+        headers["If-None-Match"] = etag
+
+    lock = threading.Lock()
+    issued = 0
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def budget() -> bool:
+        nonlocal issued
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        with lock:
+            if issued >= args.requests:
+                return False
+            issued += 1
+            return True
+
+    workers = [Worker(url, headers, args.keepalive, budget) for _ in range(max(1, args.concurrency))]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies = [lat for w in workers for lat in w.latencies]
+    statuses: Counter = Counter()
+    for w in workers:
+        statuses.update(w.statuses)
+    errors = sum(w.errors for w in workers)
+    total_bytes = sum(w.bytes for w in workers)
+    mode = "keep-alive" if args.keepalive else "new connection each"
+    print(f"{len(latencies)} requests in {elapsed:.2f}s over {len(workers)} connections ({mode})")
+    print(f"requests/sec: {len(latencies) / elapsed:.1f}")
+    print(f"transfer/sec: {total_bytes / elapsed / 1024:.1f} KiB")
+    print(
+        "latency ms: "
+        + "  ".join(f"p{p}={_percentile(latencies, p) * 1e3:.2f}" for p in (50, 95, 99))
+        + f"  max={max(latencies, default=0.0) * 1e3:.2f}"
+    )
+    status = ", ".join(f"{code}={n}" for code, n in sorted(statuses.items()))
+    print(f"status: {status}" + (f", errors={errors}" if errors else ""))
+    return 1 if errors or not latencies else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import argparse
+import email.utils
+import functools
 import http.server
+import json
 import os
+import re
 import socketserver
+import stat
 import threading
+import time
+import urllib.parse
 import webbrowser
 import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 def open_browser(url: str) -> None:
@@ -15,22 +28,413 @@ def open_browser(url: str) -> None:
         pass
 
 
-Handler = http.server.SimpleHTTPRequestHandler
+"""Static files plus a read-only prompt API. All git APIs removed for safety."""
+
+# Precompressed siblings served when the client accepts them, best first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# New .br/.gz siblings are picked up within this many seconds
+VARIANT_TTL = 2.0
+# `name.<10 hex>.ext` files from scripts/export_html.py never change content
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+
+
+@dataclass
+class Variant:
+    path: str
+    size: int
+    etag: str
+
+
+@dataclass
+class FileMeta:
+    size: int
+    mtime_ns: int
+    content_type: str
+    last_modified: str
+    immutable: bool
+    identity: Variant
+    encoded: Dict[str, Variant] = field(default_factory=dict)
+    checked: float = 0.0
+
+
+class MetaCache:
+    """stat() results, ETags and precompressed variants per file.
+
+    An entry is rebuilt when the file's mtime or size changes, so a
+    conditional request costs one stat() and never opens the file.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, FileMeta] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, guess_type: Callable[[str], str]) -> Optional[FileMeta]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            meta = self._entries.get(path)
+        if (
+            meta is not None
+            and meta.mtime_ns == st.st_mtime_ns
+            and meta.size == st.st_size
+            and now - meta.checked < VARIANT_TTL
+        ):
+            return meta
+        meta = self._build(path, st, now, guess_type(path))
+        with self._lock:
+            self._entries[path] = meta
+        return meta
+
+    def _build(self, path: str, st: os.stat_result, now: float, content_type: str) -> FileMeta:
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        meta = FileMeta(
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            content_type=content_type,
+            last_modified=email.utils.formatdate(st.st_mtime, usegmt=True),
+            immutable=bool(HASHED_NAME.search(path)),
+            identity=Variant(path, st.st_size, etag),
+            checked=now,
+        )
+        for encoding, suffix in ENCODINGS:
+            try:
+                vst = os.stat(path + suffix)
+            except OSError:
+                continue
+            # A sibling older than the file is stale; serve the original instead
+            if stat.S_ISREG(vst.st_mode) and vst.st_mtime_ns >= st.st_mtime_ns:
+                meta.encoded[encoding] = Variant(path + suffix, vst.st_size, f'{etag[:-1]}-{encoding}"')
+        return meta
+
+
+API_PREFIX = "/api/"
+API_CACHE_SIZE = 4096
+MAX_BODY = 1 << 20
+MAX_BATCH = 1000
 
 
-"""Static-only server. All git APIs removed for safety."""
+class ApiError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
 
 
-def serve(port: int = 8000, open_path: str | None = None) -> None:
-    root = os.path.abspath(os.getcwd())
-    os.chdir(root)
+def canonical_json(obj: Any) -> str:
+    """Key order and whitespace don't matter: equal requests share a cache entry."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+class ResponseCache:
+    """LRU of encoded JSON responses keyed on canonical request bodies."""
+
+    def __init__(self, size: int = API_CACHE_SIZE) -> None:
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class PromptAPI:
+    """`/api/prompt` and `/api/prompt/batch` on top of `build_prompt`.
+
+    - A request is `{"mode": ..., "data": {...}}`; a batch is
+      `{"requests": [...]}` and answers `{"results": [...]}` in order, with
+      `{"error": ...}` in place of any item that can't be built.
+    - Single responses are cached; batch items go through the same cache,
+      so a batch and single requests for the same variant share entries.
+    """
+
+    def __init__(self, cache_size: int = API_CACHE_SIZE) -> None:
+        self.cache = ResponseCache(cache_size)
+        self._build: Optional[Callable[[str, Dict], str]] = None
+
+    def _builder(self) -> Callable[[str, Dict], str]:
+        if self._build is None:
+            # Imported on first use so the static server starts without src/
+            if ROOT not in sys.path:
+                sys.path.insert(0, ROOT)
+            from src.lib.prompt_builder import build_prompt
+
+            self._build = build_prompt
+        return self._build
+
+    def prompt(self, request: Any) -> Tuple[bytes, bool]:
+        """Encoded `{"prompt": ...}` for one request, and whether it was cached."""
+        if not isinstance(request, dict):
+            raise ApiError(400, "request must be an object")
+        mode, data = request.get("mode"), request.get("data", {})
+        if not isinstance(mode, str) or not mode:
+            raise ApiError(400, "missing mode")
+        if not isinstance(data, dict):
+            raise ApiError(400, "data must be an object")
+        key = canonical_json([mode, data])
+        body = self.cache.get(key)
+        if body is not None:
+            return body, True
+        try:
+            prompt = self._builder()(mode, data)
+        except Exception as e:
+            raise ApiError(422, f"{type(e).__name__}: {e}")
+        body = json.dumps({"prompt": prompt}, ensure_ascii=False).encode("utf-8")
+        self.cache.put(key, body)
+        return body, False
+
+    def batch(self, request: Any) -> bytes:
+        items = request.get("requests") if isinstance(request, dict) else request
+        if not isinstance(items, list):
+            raise ApiError(400, "batch must be {\"requests\": [...]}")
+        if len(items) > MAX_BATCH:
+            raise ApiError(413, f"at most {MAX_BATCH} requests per batch")
+        parts: List[bytes] = []
+        for item in items:
+            try:
+                parts.append(self.prompt(item)[0])
+            except ApiError as e:
+                parts.append(json.dumps({"error": str(e)}, ensure_ascii=False).encode("utf-8"))
+        # Cached item bodies are spliced in without re-encoding
+        return b'{"results":[' + b",".join(parts) + b"]}"
 
-    handler = Handler
-    with socketserver.TCPServer(("", port), handler) as httpd:
+
+def _accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+
+class StaticHandler(http.server.SimpleHTTPRequestHandler):
+    """Keep-alive static files with validators, precompressed variants and sendfile."""
+
+    protocol_version = "HTTP/1.1"
+    timeout = 30  # idle keep-alive connections give their thread back
+    # Headers and the sendfile body are separate writes; without this, Nagle
+    # plus delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+    meta: MetaCache
+    api: Optional[PromptAPI] = None
+    quiet = False
+
+    def do_GET(self) -> None:
+        if self._is_api():
+            return self._api_error(ApiError(405, "use POST"))
+        self._serve(body=True)
+
+    def do_HEAD(self) -> None:
+        if self._is_api():
+            return self._api_error(ApiError(405, "use POST"))
+        self._serve(body=False)
+
+    def do_POST(self) -> None:
+        if not self._is_api():
+            self.close_connection = True  # the body was never read
+            self.send_error(405, "Method not allowed")
+            return
+        try:
+            request = self._read_json()
+            path = urllib.parse.urlsplit(self.path).path.rstrip("/")
+            if path == "/api/prompt":
+                body, hit = self.api.prompt(request)
+                self._send_json(200, body, {"X-Cache": "hit" if hit else "miss"})
+            elif path == "/api/prompt/batch":
+                self._send_json(200, self.api.batch(request))
+            else:
+                raise ApiError(404, "no such endpoint")
+        except ApiError as e:
+            self._api_error(e)
+
+    def _is_api(self) -> bool:
+        return self.api is not None and self.path.startswith(API_PREFIX)
+
+    def _read_json(self) -> Any:
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            # Without a length the connection can't be reused for the next request
+            self.close_connection = True
+            raise ApiError(411, "Content-Length required")
+        if int(length) > MAX_BODY:
+            self.close_connection = True
+            raise ApiError(413, f"body over {MAX_BODY} bytes")
+        raw = self.rfile.read(int(length))
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            raise ApiError(400, f"invalid JSON: {e}")
+
+    def _send_json(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _api_error(self, error: ApiError) -> None:
+        headers = {"Allow": "POST"} if error.status == 405 else None
+        self._send_json(error.status, json.dumps({"error": str(error)}).encode("utf-8"), headers)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _serve(self, body: bool) -> None:
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not urllib.parse.urlsplit(self.path).path.endswith("/") or not os.path.isfile(index):
+                # Redirects and listings stay with the stock handler
+                return super().do_GET() if body else super().do_HEAD()
+            path = index
+        meta = self.meta.get(path, self.guess_type)
+        if meta is None:
+            self.send_error(404, "File not found")
+            return
+        encoding, variant = self._choose(meta)
+        if self._not_modified(meta, variant):
+            self.send_response(304)
+            self._validators(meta, variant)
+            self.end_headers()
+            return
+        try:
+            f = open(variant.path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", meta.content_type)
+            self.send_header("Content-Length", str(variant.size))
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self._validators(meta, variant)
+            self.end_headers()
+            if body:
+                try:
+                    # Zero-copy (os.sendfile) where the platform has it
+                    self.connection.sendfile(f, 0, variant.size)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+    def _choose(self, meta: FileMeta) -> Tuple[Optional[str], Variant]:
+        if meta.encoded:
+            accepted = _accepted_encodings(self.headers.get("Accept-Encoding"))
+            for encoding, _ in ENCODINGS:
+                if encoding in meta.encoded and accepted.get(encoding, 0.0) > 0:
+                    return encoding, meta.encoded[encoding]
+        return None, meta.identity
+
+    def _validators(self, meta: FileMeta, variant: Variant) -> None:
+        self.send_header("ETag", variant.etag)
+        self.send_header("Last-Modified", meta.last_modified)
+        if meta.immutable:
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            # Pages change while editing: always revalidate, which is a cheap 304
+            self.send_header("Cache-Control", "no-cache")
+        if meta.encoded:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def _not_modified(self, meta: FileMeta, variant: Variant) -> bool:
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            tags = [t.strip() for t in inm.split(",")]
+            return "*" in tags or any(t.removeprefix("W/") == variant.etag for t in tags)
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                since = email.utils.parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return meta.mtime_ns // 1_000_000_000 <= since
+        return False
+
+
+class ThreadingServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def make_server(
+    port: int = 8000,
+    root: str | None = None,
+    host: str = "",
+    *,
+    threaded: bool = True,
+    quiet: bool = False,
+    api: bool = True,
+    api_cache_size: int = API_CACHE_SIZE,
+) -> socketserver.TCPServer:
+    """Static file server for `root` (default: cwd); port 0 picks a free port.
+
+    - threaded: one thread per connection, so a slow client blocks no one;
+      otherwise the old single-threaded TCPServer.
+    - api: also answer POST /api/prompt and /api/prompt/batch.
+    """
+    root = os.path.abspath(root or os.getcwd())
+    handler_cls = type(
+        "Handler",
+        (StaticHandler,),
+        {"meta": MetaCache(), "api": PromptAPI(api_cache_size) if api else None, "quiet": quiet},
+    )
+    handler = functools.partial(handler_cls, directory=root)
+    server_cls = ThreadingServer if threaded else socketserver.TCPServer
+    return server_cls((host, port), handler)
+
+
+def serve(
+    port: int = 8000,
+    open_path: str | None = None,
+    *,
+    root: str | None = None,
+    threaded: bool = True,
+    quiet: bool = False,
+    open_browser_tab: bool = True,
+    api: bool = True,
+) -> None:
+    root = os.path.abspath(root or os.getcwd())
+
+    with make_server(port, root, threaded=threaded, quiet=quiet, api=api) as httpd:
         # Default to partner site if specified, else psytrance editor
         index = open_path or "/examples/psytrance_prompt_editor.html"
         url = f"http://localhost:{port}{index}"
-        threading.Timer(0.5, open_browser, args=(url,)).start()
+        if open_browser_tab:
+            threading.Timer(0.5, open_browser, args=(url,)).start()
         print(f"Serving {root} at {url}")
         try:
             httpd.serve_forever()
@@ -39,11 +443,21 @@ def serve(port: int = 8000, open_path: str | None = None) -> None:
 
 
 if __name__ == "__main__":
-    index = os.environ.get("OPEN_PATH")
-    if not index and "--index" in sys.argv:
-        try:
-            idx = sys.argv.index("--index")
-            index = sys.argv[idx + 1]
-        except Exception:
-            index = None
-    serve(open_path=index)
+    parser = argparse.ArgumentParser(description="Serve the example pages")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--index", default=os.environ.get("OPEN_PATH"), help="Page to open in the browser")
+    parser.add_argument("--root", help="Directory to serve (default: cwd)")
+    parser.add_argument("--single-thread", dest="threaded", action="store_false", help="Old one-at-a-time server")
+    parser.add_argument("--quiet", action="store_true", help="No per-request log lines")
+    parser.add_argument("--no-open", dest="open_browser_tab", action="store_false", help="Don't open a browser tab")
+    parser.add_argument("--no-api", dest="api", action="store_false", help="Static files only")
+    args = parser.parse_args()
+    serve(
+        args.port,
+        args.index,
+        root=args.root,
+        threaded=args.threaded,
+        quiet=args.quiet,
+        open_browser_tab=args.open_browser_tab,
+        api=args.api,
+    )
@@ -0,0 +1,146 @@
+"""Load generator for the session host.
+
+Usage: python scripts/session_load.py [URL] [-c 300] [-t 20] [--think 0.5] [--ramp 2] [--self-host]
+
+Opens `-c` concurrent sessions (spread over `--ramp` seconds); each sends
+`-t` turns with `--think` seconds between them, then /done. Turn latency
+is the time from sending a line to the host's reply to it (the interrupt
+that precedes every acknowledgement). --self-host starts a host in this
+process on a free port instead of connecting to URL.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.lib import websocket  # noqa: E402
+from src.lib.session_host import SessionHost  # noqa: E402
+
+DEFAULT_URL = "ws://127.0.0.1:8765/session"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+@dataclass
+class LoadResult:
+    latencies: List[float] = field(default_factory=list)
+    completed: int = 0
+    errors: int = 0
+    peak: int = 0
+    active: int = 0
+
+
+async def _reply(ws: websocket.WebSocket, kind: str) -> Optional[dict]:
+    while True:
+        raw = await ws.recv()
+        if raw is None:
+            return None
+        message = json.loads(raw)
+        if message.get("type") == kind:
+            return message
+        if message.get("type") == "error":
+            raise RuntimeError(message.get("error"))
+
+
+async def one_session(
+    host: str, port: int, path: str, index: int, turns: int, think: float, result: LoadResult
+) -> None:
+    try:
+        ws = await websocket.connect(host, port, path)
+    except (OSError, websocket.HandshakeError):
+        result.errors += 1
+        return
+    result.active += 1
+    result.peak = max(result.peak, result.active)
+    try:
+        # Long interval: prompts would interleave with the replies being timed
+        ws.send(json.dumps({"type": "start", "minutes": 60, "interval_sec": 3600}))
+        for turn in range(turns):
+            await asyncio.sleep(think)
+            t0 = time.perf_counter()
+            ws.send(json.dumps({"type": "text", "text": f"session {index} turn {turn}"}, ensure_ascii=False))
+            if await _reply(ws, "interrupt") is None:
+                raise ConnectionError("closed mid-session")
+            result.latencies.append(time.perf_counter() - t0)
+        ws.send(json.dumps({"type": "text", "text": "/done"}))
+        end = await _reply(ws, "end")
+        if end is None or len(end.get("lines", ())) != turns:
+            raise RuntimeError("transcript mismatch")
+        result.completed += 1
+    except (ConnectionError, RuntimeError, ValueError):
+        result.errors += 1
+    finally:
+        result.active -= 1
+        await ws.close()
+
+
+async def run_load(
+    host: str, port: int, path: str, sessions: int, turns: int, think: float, ramp: float
+) -> LoadResult:
+    result = LoadResult()
+
+    async def delayed(i: int) -> None:
+        await asyncio.sleep(ramp * i / max(1, sessions))
+        await one_session(host, port, path, i, turns, think, result)
+
+    await asyncio.gather(*(delayed(i) for i in range(sessions)))
+    return result
+
+
+async def _main(args: argparse.Namespace) -> int:
+    url = urllib.parse.urlsplit(args.url)
+    host, port, path = url.hostname or "127.0.0.1", url.port or 80, url.path or "/"
+    server = None
+    if args.self_host:
+        server = await SessionHost(max_sessions=args.concurrency).start("127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+    t0 = time.perf_counter()
+    try:
+        result = await run_load(host, port, path, args.concurrency, args.turns, args.think, args.ramp)
+    finally:
+        if server is not None:
+            server.close()
+    elapsed = time.perf_counter() - t0
+
+    lat = result.latencies
+    print(f"{result.completed}/{args.concurrency} sessions completed in {elapsed:.2f}s (peak {result.peak} concurrent)")
+    print(f"turns: {len(lat)} ({len(lat) / elapsed:.1f}/s)")
+    print(
+        "turn latency ms: "
+        + "  ".join(f"p{p}={_percentile(lat, p) * 1e3:.2f}" for p in (50, 95, 99))
+        + f"  max={max(lat, default=0.0) * 1e3:.2f}"
+    )
+    if result.errors:
+        print(f"errors: {result.errors}")
+    return 1 if result.errors or result.completed < args.concurrency else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url", nargs="?", default=DEFAULT_URL)
+    parser.add_argument("-c", "--concurrency", type=int, default=300, help="Concurrent sessions")
+    parser.add_argument("-t", "--turns", type=int, default=20, help="Turns per session")
+    parser.add_argument("--think", type=float, default=0.5, help="Seconds between a session's turns")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Spread session starts over this many seconds")
+    parser.add_argument("--self-host", action="store_true", help="Run a host in this process")
+    return asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Host timed sessions for browsers over WebSocket.
+
+Usage: python scripts/session_server.py [--host 127.0.0.1] [--port 8765] [--max-sessions 1000]
+
+Each connection to ws://HOST:PORT/session runs its own SessionCore; the
+browser speaks and listens (see examples/partner_voice_site.html, served
+by scripts/serve_web.py with ?host=ws://HOST:PORT/session).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.lib.session import SessionConfig  # noqa: E402
+from src.lib.session_host import MAX_SESSIONS, serve  # noqa: E402
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SESSION_PORT", "8765")))
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--minutes", type=int, default=15, help="Default session length")
+    parser.add_argument("--interval-sec", type=int, default=60, help="Default prompt interval")
+    parser.add_argument("--lang", default="ja-JP")
+    args = parser.parse_args(argv)
+
+    defaults = SessionConfig(minutes=args.minutes, interval_sec=args.interval_sec, lang=args.lang)
+    try:
+        asyncio.run(serve(args.host, args.port, defaults, args.max_sessions))
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Randomized session scenarios on virtual time, checked against the session rules.
+
+Usage: python scripts/simulate_sessions.py [-n 2000] [--seed N] [--max-minutes 60]
+
+Each scenario picks a length and prompt interval, scripts random utterances
+and commands (sometimes ending with /done), runs it through the real session
+loop on a virtual clock and checks prompt timing, acknowledgements, the
+transcript and the end. Failing scenarios print their seed, so
+`-n 1 --seed N` replays one.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.lib.session import SessionConfig  # noqa: E402
+from src.lib.simulation import check, random_script, simulate  # noqa: E402
+
+INTERVALS = (5, 15, 30, 60, 90, 300)
+
+
+def run_scenario(seed: int, max_minutes: int) -> List[str]:
+    rng = random.Random(seed)
+    cfg = SessionConfig(minutes=rng.randint(1, max_minutes), interval_sec=rng.choice(INTERVALS), use_voice=False)
+    return check(simulate(cfg, random_script(rng, cfg)), cfg)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--scenarios", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=int(time.time()), help="First scenario's seed (default: now)")
+    parser.add_argument("--max-minutes", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    failed = 0
+    for seed in range(args.seed, args.seed + args.scenarios):
+        problems = run_scenario(seed, max(1, args.max_minutes))
+        if problems:
+            failed += 1
+            print(f"seed {seed}: " + "; ".join(problems[:3]))
+    elapsed = time.perf_counter() - t0
+    print(f"{args.scenarios - failed}/{args.scenarios} scenarios passed in {elapsed:.2f}s (seeds {args.seed}..)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Thin client for the resident daemon (`python -m src.app.main --daemon`).
+
+Usage: python -m src.app.client [same arguments as src.app.main]
+
+Forwards argv and stdin to the daemon over its Unix socket and streams
+its stdout/stderr back, so a one-shot prompt skips interpreter and
+speech/STT warm-up. Without a daemon (or for --profile/--trace, which
+measure this process) the command runs in-process as usual.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import sys
+import threading
+from typing import IO, Dict, List, Optional
+
+from src.lib.daemon import default_socket_path, messages, send
+
+# Options that need this process (tracing) or start a daemon themselves
+LOCAL_ONLY = {"--daemon", "--profile", "--trace"}
+# Path options resolved against the client's directory, not the daemon's
+PATH_OPTIONS = {"--save", "--journal", "--lines", "-o", "--output", "--index", "--cache-dir"}
+# Other options that take a value, so it isn't mistaken for a positional
+VALUE_OPTIONS = PATH_OPTIONS | {
+    "--voice", "--rate", "--lang", "--stt-backend", "--session-mins", "--interval-sec", "--fsync-interval",
+    "--trace", "--workers", "--chunk-size", "-n", "--limit", "--renderer", "--cache-mb",
+}
+# Subcommand -> how many leading positionals are paths (None: all of them)
+PATH_POSITIONALS: Dict[str, Optional[int]] = {"transcribe": None, "build": 1, "index": None, "export-audio": 1}
+
+
+def absolute_paths(argv: List[str], cwd: str) -> List[str]:
+    """Rewrite relative paths (option values and subcommand inputs) so the daemon finds the same files."""
+    command = argv[0] if argv and argv[0] in PATH_POSITIONALS else None
+    out: List[str] = argv[:1] if command else []
+    paths_left = 0 if command is None else PATH_POSITIONALS[command]
+    if paths_left is None:
+        paths_left = len(argv)
+    expect: Optional[str] = None  # the option whose value comes next
+    for arg in argv[len(out):]:
+        if expect is not None:
+            if expect in PATH_OPTIONS:
+                arg = _absolute(arg, cwd)
+            expect = None
+        elif arg.startswith("-") and arg != "-":
+            name, eq, value = arg.partition("=")
+            if eq and name in PATH_OPTIONS:
+                arg = f"{name}={_absolute(value, cwd)}"
+            elif not eq and name in VALUE_OPTIONS:
+                expect = name
+        elif paths_left:
+            arg = _absolute(arg, cwd)
+            paths_left -= 1
+        out.append(arg)
+    return out
+
+
+def _absolute(path: str, cwd: str) -> str:
+    return path if not path or path == "-" or os.path.isabs(path) else os.path.join(cwd, path)
+
+
+def connect(path: str) -> Optional[socket.socket]:
+    """Connected socket, or None when no daemon is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _pump_stdin(sock: socket.socket, stdin: IO[str], lock: threading.Lock) -> None:
+    try:
+        while True:
+            line = stdin.readline()
+            if not line:
+                break
+            send(sock, {"stdin": line}, lock)
+        send(sock, {"eof": True}, lock)
+    except (OSError, ValueError):
+        pass
+
+
+def forward(
+    sock: socket.socket,
+    argv: List[str],
+    stdin: IO[str],
+    stdout: IO[str],
+    stderr: IO[str],
+) -> int:
+    """Run `argv` on the daemon behind `sock`; returns its exit code."""
+    lock = threading.Lock()
+    try:
+        tty = stdin.isatty()
+    except (AttributeError, ValueError):
+        tty = False
+    with sock:
+        send(sock, {"argv": argv, "tty": tty}, lock)
+        with sock.makefile("rb") as replies:
+            for message in messages(replies):
+                if message.get("want_stdin"):
+                    # Daemon thread: it may still be blocked on a terminal when the command ends
+                    threading.Thread(
+                        target=_pump_stdin, args=(sock, stdin, lock), name="client-stdin", daemon=True
+                    ).start()
+                elif "stdout" in message:
+                    stdout.write(message["stdout"])
+                    stdout.flush()
+                elif "stderr" in message:
+                    stderr.write(message["stderr"])
+                    stderr.flush()
+                elif "exit" in message:
+                    return int(message["exit"])
+    print("daemon closed the connection", file=stderr)
+    return 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not LOCAL_ONLY.intersection(a.partition("=")[0] for a in argv):
+        sock = connect(default_socket_path())
+        if sock is not None:
+            try:
+                return forward(sock, absolute_paths(argv, os.getcwd()), sys.stdin, sys.stdout, sys.stderr)
+            except KeyboardInterrupt:
+                return 130
+
+    from src.app.main import main as run
+
+    return run(argv) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
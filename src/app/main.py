@@ -1,22 +1,105 @@
 from __future__ import annotations
 
 import argparse
-from typing import List
+import os
+import sys
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-from src.lib.prompt_builder import build_prompt
-from src.lib.speech import speak, chime
-from src.lib.eyesfree import parse_command
-from src.lib.stt import transcribe_once, has_speech_recognition
-from src.lib.session import run_session, SessionConfig
+if TYPE_CHECKING:
+    from src.lib.journal import Journal
 
+# Subsystems (speech, STT, sessions, tracing) are imported where they are
+# used, so a one-shot prompt or --help doesn't load them.
+# tests/app/test_startup.py holds the import budget.
+
+
+MSG_INTERACTIVE = "Interactive mode. Type your text. Press return on an empty line to finish."
+MSG_EYESFREE_HINT = "Use slash commands. Say slash done to finish."
+MSG_UNDONE = "Undone."
+MSG_NOTHING_TO_UNDO = "Nothing to undo."
+MSG_EMPTY = "Nothing yet."
+MSG_HELP = "Commands: /undo, /read, /stop, /done, /save <path>."
+MSG_NO_PATH = "Please provide a path."
+MSG_PROVIDE_PATH = "Provide a path."
+MSG_SAVED = "Saved."
+MSG_SAVE_FAILED = "Save failed."
+MSG_PROMPT_READY = "Prompt ready."
+MSG_VOICECHAT = "Voice chat. Say your line after the chime. Say slash done to finish."
+MSG_NO_SPEECH = "No speech detected."
+
+PHRASES = (
+    MSG_INTERACTIVE,
+    MSG_EYESFREE_HINT,
+    MSG_UNDONE,
+    MSG_NOTHING_TO_UNDO,
+    MSG_EMPTY,
+    MSG_HELP,
+    MSG_NO_PATH,
+    MSG_PROVIDE_PATH,
+    MSG_SAVED,
+    MSG_SAVE_FAILED,
+    MSG_PROMPT_READY,
+    MSG_VOICECHAT,
+    MSG_NO_SPEECH,
+)
+
+
+# How long a voicechat turn waits for speech before saying so
+VOICECHAT_TURN_SEC = 8.0
+
+
+def _start_prewarm(voice: str | None, rate: int | None) -> None:
+    """Render the fixed phrases into the TTS cache without delaying startup."""
+    from src.lib import session
+    from src.lib.speech import prewarm
+
+    threading.Thread(
+        target=prewarm,
+        args=(PHRASES + session.PHRASES, voice, rate),
+        name="tts-prewarm",
+        daemon=True,
+    ).start()
+
+
+def _open_journal(path: str | None, mode: str, fsync_interval: float = 1.0) -> Tuple[Optional["Journal"], List[str]]:
+    """Journal for a loop plus the lines recovered from an unfinished run in it."""
+    if not path:
+        return None, []
+    from src.lib.journal import Journal, recover
+
+    state = recover(path)
+    journal = Journal(path, fsync_interval)
+    if state is not None and state.config.get("mode") == mode:
+        print(f"Recovered {len(state.lines)} lines from {path}")
+        journal.resume()
+        return journal, list(state.lines)
+    journal.start(mode=mode)
+    return journal, []
+
+
+def _close_journal(journal: Optional["Journal"]) -> None:
+    """End the journal and compact it into the transcript next to it."""
+    if journal is not None:
+        from src.lib.journal import finish_journal
+
+        finish_journal(journal)
+
+
+def runInteractive(say: bool = False, voice: str | None = None, rate: int | None = None, do_chime: bool = True, guide: bool = False, eyesfree: bool = False, save_path: str | None = None, journal_path: str | None = None, fsync_interval: float = 1.0) -> None:
+    from src.lib import tracing
+    from src.lib.eyesfree import parse_command
+    from src.lib.journal import write_atomic
+    from src.lib.prompt_builder import build_prompt
+    from src.lib.readback import read_back
+    from src.lib.speech import barge_in, chime, speak, speak_async
 
-def runInteractive(say: bool = False, voice: str | None = None, rate: int | None = None, do_chime: bool = True, guide: bool = False, eyesfree: bool = False, save_path: str | None = None) -> None:
     print("xxx CLI — simple prompt builder")
     print("Type lines; blank line to finish.\n")
     if guide or eyesfree:
-        speak("Interactive mode. Type your text. Press return on an empty line to finish.", voice=voice, rate=rate, enabled=say)
+        speak(MSG_INTERACTIVE, voice=voice, rate=rate, enabled=say)
         chime(enabled=do_chime)
-    lines: List[str] = []
+    journal, lines = _open_journal(journal_path, "interactive", fsync_interval)
     while True:
         try:
             line = input("> ")
@@ -25,70 +108,286 @@ def runInteractive(say: bool = False, voice: str | None = None, rate: int | None
             break
         if not line.strip():
             if eyesfree:
-                speak("Use slash commands. Say slash done to finish.", voice=voice, rate=rate, enabled=say)
+                speak_async(MSG_EYESFREE_HINT, voice=voice, rate=rate, enabled=say)
                 continue
             break
 
-        is_cmd, cmd = parse_command(line)
-        if is_cmd and cmd:
-            if cmd.name == "undo":
-                if lines:
-                    lines.pop()
-                    speak("Undone.", voice=voice, rate=rate, enabled=say)
-                else:
-                    speak("Nothing to undo.", voice=voice, rate=rate, enabled=say)
-                if do_chime:
-                    chime(sound="Pop")
-                continue
-            if cmd.name == "read":
-                text = "\n".join(lines)
-                speak(text or "Nothing yet.", voice=voice, rate=rate, enabled=say)
-                if do_chime:
-                    chime()
-                continue
-            if cmd.name == "done":
-                break
-            if cmd.name == "help":
-                help_text = "Commands: /undo, /read, /done, /save <path>."
-                print(help_text)
-                speak(help_text, voice=voice, rate=rate, enabled=say)
-                continue
-            if cmd.name == "save":
-                path = cmd.arg
-                if not path:
-                    speak("Please provide a path.", voice=voice, rate=rate, enabled=say)
-                else:
-                    try:
-                        with open(path, "w", encoding="utf-8") as f:
-                            f.write("\n".join(lines))
-                        speak("Saved.", voice=voice, rate=rate, enabled=say)
-                    except Exception:
-                        speak("Save failed.", voice=voice, rate=rate, enabled=say)
-                if do_chime:
-                    chime(sound="Submarine")
-                continue
+        with tracing.span("interactive.turn"):
+            barge_in()
+            is_cmd, cmd = parse_command(line)
+            if is_cmd and cmd:
+                if journal is not None:
+                    journal.command(cmd.name, cmd.arg)
+                if cmd.name == "undo":
+                    if lines:
+                        lines.pop()
+                        if journal is not None:
+                            journal.undo()
+                        speak_async(MSG_UNDONE, voice=voice, rate=rate, enabled=say)
+                    else:
+                        speak_async(MSG_NOTHING_TO_UNDO, voice=voice, rate=rate, enabled=say)
+                    if do_chime:
+                        chime(sound="Pop")
+                    continue
+                if cmd.name == "read":
+                    text = "\n".join(lines)
+                    read_back(text or MSG_EMPTY, voice=voice, rate=rate, enabled=say)
+                    if do_chime:
+                        chime()
+                    continue
+                if cmd.name == "stop":
+                    continue  # barge_in() above stopped the readback
+                if cmd.name == "done":
+                    break
+                if cmd.name == "help":
+                    print(MSG_HELP)
+                    speak_async(MSG_HELP, voice=voice, rate=rate, enabled=say)
+                    continue
+                if cmd.name == "save":
+                    path = cmd.arg
+                    if not path:
+                        speak_async(MSG_NO_PATH, voice=voice, rate=rate, enabled=say)
+                    else:
+                        try:
+                            write_atomic(path, "\n".join(lines))
+                            speak_async(MSG_SAVED, voice=voice, rate=rate, enabled=say)
+                        except Exception:
+                            speak_async(MSG_SAVE_FAILED, voice=voice, rate=rate, enabled=say)
+                    if do_chime:
+                        chime(sound="Submarine")
+                    continue
 
-        lines.append(line)
-        if do_chime:
-            chime()
+            lines.append(line)
+            if journal is not None:
+                journal.line(line)
+            if do_chime:
+                chime()
 
     prompt = build_prompt("chat", {"lines": lines})
     print("\n--- Prompt ---")
     print(prompt)
-    speak("Prompt ready.", voice=voice, rate=rate, enabled=say)
+    speak(MSG_PROMPT_READY, voice=voice, rate=rate, enabled=say)
     if say:
         speak(prompt, voice=voice, rate=rate, enabled=True)
     if save_path:
         try:
-            with open(save_path, "w", encoding="utf-8") as f:
-                f.write(prompt)
-            speak("Saved.", voice=voice, rate=rate, enabled=say)
+            write_atomic(save_path, prompt)
+            speak(MSG_SAVED, voice=voice, rate=rate, enabled=say)
         except Exception:
-            speak("Save failed.", voice=voice, rate=rate, enabled=say)
+            speak(MSG_SAVE_FAILED, voice=voice, rate=rate, enabled=say)
+    _close_journal(journal)
+
+
+def transcribe_main(argv: List[str]) -> int:
+    """`transcribe <dir-or-glob>...`: batch STT of recorded WAV files to JSONL."""
+    from src.lib.batch_stt import completed_files, expand_inputs, open_output, run_batch
+    from src.lib.stt import backend_names, get_backend
+
+    parser = argparse.ArgumentParser(prog="xxx transcribe", description="Transcribe recorded WAV files")
+    parser.add_argument("inputs", nargs="+", help="Directories, globs or .wav files")
+    parser.add_argument("-o", "--output", help="JSONL file to append to (default: stdout)")
+    parser.add_argument("--stt-backend", choices=backend_names(), help="Speech recognizer")
+    parser.add_argument("--lang", default="ja-JP", help="STT language (e.g., ja-JP, en-US)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--no-resume", dest="resume", action="store_false", help="Redo files already in the output")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("No WAV files found.", file=sys.stderr)
+        return 1
+    try:
+        get_backend(args.stt_backend)
+    except KeyError as e:
+        # Only an unknown $STT_BACKEND gets here; --stt-backend is checked by argparse
+        print(f"Unknown STT backend {e.args[0]!r} (known: {', '.join(backend_names())})", file=sys.stderr)
+        return 1
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    skip = completed_files(args.output) if args.output and args.resume else set()
+    out = open_output(args.output, args.resume)
+    try:
+        summary = run_batch(
+            paths,
+            out,
+            backend=args.stt_backend,
+            lang=args.lang,
+            workers=args.workers,
+            skip=skip,
+            progress=sys.stderr,
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(
+        f"{summary.files} files ({summary.segments} segments, {summary.failed} failed, "
+        f"{summary.skipped} already done) in {summary.elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if summary.failed else 0
+
+
+def build_main(argv: List[str]) -> int:
+    """`build [input.jsonl]`: stream `{mode, ...data}` records through build_prompt."""
+    from src.lib.bulk import run_build
+
+    parser = argparse.ArgumentParser(prog="xxx build", description="Build prompts in bulk from JSONL")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL of {mode, ...data} records (default: stdin)")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default: stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Records per worker batch")
+    args = parser.parse_args(argv)
+
+    inp = out = None
+    try:
+        inp = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        out = sys.stdout if not args.output else open(args.output, "w", encoding="utf-8")
+        summary = run_build(
+            inp,
+            out,
+            workers=args.workers or os.cpu_count() or 1,
+            chunk_size=max(1, args.chunk_size),
+            progress=sys.stderr,
+        )
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if inp is not None and inp is not sys.stdin:
+            inp.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    print(
+        f"{summary.records} records ({summary.errors} errors) in {summary.elapsed:.2f}s "
+        f"({summary.rate:.0f} records/s)",
+        file=sys.stderr,
+    )
+    return 1 if summary.errors else 0
+
+
+def index_main(argv: List[str]) -> int:
+    """`index <dir-or-glob>...`: add saved transcripts and diaries to the search index."""
+    from src.lib.transcript_index import TranscriptIndex, default_index_dir, expand_inputs
+
+    parser = argparse.ArgumentParser(prog="xxx index", description="Index saved transcripts for `search`")
+    parser.add_argument("inputs", nargs="+", help="Directories (.txt/.md, recursive), globs or files")
+    parser.add_argument("--index", default=default_index_dir(), help="Index directory")
+    parser.add_argument("--rebuild", action="store_true", help="Reindex every file from scratch")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.inputs, skip_dir=args.index)
+    if not paths:
+        print("No .txt/.md files found.", file=sys.stderr)
+        return 1
+    with TranscriptIndex(args.index) as index:
+        summary = index.update(paths, rebuild=args.rebuild)
+    print(
+        f"{summary.added} added, {summary.changed} changed, {summary.removed} removed, "
+        f"{summary.unchanged} unchanged ({summary.lines} lines indexed, {summary.segments} segment(s)"
+        f"{', merged' if summary.merged else ''}) in {summary.elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def search_main(argv: List[str]) -> int:
+    """`search <query>...`: ranked lines from indexed transcripts, with their timestamps."""
+    import json
+    import time
+
+    from src.lib.transcript_index import TranscriptIndex, default_index_dir
+
+    parser = argparse.ArgumentParser(prog="xxx search", description="Search indexed transcripts")
+    parser.add_argument("query", nargs="+", help="Terms every matching line contains (Japanese needs no spaces)")
+    parser.add_argument("-n", "--limit", type=int, default=10, help="Number of results")
+    parser.add_argument("--index", default=default_index_dir(), help="Index directory")
+    parser.add_argument("--json", action="store_true", help="One JSON object per result")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    with TranscriptIndex(args.index) as index:
+        hits = index.search(" ".join(args.query), limit=max(1, args.limit))
+    elapsed = time.perf_counter() - t0
+    for hit in hits:
+        print(json.dumps(vars(hit), ensure_ascii=False) if args.json else hit.format())
+    print(f"{len(hits)} result(s) in {elapsed * 1e3:.1f} ms", file=sys.stderr)
+    return 0 if hits else 1
+
+
+def export_audio_main(argv: List[str]) -> int:
+    """`export-audio [input]`: render a transcript or built prompts to one WAV with a chapter index."""
+    from src.lib.audio_export import RENDERERS, export_audio, get_renderer, read_chapters, write_index
+    from src.lib.tts_cache import AudioCache, default_cache_dir
+
+    parser = argparse.ArgumentParser(prog="xxx export-audio", description="Render text to a WAV file offline")
+    parser.add_argument("input", nargs="?", default="-", help="Transcript, or `build` JSONL (default: stdin)")
+    parser.add_argument("-o", "--output", required=True, help="WAV file to write")
+    parser.add_argument("--index", help="Chapter index JSON (default: next to the WAV)")
+    parser.add_argument("--renderer", choices=list(RENDERERS), help="Speech renderer (default: say, then espeak)")
+    parser.add_argument("--voice", help="Voice name for the renderer")
+    parser.add_argument("--rate", type=int, help="Speech rate (words per minute)")
+    parser.add_argument("--workers", type=int, help="Parallel renders (default: all cores)")
+    parser.add_argument("--cache-dir", default=default_cache_dir(), help="Rendered chunks, reused on re-export")
+    parser.add_argument("--cache-mb", type=int, default=1024, help="Chunk cache size limit")
+    args = parser.parse_args(argv)
+
+    try:
+        renderer = get_renderer(args.renderer)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.input == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            text = f.read()
+    chapters = read_chapters(text)
+    if not chapters:
+        print("Nothing to export.", file=sys.stderr)
+        return 1
+    cache = AudioCache(args.cache_dir, renderer, max(1, args.cache_mb) * 1024 * 1024)
+    try:
+        summary = export_audio(
+            chapters,
+            args.output,
+            cache,
+            voice=args.voice,
+            rate=args.rate,
+            workers=args.workers or os.cpu_count() or 1,
+        )
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    index_path = args.index or os.path.splitext(args.output)[0] + ".json"
+    write_index(index_path, args.output, chapters, summary.duration)
+    print(
+        f"{summary.chapters} lines, {summary.chunks} chunks ({summary.rendered} rendered, {summary.reused} reused, "
+        f"{summary.failed} failed): {summary.duration:.1f}s of audio in {summary.elapsed:.1f}s "
+        f"-> {args.output}, {index_path}",
+        file=sys.stderr,
+    )
+    return 1 if summary.failed else 0
+
+
+SUBCOMMANDS = {
+    "transcribe": transcribe_main,
+    "build": build_main,
+    "index": index_main,
+    "search": search_main,
+    "export-audio": export_audio_main,
+}
+
 
+def main(argv: Optional[List[str]] = None) -> Optional[int]:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="xxx CLI entry point")
+    parser = argparse.ArgumentParser(
+        description="xxx CLI entry point",
+        epilog="Subcommands: " + ", ".join(SUBCOMMANDS) + " (run `<subcommand> --help`)",
+    )
     parser.add_argument(
         "mode",
         choices=["chat", "diary", "music", "image"],
@@ -104,15 +403,144 @@ def main() -> None:
     parser.add_argument("--guide", action="store_true", help="Voice guidance in interactive mode")
     parser.add_argument("--eyesfree", action="store_true", help="Eyes-free mode: use /done to finish and voice cues")
     parser.add_argument("--save", help="Save the generated prompt to a file")
+    parser.add_argument(
+        "--lines",
+        metavar="FILE",
+        help="Build the chat prompt from a transcript file ('-': stdin), streamed without loading it whole",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Append every line/undo/command to this file as it happens; an unfinished run in it is recovered",
+    )
+    parser.add_argument(
+        "--fsync-interval",
+        type=float,
+        default=1.0,
+        metavar="SEC",
+        help="Sync the journal to disk at most once per SEC seconds (0: after every record)",
+    )
     parser.add_argument("--voicechat", action="store_true", help="Voice input per turn (mic → STT)")
     parser.add_argument("--lang", default="ja-JP", help="STT language (e.g., ja-JP, en-US)")
+    parser.add_argument(
+        "--stt-backend",
+        metavar="NAME",
+        help="Speech recognizer: google, vosk, whisper (default: $STT_BACKEND or google; vosk/whisper run offline)",
+    )
     parser.add_argument("--session-mins", type=int, help="Run a timed session for N minutes (e.g., 15)")
     parser.add_argument("--interval-sec", type=int, default=60, help="Prompt interval seconds during session")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage latency percentiles at the end")
+    parser.add_argument("--trace", metavar="FILE", help="Also write a Chrome trace (chrome://tracing) to FILE")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay resident with everything warm; `python -m src.app.client ...` forwards to it",
+    )
+    parser.add_argument("--socket", help="Daemon socket (default: $XXX_SOCKET or a per-user runtime path)")
     parser.set_defaults(chime=True)
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.daemon:
+        from src.lib.daemon import default_socket_path, serve
+
+        return serve(args.socket or default_socket_path(), main, warm=lambda: _warm(args))
+    if args.stt_backend:
+        from src.lib.stt import backend_names
+
+        if args.stt_backend not in backend_names():
+            parser.error(f"--stt-backend: choose from {', '.join(backend_names())}")
+    if args.lines and args.mode != "chat":
+        parser.error("--lines builds the chat prompt")
+
+    if args.profile or args.trace:
+        from src.lib import tracing
+        from src.lib.speech import cache_stats
+
+        tracing.enable(events=bool(args.trace))
+        try:
+            return _run(args)
+        finally:
+            stats = cache_stats()
+            tracing.report(sys.stderr, args.trace, {"tts cache": stats} if stats else None)
+            tracing.disable()
+    return _run(args)
+
+
+def _warm(args: argparse.Namespace) -> None:
+    """Load what requests will need before the daemon starts serving.
+
+    - Every module and template, with one render per mode.
+    - The speech engine and its phrase cache.
+    - The STT backend (models stay resident); a missing engine is skipped.
+    """
+    from src.lib import capabilities, eyesfree, journal, session, tracing  # noqa: F401
+    from src.lib.prompt_builder import build_prompt
+    from src.lib.speech import get_engine
+    from src.lib.stt import get_backend
+    from src.lib.templates import REGISTRY
+
+    for mode in REGISTRY.modes():
+        build_prompt(mode, {"seed": "warm"})
+    capabilities.get().as_dict()
+    get_engine()
+    _start_prewarm(args.voice, args.rate)
+    try:
+        get_backend(args.stt_backend)
+    except Exception as e:
+        print(f"STT not warmed: {e}", file=sys.stderr)
+
+
+def _emit_prompt(mode: str, data: Dict, save_path: Optional[str]) -> Optional[bool]:
+    """Print the prompt and write it to `save_path`, chunk by chunk.
+
+    Each chunk goes to stdout and the save file as it is rendered, so a
+    long transcript's prompt is never held whole. stdout always gets the
+    full prompt; returns whether saving worked (None without a path).
+    """
+    from src.lib.prompt_builder import iter_prompt
+
+    chunks = iter_prompt(mode, data)
+    saved = None
+    if save_path:
+        from src.lib.journal import write_atomic
+
+        def printed():
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+                yield chunk
+
+        try:
+            write_atomic(save_path, printed())
+            saved = True
+        except Exception:
+            saved = False
+    # Whatever saving didn't get to (all of it without a path)
+    for chunk in chunks:
+        sys.stdout.write(chunk)
+    sys.stdout.write("\n")
+    return saved
+
+
+def _run(args: argparse.Namespace) -> Optional[int]:
+    if args.lines:
+        inp = sys.stdin if args.lines == "-" else open(args.lines, encoding="utf-8")
+        try:
+            saved = _emit_prompt("chat", {"lines": inp}, args.save)
+        finally:
+            if inp is not sys.stdin:
+                inp.close()
+        if saved is not None:
+            _speak(MSG_SAVED if saved else MSG_SAVE_FAILED, args.voice, args.rate, args.speak or args.eyesfree)
+        return 1 if saved is False else None
+
+    if args.speak or args.eyesfree or args.voicechat or args.session_mins:
+        _start_prewarm(args.voice, args.rate)
 
     # Timed session mode takes precedence for chat
     if args.session_mins and args.mode == "chat":
+        from src.lib import session
+        from src.lib.journal import recover
+        from src.lib.session import config_from_journal, run_session, SessionConfig
+        from src.lib.speech import speak
+
         cfg = SessionConfig(
             minutes=args.session_mins,
             interval_sec=args.interval_sec,
@@ -122,17 +550,22 @@ def main() -> None:
             rate=args.rate,
             use_voice_input=args.voicechat,
             save_path=args.save,
+            stt_backend=args.stt_backend,
+            journal_path=args.journal,
+            fsync_interval=args.fsync_interval,
         )
-        lines = run_session(cfg)
-        prompt = build_prompt("chat", {"lines": lines})
-        print(prompt)
-        if args.save:
-            try:
-                with open(args.save, "w", encoding="utf-8") as f:
-                    f.write(prompt)
-                speak("保存しました。", voice=args.voice, rate=args.rate, enabled=True)
-            except Exception:
-                speak("保存に失敗しました。", voice=args.voice, rate=args.rate, enabled=True)
+        recovered = recover(args.journal)
+        if recovered is not None and "minutes" in recovered.config:
+            # Continue the crashed session with its own settings and remaining time
+            cfg = config_from_journal(recovered, args.journal)
+            cfg.fsync_interval = args.fsync_interval
+            print(f"Recovered {len(recovered.lines)} lines from {args.journal}")
+        else:
+            recovered = None
+        lines = run_session(cfg, recovered)
+        saved = _emit_prompt("chat", {"lines": lines}, args.save)
+        if saved is not None:
+            speak(session.MSG_SAVED if saved else session.MSG_SAVE_FAILED, voice=args.voice, rate=args.rate, enabled=True)
         return
 
     if not args.text and args.mode == "chat" and not args.voicechat:
@@ -144,80 +577,124 @@ def main() -> None:
             guide=args.guide or args.eyesfree,
             eyesfree=args.eyesfree,
             save_path=args.save,
+            journal_path=args.journal,
+            fsync_interval=args.fsync_interval,
         )
         return
 
     if args.voicechat and args.mode == "chat":
-        if not has_speech_recognition():
+        from src.lib import tracing
+        from src.lib.eyesfree import parse_command
+        from src.lib.journal import write_atomic
+        from src.lib.prompt_builder import build_prompt
+        from src.lib.readback import read_back
+        from src.lib.speech import barge_in, chime, speak, speak_async, wait_speech
+        from src.lib.stt import open_listener
+
+        # Speech detected while we talk interrupts us (barge-in) instead of being dropped
+        listener = open_listener(args.lang, backend=args.stt_backend, on_phrase=barge_in)
+        if listener is None:
             print("SpeechRecognition not installed. Install with: pip install SpeechRecognition pyaudio (or sounddevice)")
+            print("Offline backends also need their engine: vosk (+ VOSK_MODEL) or faster-whisper.")
             return
         speak(
-            "Voice chat. Say your line after the chime. Say slash done to finish.",
+            MSG_VOICECHAT,
             voice=args.voice,
             rate=args.rate,
             enabled=args.speak or True,
         )
-        lines: List[str] = []
-        while True:
-            chime()
-            text = transcribe_once(lang=args.lang)
-            if not text:
-                speak("No speech detected.", voice=args.voice, rate=args.rate, enabled=args.speak or True)
-                continue
-            is_cmd, cmd = parse_command(text)
-            if is_cmd and cmd:
-                if cmd.name == "undo":
-                    if lines:
-                        lines.pop()
-                        speak("Undone.", voice=args.voice, rate=args.rate, enabled=True)
-                    else:
-                        speak("Nothing to undo.", voice=args.voice, rate=args.rate, enabled=True)
-                    continue
-                if cmd.name == "read":
-                    speak("\n".join(lines) or "Nothing yet.", voice=args.voice, rate=args.rate, enabled=True)
-                    continue
-                if cmd.name == "done":
-                    break
-                if cmd.name == "save":
-                    path = (cmd.arg or args.save)
-                    if path:
-                        try:
-                            with open(path, "w", encoding="utf-8") as f:
-                                f.write("\n".join(lines))
-                            speak("Saved.", voice=args.voice, rate=args.rate, enabled=True)
-                        except Exception:
-                            speak("Save failed.", voice=args.voice, rate=args.rate, enabled=True)
-                    else:
-                        speak("Provide a path.", voice=args.voice, rate=args.rate, enabled=True)
+        journal, lines = _open_journal(args.journal, "voicechat", args.fsync_interval)
+        try:
+            while True:
+                wait_speech()
+                chime()
+                with tracing.span("voicechat.listen"):
+                    text = listener.get(timeout=VOICECHAT_TURN_SEC)
+                if not text:
+                    if listener.exhausted:
+                        break
+                    speak_async(MSG_NO_SPEECH, voice=args.voice, rate=args.rate, enabled=args.speak or True)
                     continue
-            lines.append(text)
-            speak(text, voice=args.voice, rate=args.rate, enabled=args.speak or True)
+                with tracing.span("voicechat.turn"):
+                    barge_in()
+                    is_cmd, cmd = parse_command(text)
+                    if is_cmd and cmd:
+                        if journal is not None:
+                            journal.command(cmd.name, cmd.arg)
+                        if cmd.name == "undo":
+                            if lines:
+                                lines.pop()
+                                if journal is not None:
+                                    journal.undo()
+                                speak_async(MSG_UNDONE, voice=args.voice, rate=args.rate, enabled=True)
+                            else:
+                                speak_async(MSG_NOTHING_TO_UNDO, voice=args.voice, rate=args.rate, enabled=True)
+                            continue
+                        if cmd.name == "read":
+                            read_back("\n".join(lines) or MSG_EMPTY, voice=args.voice, rate=args.rate)
+                            continue
+                        if cmd.name == "stop":
+                            continue
+                        if cmd.name == "done":
+                            break
+                        if cmd.name == "save":
+                            path = (cmd.arg or args.save)
+                            if path:
+                                try:
+                                    write_atomic(path, "\n".join(lines))
+                                    speak_async(MSG_SAVED, voice=args.voice, rate=args.rate, enabled=True)
+                                except Exception:
+                                    speak_async(MSG_SAVE_FAILED, voice=args.voice, rate=args.rate, enabled=True)
+                            else:
+                                speak_async(MSG_PROVIDE_PATH, voice=args.voice, rate=args.rate, enabled=True)
+                            continue
+                        speak_async(MSG_HELP, voice=args.voice, rate=args.rate, enabled=True)
+                        continue
+                    lines.append(text)
+                    if journal is not None:
+                        journal.line(text)
+                    speak_async(text, voice=args.voice, rate=args.rate, enabled=args.speak or True)
+        finally:
+            listener.stop()
 
         prompt = build_prompt("chat", {"lines": lines})
         print(prompt)
         if args.save:
             try:
-                with open(args.save, "w", encoding="utf-8") as f:
-                    f.write(prompt)
-                speak("Saved.", voice=args.voice, rate=args.rate, enabled=True)
+                write_atomic(args.save, prompt)
+                speak(MSG_SAVED, voice=args.voice, rate=args.rate, enabled=True)
             except Exception:
-                speak("Save failed.", voice=args.voice, rate=args.rate, enabled=True)
+                speak(MSG_SAVE_FAILED, voice=args.voice, rate=args.rate, enabled=True)
+        _close_journal(journal)
         speak(prompt, voice=args.voice, rate=args.rate, enabled=args.speak or True)
         return
 
+    from src.lib.prompt_builder import build_prompt
+
     seed = " ".join(args.text).strip()
     payload = {"seed": seed} if seed else {}
     prompt = build_prompt(args.mode, payload)
     print(prompt)
+    say = args.speak or args.eyesfree
     if args.save:
+        from src.lib.journal import write_atomic
+
         try:
-            with open(args.save, "w", encoding="utf-8") as f:
-                f.write(prompt)
-            speak("Saved.", voice=args.voice, rate=args.rate, enabled=args.speak or args.eyesfree)
+            write_atomic(args.save, prompt)
+            _speak(MSG_SAVED, args.voice, args.rate, say)
         except Exception:
-            speak("Save failed.", voice=args.voice, rate=args.rate, enabled=args.speak or args.eyesfree)
-    speak(prompt, voice=args.voice, rate=args.rate, enabled=args.speak or args.eyesfree)
+            _speak(MSG_SAVE_FAILED, args.voice, args.rate, say)
+    _speak(prompt, args.voice, args.rate, say)
+
+
+def _speak(text: str, voice: str | None, rate: int | None, enabled: bool) -> bool:
+    """`speak` that leaves the speech stack unloaded when speech is off."""
+    if not enabled or not text:
+        return False
+    from src.lib.speech import speak
+
+    return speak(text, voice=voice, rate=rate, enabled=True)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
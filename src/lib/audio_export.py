@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import wave
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.lib.bulk import build_record
+from src.lib.journal import write_atomic
+from src.lib.readback import MAX_CHUNK_CHARS, chunk_text
+from src.lib.transcript_index import parse_lines
+from src.lib.tts_cache import AudioCache, EspeakRenderer, Renderer, SayWavRenderer, SineRenderer
+
+# Silence between a line's chunks, and between lines
+CHUNK_GAP_SEC = 0.15
+LINE_GAP_SEC = 0.5
+
+# Tried in order when no renderer is named; "sine" only on request, since
+# it produces tones rather than speech
+RENDERERS = {"say": SayWavRenderer, "espeak": EspeakRenderer, "sine": SineRenderer}
+AUTO_RENDERERS = ("say", "espeak")
+
+# (channels, sample width, frame rate)
+WavParams = Tuple[int, int, int]
+
+
+def get_renderer(name: Optional[str] = None) -> Renderer:
+    """The named WAV renderer, or the first one available here."""
+    if name:
+        renderer = RENDERERS[name]()
+        if not renderer.available():
+            raise RuntimeError(f"Renderer {name!r} is not available on this machine.")
+        return renderer
+    for auto in AUTO_RENDERERS:
+        renderer = RENDERERS[auto]()
+        if renderer.available():
+            return renderer
+    raise RuntimeError("No speech renderer found (macOS `say` or espeak-ng); use --renderer sine for placeholder tones.")
+
+
+@dataclass
+class Chapter:
+    """One input line (or prompt) and where it sits in the exported audio."""
+
+    line: int
+    text: str
+    title: Optional[str] = None
+    start: float = 0.0
+    duration: float = 0.0
+
+
+def read_chapters(text: str) -> List[Chapter]:
+    """Chapters from a transcript, or from `build` output or input JSONL.
+
+    - Plain lines become one chapter each, without their `[date time]` stamp.
+    - `{"prompt": ...}` records (what `build` writes) are read as their
+      prompt; `{"mode": ...}` records (what `build` reads) are built first.
+    """
+    chapters: List[Chapter] = []
+    for lineno, _, line in parse_lines(text):
+        record = _record(line)
+        if record is None:
+            chapters.append(Chapter(lineno, line))
+            continue
+        if "prompt" not in record and "mode" in record:
+            record = build_record(line, lineno) or {}
+        prompt = record.get("prompt")
+        if isinstance(prompt, str) and prompt.strip():
+            title = record.get("id", record.get("mode"))
+            chapters.append(Chapter(lineno, prompt.strip(), None if title is None else str(title)))
+    return chapters
+
+
+def _record(line: str) -> Optional[Dict]:
+    if not line.startswith("{"):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+@dataclass
+class ExportSummary:
+    chapters: int = 0
+    chunks: int = 0
+    rendered: int = 0
+    reused: int = 0
+    failed: int = 0
+    duration: float = 0.0
+    elapsed: float = 0.0
+
+
+def _load_chunk(cache: AudioCache, text: str, voice: Optional[str], rate: Optional[int]) -> Optional[Tuple[WavParams, bytes]]:
+    path = cache.fetch(text, voice, rate)
+    if path is None:
+        return None
+    try:
+        with wave.open(path, "rb") as w:
+            return (w.getnchannels(), w.getsampwidth(), w.getframerate()), w.readframes(w.getnframes())
+    except (OSError, EOFError, wave.Error):
+        return None
+
+
+class _WavWriter:
+    """Appends chunks and silence to one WAV; the format is the first chunk's."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.params: Optional[WavParams] = None
+        self.frames = 0
+        self._wav: Optional[wave.Wave_write] = None
+
+    @property
+    def seconds(self) -> float:
+        return self.frames / self.params[2] if self.params else 0.0
+
+    def accepts(self, params: WavParams) -> bool:
+        return self.params is None or params == self.params
+
+    def append(self, params: WavParams, pcm: bytes) -> bool:
+        if self._wav is None:
+            self._wav = wave.open(self.path, "wb")
+            self._wav.setnchannels(params[0])
+            self._wav.setsampwidth(params[1])
+            self._wav.setframerate(params[2])
+            self.params = params
+        elif params != self.params:
+            return False
+        self._wav.writeframes(pcm)
+        self.frames += len(pcm) // (params[0] * params[1])
+        return True
+
+    def silence(self, seconds: float) -> None:
+        if self._wav is None or self.params is None or seconds <= 0:
+            return
+        channels, width, rate = self.params
+        n = int(seconds * rate)
+        self._wav.writeframes(bytes(n * channels * width))
+        self.frames += n
+
+    def close(self) -> None:
+        if self._wav is not None:
+            self._wav.close()
+
+
+def export_audio(
+    chapters: List[Chapter],
+    out_path: str,
+    cache: AudioCache,
+    *,
+    voice: Optional[str] = None,
+    rate: Optional[int] = None,
+    workers: int = 4,
+    max_chars: int = MAX_CHUNK_CHARS,
+) -> ExportSummary:
+    """Render chapters chunk by chunk in a thread pool and join them into one WAV.
+
+    - Chunks are sentence-sized (`chunk_text`) and go through `cache`, so
+      a re-export only renders lines whose text, voice or rate changed.
+    - At most two chunks per worker are in flight; finished chunks are
+      appended in order, so memory stays bounded for any input length.
+    - Each chapter's `start` and `duration` (seconds) are filled in; the
+      WAV replaces `out_path` only once it is complete.
+    """
+    summary = ExportSummary(chapters=len(chapters))
+    t0 = time.perf_counter()
+    renders_before = cache.snapshot()["renders"]
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    out = _WavWriter(tmp)
+    # Chapter index for each chunk, in order
+    owners: Deque[int] = deque()
+    pending: Deque[Future] = deque()
+    last = -1
+
+    def emit(result: Optional[Tuple[WavParams, bytes]]) -> None:
+        nonlocal last
+        index = owners.popleft()
+        # A chunk in another format can't be joined; it must leave no gap behind
+        if result is None or not out.accepts(result[0]):
+            summary.failed += 1
+            return
+        chapter = chapters[index]
+        if out.frames:
+            out.silence(CHUNK_GAP_SEC if index == last else LINE_GAP_SEC)
+        if index != last:
+            chapter.start = out.seconds
+            last = index
+        out.append(*result)
+        chapter.duration = out.seconds - chapter.start
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="audio-export") as pool:
+            for index, chapter in enumerate(chapters):
+                for chunk in chunk_text(chapter.text, max_chars, max_chars):
+                    summary.chunks += 1
+                    owners.append(index)
+                    pending.append(pool.submit(_load_chunk, cache, chunk, voice, rate))
+                    if len(pending) >= 2 * max(1, workers):
+                        emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
+    finally:
+        out.close()
+    if out.params is None:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise RuntimeError("Nothing could be rendered.")
+    os.replace(tmp, out_path)
+    summary.rendered = cache.snapshot()["renders"] - renders_before
+    summary.reused = summary.chunks - summary.rendered - summary.failed
+    summary.duration = out.seconds
+    summary.elapsed = time.perf_counter() - t0
+    return summary
+
+
+def write_index(path: str, audio_path: str, chapters: List[Chapter], duration: float) -> None:
+    """The chapter/offset index: one entry per line with its start and length in seconds."""
+    entries = []
+    for chapter in chapters:
+        entry = {"line": chapter.line, "start": round(chapter.start, 3), "duration": round(chapter.duration, 3)}
+        if chapter.title is not None:
+            entry["title"] = chapter.title
+        entry["text"] = chapter.text
+        entries.append(entry)
+    index = {"audio": os.path.basename(audio_path), "duration": round(duration, 3), "chapters": entries}
+    write_atomic(path, json.dumps(index, ensure_ascii=False, indent=1) + "\n")
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, IO, Iterable, List, Optional, Set
+
+from src.lib.stt import STTBackend, WavFileSource, get_backend, register_backend, resolve_backend
+
+
+def expand_inputs(patterns: Iterable[str]) -> List[str]:
+    """Directories (searched recursively for .wav), globs and plain files, deduplicated."""
+    found: Dict[str, None] = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "**", "*.wav"), recursive=True)
+        elif glob.has_magic(pattern):
+            matches = glob.glob(pattern, recursive=True)
+        else:
+            matches = [pattern] if os.path.isfile(pattern) else []
+        for path in sorted(matches):
+            found[os.path.abspath(path)] = None
+    return list(found)
+
+
+def completed_files(out_path: str) -> Set[str]:
+    """Files whose every segment record is already in `out_path`.
+
+    Torn or half-written records from an interrupted run are ignored, so
+    those files get transcribed again.
+    """
+    seen: Dict[str, Set[int]] = {}
+    totals: Dict[str, int] = {}
+    if not os.path.exists(out_path):
+        return set()
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(rec, dict) or "error" in rec or "file" not in rec:
+                continue
+            seen.setdefault(rec["file"], set()).add(rec.get("segment", 0))
+            totals[rec["file"]] = rec.get("segments", 1)
+    return {path for path, segs in seen.items() if len(segs) >= totals[path]}
+
+
+_worker_backend: Optional[STTBackend] = None
+
+
+def _init_worker(name: str, factory: Callable[[], STTBackend]) -> None:
+    """Load the recognizer once per worker process.
+
+    The factory comes from the parent: a spawn or forkserver worker starts
+    from fresh imports and wouldn't know backends registered at runtime
+    (so it must be picklable, e.g. a class).
+    """
+    global _worker_backend
+    try:
+        known = resolve_backend(name)[1] is factory
+    except KeyError:
+        known = False
+    if not known:
+        register_backend(name, factory)
+    _worker_backend = get_backend(name)
+
+
+def transcribe_file(path: str, lang: str, backend: Optional[STTBackend] = None) -> List[Dict]:
+    """Segment one WAV file and transcribe each phrase into JSON-ready records."""
+    engine = backend or _worker_backend or get_backend()
+    records: List[Dict] = []
+    # Offsets and durations are the detected speech: a file has no capture delay to cover
+    source = WavFileSource(path, preroll_sec=0.0)
+    try:
+        source.open()
+        source.calibrate()
+        while True:
+            try:
+                segment = source.next_phrase(0)
+            except EOFError:
+                break
+            t0 = time.perf_counter()
+            result = engine.transcribe(segment, lang)  # type: ignore[arg-type]
+            records.append(
+                {
+                    "file": path,
+                    "offset": round(segment.offset, 3),  # type: ignore[union-attr]
+                    "duration": round(segment.duration, 3),  # type: ignore[union-attr]
+                    "text": result.text,
+                    "confidence": result.confidence,
+                    "elapsed": round(time.perf_counter() - t0, 4),
+                }
+            )
+    except Exception as e:
+        return [{"file": path, "error": f"{type(e).__name__}: {e}"}]
+    finally:
+        source.close()
+    if not records:
+        records.append(
+            {"file": path, "offset": 0.0, "duration": 0.0, "text": "", "confidence": None, "elapsed": 0.0}
+        )
+    for i, rec in enumerate(records):
+        rec["segment"] = i
+        rec["segments"] = len(records)
+    return records
+
+
+@dataclass
+class BatchSummary:
+    files: int = 0
+    skipped: int = 0
+    failed: int = 0
+    segments: int = 0
+    elapsed: float = 0.0
+
+
+def run_batch(
+    paths: List[str],
+    out: IO[str],
+    *,
+    backend: Optional[str] = None,
+    lang: str = "ja-JP",
+    workers: Optional[int] = None,
+    skip: Optional[Set[str]] = None,
+    progress: Optional[IO[str]] = None,
+) -> BatchSummary:
+    """Transcribe files across a process pool, writing JSONL as each file finishes.
+
+    Largest files are submitted first so long recordings don't straggle at
+    the end; at most two files per worker are in flight at a time. Raises
+    KeyError for an unknown backend.
+    """
+    name, factory = resolve_backend(backend)
+    summary = BatchSummary()
+    skip = skip or set()
+    todo = [p for p in paths if p not in skip]
+    summary.skipped = len(paths) - len(todo)
+    todo.sort(key=lambda p: os.path.getsize(p), reverse=True)
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(name, factory)) as pool:
+        pending: Set[Future] = set()
+        queue = iter(todo)
+        while True:
+            for path in queue:
+                pending.add(pool.submit(transcribe_file, path, lang))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                records = future.result()
+                out.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+                out.flush()
+                summary.files += 1
+                if "error" in records[0]:
+                    summary.failed += 1
+                else:
+                    summary.segments += len(records)
+                if progress is not None:
+                    rate = summary.files / max(1e-9, time.perf_counter() - t0)
+                    print(
+                        f"[{summary.files}/{len(todo)}] {records[0]['file']} ({rate:.2f} files/s)",
+                        file=progress,
+                        flush=True,
+                    )
+    summary.elapsed = time.perf_counter() - t0
+    return summary
+
+
+def open_output(path: Optional[str], resume: bool) -> IO[str]:
+    """Append to `path` (repairing a torn last line) or write to stdout."""
+    if not path:
+        return sys.stdout
+    torn = False
+    if resume and os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+    f = open(path, "a" if resume else "w", encoding="utf-8")
+    if torn:
+        f.write("\n")
+    return f
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from src.lib.prompt_builder import build_prompt
+
+
+def build_record(line: str, lineno: int = 0) -> Optional[Dict]:
+    """One JSONL record `{"mode": ..., ...data}` to its output record.
+
+    Output is `{"mode", "prompt"}` (plus `id` when the input has one), or
+    `{"line", "error"}` for records that can't be built. Blank lines give None.
+    """
+    if not line.strip():
+        return None
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("record is not an object")
+        mode = record.pop("mode", None)
+        if not isinstance(mode, str) or not mode:
+            raise ValueError("missing mode")
+        out = {"mode": mode, "prompt": build_prompt(mode, record)}
+        if "id" in record:
+            out = {"id": record["id"], **out}
+    except Exception as e:
+        out = {"line": lineno, "error": f"{type(e).__name__}: {e}"}
+    return out
+
+
+def build_chunk(start: int, lines: List[str]) -> Tuple[str, int, int]:
+    """Build a chunk of lines numbered from `start`; returns (output, records, errors).
+
+    The output is one string so a worker hands back a chunk in one message.
+    """
+    parts: List[str] = []
+    errors = 0
+    for i, line in enumerate(lines):
+        record = build_record(line, start + i)
+        if record is None:
+            continue
+        if "error" in record:
+            errors += 1
+        parts.append(json.dumps(record, ensure_ascii=False) + "\n")
+    return "".join(parts), len(parts), errors
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[Tuple[int, List[str]]]:
+    it = iter(lines)
+    start = 1
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+@dataclass
+class BuildSummary:
+    records: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def run_build(
+    lines: Iterable[str],
+    out: IO[str],
+    *,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    progress: Optional[IO[str]] = None,
+    progress_every: float = 2.0,
+) -> BuildSummary:
+    """Stream JSONL records through `build_prompt`, writing results in input order.
+
+    - Input is read a chunk at a time, so memory stays bounded for any
+      file size.
+    - With `workers` > 1, chunks are built in a process pool with at most
+      two chunks per worker in flight, and written back in submission order.
+    """
+    summary = BuildSummary()
+    t0 = time.perf_counter()
+    last_report = t0
+
+    def emit(result: Tuple[str, int, int]) -> None:
+        nonlocal last_report
+        text, records, errors = result
+        out.write(text)
+        summary.records += records
+        summary.errors += errors
+        now = time.perf_counter()
+        if progress is not None and now - last_report >= progress_every:
+            last_report = now
+            print(f"{summary.records} records ({summary.records / (now - t0):.0f}/s)", file=progress, flush=True)
+
+    if workers <= 1:
+        for start, chunk in _chunks(lines, chunk_size):
+            emit(build_chunk(start, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Future] = deque()
+            for start, chunk in _chunks(lines, chunk_size):
+                pending.append(pool.submit(build_chunk, start, chunk))
+                if len(pending) >= 2 * workers:
+                    emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
+    out.flush()
+    summary.elapsed = time.perf_counter() - t0
+    return summary
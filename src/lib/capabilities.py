@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import importlib.util
+import platform
+import shutil
+import threading
+from functools import cached_property
+from typing import Dict, Optional
+
+# Cue players tried in order when no in-process audio module is installed
+AUDIO_PLAYERS = ("afplay", "aplay", "paplay")
+
+
+def _importable(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class Capabilities:
+    """What this machine offers for speech and audio, probed once per process.
+
+    - Each probe runs on first access and is then a plain attribute, so hot
+      paths (`speak` per utterance, a listener per turn) can ask freely.
+    - Only the probes that are used are paid for: asking for `say` doesn't
+      import SpeechRecognition.
+    - `reset()` drops the cached object (tests, or after installing a package).
+    """
+
+    @cached_property
+    def system(self) -> str:
+        return platform.system().lower()
+
+    @property
+    def is_mac(self) -> bool:
+        return self.system == "darwin"
+
+    @cached_property
+    def say(self) -> Optional[str]:
+        """Path to macOS `say`, the TTS binary."""
+        return shutil.which("say") if self.is_mac else None
+
+    @cached_property
+    def afplay(self) -> Optional[str]:
+        """Path to macOS `afplay`, which plays cached TTS audio."""
+        return shutil.which("afplay") if self.is_mac else None
+
+    @cached_property
+    def espeak(self) -> Optional[str]:
+        """Path to `espeak-ng` (or `espeak`), which renders speech to WAV files."""
+        return shutil.which("espeak-ng") or shutil.which("espeak")
+
+    @cached_property
+    def audio_player(self) -> Optional[str]:
+        """First cue player binary on PATH."""
+        for player in AUDIO_PLAYERS:
+            if shutil.which(player):
+                return player
+        return None
+
+    @cached_property
+    def appkit(self) -> bool:
+        """PyObjC's AppKit, for the resident NSSpeechSynthesizer."""
+        if not self.is_mac:
+            return False
+        try:
+            import AppKit  # type: ignore  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+    @cached_property
+    def speech_recognition(self) -> bool:
+        try:
+            import speech_recognition  # type: ignore  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+    @cached_property
+    def microphone(self) -> bool:
+        """A capture module SpeechRecognition can open (checked without importing it)."""
+        return self.speech_recognition and (_importable("pyaudio") or _importable("sounddevice"))
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "system": self.system,
+            "say": self.say,
+            "afplay": self.afplay,
+            "espeak": self.espeak,
+            "audio_player": self.audio_player,
+            "appkit": self.appkit,
+            "speech_recognition": self.speech_recognition,
+            "microphone": self.microphone,
+        }
+
+
+_caps: Optional[Capabilities] = None
+_caps_lock = threading.Lock()
+
+
+def get() -> Capabilities:
+    """The process-wide capabilities object."""
+    global _caps
+    caps = _caps
+    if caps is None:
+        with _caps_lock:
+            if _caps is None:
+                _caps = Capabilities()
+            caps = _caps
+    return caps
+
+
+def reset() -> None:
+    """Forget every probe; the next `get()` probes again."""
+    global _caps
+    with _caps_lock:
+        _caps = None
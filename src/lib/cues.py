@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import io
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from src.lib import capabilities
+
+SAMPLE_RATE = 22050
+VOLUME = 0.5
+
+
+@dataclass(frozen=True)
+class CueSpec:
+    """A decaying chord: (frequency Hz, relative amplitude) partials."""
+
+    partials: Tuple[Tuple[float, float], ...]
+    duration: float
+    decay: float
+    attack: float = 0.004
+    release: float = 0.01
+
+
+CUES: Dict[str, CueSpec] = {
+    "Glass": CueSpec(((1568.0, 0.6), (3136.0, 0.25), (4704.0, 0.15)), duration=0.6, decay=0.15),
+    "Pop": CueSpec(((880.0, 0.8), (1760.0, 0.2)), duration=0.08, decay=0.02, attack=0.002),
+    "Submarine": CueSpec(((220.0, 0.7), (440.0, 0.2), (660.0, 0.1)), duration=0.9, decay=0.3),
+}
+
+
+def _synthesize_numpy(spec: CueSpec, sample_rate: int) -> bytes:
+    import numpy as np  # type: ignore
+
+    n = int(spec.duration * sample_rate)
+    t = np.arange(n) / sample_rate
+    env = np.exp(-t / spec.decay)
+    env *= np.minimum(1.0, t / spec.attack)
+    env *= np.minimum(1.0, (spec.duration - t) / spec.release)
+    tone = sum(amp * np.sin(2 * math.pi * freq * t) for freq, amp in spec.partials)
+    samples = np.round(tone * env * VOLUME * 32767)
+    return np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+
+
+def _synthesize_array(spec: CueSpec, sample_rate: int) -> bytes:
+    n = int(spec.duration * sample_rate)
+    out = array("h", bytes(2 * n))
+    two_pi = 2 * math.pi
+    for i in range(n):
+        t = i / sample_rate
+        env = math.exp(-t / spec.decay)
+        env *= min(1.0, t / spec.attack)
+        env *= min(1.0, (spec.duration - t) / spec.release)
+        tone = sum(amp * math.sin(two_pi * freq * t) for freq, amp in spec.partials)
+        out[i] = max(-32768, min(32767, round(tone * env * VOLUME * 32767)))
+    if sys.byteorder == "big":
+        out.byteswap()
+    return out.tobytes()
+
+
+def synthesize(spec: CueSpec, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Render a cue as 16-bit little-endian mono PCM (NumPy when installed)."""
+    try:
+        return _synthesize_numpy(spec, sample_rate)
+    except ImportError:
+        return _synthesize_array(spec, sample_rate)
+
+
+def wav_bytes(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+@dataclass(frozen=True)
+class Cue:
+    name: str
+    pcm: bytes = field(repr=False)
+    wav: bytes = field(repr=False)
+    sample_rate: int = SAMPLE_RATE
+
+
+class CueBank:
+    """All named cues synthesized once and kept in memory."""
+
+    def __init__(self, specs: Optional[Dict[str, CueSpec]] = None, sample_rate: int = SAMPLE_RATE) -> None:
+        self.sample_rate = sample_rate
+        self._cues: Dict[str, Cue] = {}
+        for name, spec in (specs or CUES).items():
+            pcm = synthesize(spec, sample_rate)
+            self._cues[name] = Cue(name, pcm, wav_bytes(pcm, sample_rate), sample_rate)
+
+    def get(self, name: str) -> Cue:
+        """The named cue; unknown names get "Glass" like the old system-sound fallback."""
+        cue = self._cues.get(name)
+        if cue is None:
+            cue = self._cues.get("Glass") or next(iter(self._cues.values()))
+        return cue
+
+    def names(self) -> List[str]:
+        return list(self._cues)
+
+
+class Sink(Protocol):
+    """Where cue audio goes. `play` must not block on playback."""
+
+    def play(self, cue: Cue) -> bool: ...
+
+
+class MemorySink:
+    """Collects the WAV bytes of every played cue (tests, dry runs)."""
+
+    def __init__(self) -> None:
+        self.played: List[Tuple[str, bytes]] = []
+
+    def play(self, cue: Cue) -> bool:
+        self.played.append((cue.name, cue.wav))
+        return True
+
+
+class SimpleAudioSink:
+    """In-process playback through `simpleaudio` (optional dependency)."""
+
+    def __init__(self) -> None:
+        import simpleaudio  # type: ignore
+
+        self._sa = simpleaudio
+
+    def play(self, cue: Cue) -> bool:
+        try:
+            self._sa.play_buffer(cue.pcm, 1, 2, cue.sample_rate)
+            return True
+        except Exception:
+            return False
+
+
+class SoundDeviceSink:
+    """In-process playback through `sounddevice` + NumPy (optional dependencies)."""
+
+    def __init__(self) -> None:
+        import numpy  # type: ignore
+        import sounddevice  # type: ignore
+
+        self._np = numpy
+        self._sd = sounddevice
+        self._arrays: Dict[str, object] = {}
+
+    def play(self, cue: Cue) -> bool:
+        samples = self._arrays.get(cue.name)
+        if samples is None:
+            samples = self._arrays[cue.name] = self._np.frombuffer(cue.pcm, dtype="<i2")
+        try:
+            self._sd.play(samples, cue.sample_rate, blocking=False)
+            return True
+        except Exception:
+            return False
+
+
+class FilePlayerSink:
+    """Writes each cue to a temp WAV once and hands it to a player binary.
+
+    Still a child process, but it is not waited on and no system sound
+    files are looked up.
+    """
+
+    def __init__(self, player: str) -> None:
+        self.player = player
+        self._dir = tempfile.mkdtemp(prefix="xxx-cues-")
+        self._paths: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def play(self, cue: Cue) -> bool:
+        with self._lock:
+            path = self._paths.get(cue.name)
+            if path is None:
+                path = os.path.join(self._dir, f"{cue.name}.wav")
+                with open(path, "wb") as f:
+                    f.write(cue.wav)
+                self._paths[cue.name] = path
+        try:
+            subprocess.Popen([self.player, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return True
+        except Exception:
+            return False
+
+
+class BellSink:
+    """Terminal bell as a minimal cue."""
+
+    def play(self, cue: Cue) -> bool:
+        try:
+            print("\a", end="", flush=True)
+            return True
+        except Exception:
+            return False
+
+
+def default_sink() -> Sink:
+    """Best sink available: in-process audio, then a player binary, then the bell."""
+    for factory in (SimpleAudioSink, SoundDeviceSink):
+        try:
+            return factory()
+        except Exception:
+            continue
+    player = capabilities.get().audio_player
+    if player:
+        return FilePlayerSink(player)
+    return BellSink()
+
+
+class CuePlayer:
+    def __init__(self, bank: Optional[CueBank] = None, sink: Optional[Sink] = None) -> None:
+        self.bank = bank if bank is not None else CueBank()
+        self.sink = sink if sink is not None else default_sink()
+
+    def play(self, name: str = "Glass") -> bool:
+        return self.sink.play(self.bank.get(name))
+
+
+_player: Optional[CuePlayer] = None
+_player_lock = threading.Lock()
+
+
+def get_player() -> CuePlayer:
+    """Process-wide player; cues are synthesized on first use."""
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = CuePlayer()
+        return _player
+
+
+def set_player(player: Optional[CuePlayer]) -> Optional[CuePlayer]:
+    """Replace the process-wide player (e.g. one with a MemorySink). Returns the old one."""
+    global _player
+    with _player_lock:
+        previous, _player = _player, player
+    return previous
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import contextvars
+import io
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional
+
+# Wire protocol: newline-delimited JSON objects in both directions.
+#   client -> daemon: {"argv": [...], "tty": bool}, then {"stdin": text}... and {"eof": true}
+#   daemon -> client: {"stdout": text} / {"stderr": text} / {"want_stdin": true}..., then {"exit": code}
+# The client sends stdin only after "want_stdin", so a one-shot command
+# run from a `while read` loop doesn't swallow the loop's input.
+SOCKET_ENV = "XXX_SOCKET"
+
+Runner = Callable[[List[str]], Optional[int]]
+
+
+def default_socket_path() -> str:
+    """$XXX_SOCKET, else a per-user socket in the runtime (or temp) directory."""
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if not base:
+        import tempfile  # not at module level: the client imports this module
+
+        base = tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(base, f"xxx-{uid}.sock")
+
+
+def send(sock: socket.socket, message: Dict[str, Any], lock: Optional[threading.Lock] = None) -> None:
+    data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+    if lock is None:
+        sock.sendall(data)
+        return
+    with lock:
+        sock.sendall(data)
+
+
+def messages(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """Decoded messages until the peer closes; a malformed line ends the stream."""
+    for line in stream:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        if isinstance(message, dict):
+            yield message
+
+
+class _SocketWriter(io.TextIOBase):
+    """stdout/stderr of one request, sent to its client as messages."""
+
+    def __init__(self, sock: socket.socket, lock: threading.Lock, key: str) -> None:
+        self._sock = sock
+        self._lock = lock
+        self._key = key
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            # A vanished client surfaces as BrokenPipeError in the request
+            send(self._sock, {self._key: text}, self._lock)
+        return len(text)
+
+
+class _SocketReader(io.TextIOBase):
+    """stdin of one request, fed line by line as the client sends it."""
+
+    def __init__(self, tty: bool, on_first_read: Callable[[], None]) -> None:
+        self._tty = tty
+        self._on_first_read: Optional[Callable[[], None]] = on_first_read
+        self._chunks: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._buffer = ""
+        self._eof = False
+
+    def feed(self, text: Optional[str]) -> None:
+        """Queue client input; None marks the end of it."""
+        self._chunks.put(text)
+
+    def readable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._tty
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        if self._on_first_read is not None:
+            self._on_first_read, ask = None, self._on_first_read
+            ask()
+        chunk = self._chunks.get()
+        if chunk is None:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def readline(self, size: int = -1) -> str:  # type: ignore[override]
+        while "\n" not in self._buffer and self._fill():
+            pass
+        end = self._buffer.find("\n") + 1 or len(self._buffer)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+    def read(self, size: int = -1) -> str:  # type: ignore[override]
+        while (size is None or size < 0 or len(self._buffer) < size) and self._fill():
+            pass
+        if size is None or size < 0:
+            size = len(self._buffer)
+        out, self._buffer = self._buffer[:size], self._buffer[size:]
+        return out
+
+
+class _ThreadLocalStream:
+    """Stands in for sys.stdin/stdout/stderr in the daemon.
+
+    Each request sees its own client's streams, so concurrent requests can
+    use print() and input(). The streams travel in a ContextVar: a thread a
+    request starts sees them when it runs in a copy of the request's
+    context (`contextvars.copy_context().run`, as the session's stdin
+    reader does); other threads get the daemon's.
+    """
+
+    def __init__(self, name: str, default: IO[str]) -> None:
+        self._name = name
+        self._default = default
+
+    def _target(self) -> IO[str]:
+        streams = _streams.get()
+        return streams[self._name] if streams else self._default
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._target(), attr)
+
+    def __iter__(self) -> "_ThreadLocalStream":
+        return self
+
+    def __next__(self) -> str:
+        line = self._target().readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+_streams: "contextvars.ContextVar[Optional[Dict[str, IO[str]]]]" = contextvars.ContextVar("daemon_streams", default=None)
+def _install_streams() -> None:
+    if not isinstance(sys.stdout, _ThreadLocalStream):
+        sys.stdin = _ThreadLocalStream("stdin", sys.stdin)  # type: ignore[assignment]
+        sys.stdout = _ThreadLocalStream("stdout", sys.stdout)  # type: ignore[assignment]
+        sys.stderr = _ThreadLocalStream("stderr", sys.stderr)  # type: ignore[assignment]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        reader = self.rfile
+        incoming = messages(reader)
+        try:
+            request = next(incoming)
+        except StopIteration:
+            return
+        argv = request.get("argv")
+        if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+            return
+        lock = threading.Lock()
+        stdin = _SocketReader(bool(request.get("tty")), lambda: send(self.connection, {"want_stdin": True}, lock))
+        threading.Thread(target=self._pump, args=(incoming, stdin), name="daemon-stdin", daemon=True).start()
+        streams: Dict[str, IO[str]] = {
+            "stdin": stdin,
+            "stdout": _SocketWriter(self.connection, lock, "stdout"),
+            "stderr": _SocketWriter(self.connection, lock, "stderr"),
+        }
+        token = _streams.set(streams)
+        code = 1
+        try:
+            code = self.server.run(argv) or 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if not isinstance(e.code, (int, type(None))):
+                streams["stderr"].write(f"{e.code}\n")
+        except (BrokenPipeError, ConnectionResetError):
+            return  # the client went away
+        except Exception as e:
+            try:
+                streams["stderr"].write(f"daemon: {type(e).__name__}: {e}\n")
+            except OSError:
+                return
+        finally:
+            _streams.reset(token)
+        try:
+            send(self.connection, {"exit": code}, lock)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _pump(incoming: Iterator[Dict[str, Any]], stdin: _SocketReader) -> None:
+        try:
+            for message in incoming:
+                if "stdin" in message:
+                    stdin.feed(str(message["stdin"]))
+                if message.get("eof"):
+                    break
+        except OSError:
+            pass
+        stdin.feed(None)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """One thread per client; `run(argv)` is the CLI entry point."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, run: Runner) -> None:
+        self.run = run
+        super().__init__(path, _Handler)
+
+
+def is_running(path: str) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+def make_server(path: str, run: Runner) -> DaemonServer:
+    """Bind `path` (owner-only); a stale socket file from a dead daemon is replaced.
+
+    Raises RuntimeError when another daemon is already listening there.
+    """
+    if os.path.exists(path):
+        if is_running(path):
+            raise RuntimeError(f"a daemon is already listening on {path}")
+        os.unlink(path)
+    old_umask = os.umask(0o077)
+    try:
+        server = DaemonServer(path, run)
+    finally:
+        os.umask(old_umask)
+    _install_streams()
+    return server
+
+
+def serve(path: str, run: Runner, warm: Optional[Callable[[], None]] = None) -> int:
+    """Serve until interrupted; `warm` preloads whatever requests will need."""
+    try:
+        server = make_server(path, run)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if warm is not None:
+        warm()
+    print(f"Daemon listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
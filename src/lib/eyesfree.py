@@ -3,29 +3,39 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
+from src.lib import voice_commands
+from src.lib.tracing import traced
+
 
 @dataclass
 class Command:
     name: str
     arg: Optional[str] = None
+    confidence: float = 1.0
 
 
+@traced("parse_command")
 def parse_command(line: str) -> Tuple[bool, Optional[Command]]:
-    """Parse a slash command from the input line.
+    """Parse a typed or spoken command from the input line.
 
     Recognized:
-    /undo, /read, /done, /help, /save <path>
+    /undo, /read, /stop, /done, /help, /pause, /resume, /skip, /save <path>
+    Spoken forms such as "スラッシュ ドーン" or "slash undo" match too
+    (see `voice_commands`); `confidence` is below 1.0 for near misses.
     Returns (is_command, Command|None)
     """
-    if not line or not line.startswith("/"):
+    if not line or not line.strip():
         return False, None
+    if not line.startswith("/"):
+        found = voice_commands.match(line)
+        if found is None:
+            return False, None
+        return True, Command(found.name, found.arg, found.confidence)
     parts = line.strip().split(maxsplit=1)
-    name = parts[0][1:].lower()
     arg = parts[1].strip() if len(parts) > 1 else None
-    if name in {"undo", "read", "done", "help"}:
-        return True, Command(name)
-    if name == "save":
-        return True, Command(name, arg)
+    found = voice_commands.match(parts[0])
+    if found is not None:
+        # Typed commands ignore stray words after the name
+        return True, Command(found.name, arg if found.name in voice_commands.TAKES_ARG else None, found.confidence)
     # Unknown commands are still considered commands for help
     return True, Command("help")
-
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# Read once at import: changing the umask to read it isn't thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_atomic(path: str, text: Union[str, Iterable[str]]) -> None:
+    """Replace `path` with `text` so readers see the old or the new file, never half.
+
+    `text` may also be an iterable of chunks, written as they are produced.
+    A replaced file keeps its permissions; a new one gets the umask's
+    default, not mkstemp's 0600.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        os.chmod(tmp, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if isinstance(text, str):
+                f.write(text)
+            else:
+                for chunk in text:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class Journal:
+    """Append-only JSONL log of a session: one record per line, undo or command.
+
+    Each record is written through to the OS immediately, so a crash of
+    the process loses nothing; fsync (against power loss) is batched so
+    at most one happens per `fsync_interval` seconds. 0 syncs every record.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 1.0) -> None:
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.records = 0
+        self.syncs = 0
+        self._f = open(path, "ab")
+        if self._f.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Terminate a record torn by a crash so the next one starts clean
+                    self._f.write(b"\n")
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        if fsync_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="journal-fsync", daemon=True)
+            self._flusher.start()
+
+    def append(self, kind: str, **fields: Any) -> None:
+        record = {"t": round(time.time(), 3), "kind": kind}
+        record.update(fields)
+        data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._closed:
+                return
+            self._f.write(data)
+            self._f.flush()
+            self.records += 1
+            if self._flusher is None:
+                self._sync_locked()
+            else:
+                self._dirty.set()
+
+    def start(self, **config: Any) -> None:
+        self.append("start", config=config)
+
+    def line(self, text: str) -> None:
+        self.append("line", text=text)
+
+    def undo(self) -> None:
+        self.append("undo")
+
+    def command(self, name: str, arg: Optional[str] = None) -> None:
+        self.append("command", name=name, arg=arg)
+
+    def resume(self) -> None:
+        self.append("resume")
+
+    def end(self) -> None:
+        self.append("end")
+
+    def sync(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._sync_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._sync_locked()
+            self._closed = True
+            self._f.close()
+        self._dirty.set()
+        if self._flusher is not None:
+            self._flusher.join(1.0)
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _sync_locked(self) -> None:
+        os.fsync(self._f.fileno())
+        self.syncs += 1
+        self._dirty.clear()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            if self._closed:
+                return
+            # Let records pile up for one interval, then commit them together
+            time.sleep(self.fsync_interval)
+            with self._lock:
+                if self._closed:
+                    return
+                self._sync_locked()
+
+
+@dataclass
+class JournalState:
+    """What a journal replays to."""
+
+    lines: List[str] = field(default_factory=list)
+    config: Dict[str, Any] = field(default_factory=dict)
+    started_at: Optional[float] = None
+    last_at: Optional[float] = None
+    ended: bool = False
+    records: int = 0
+
+    @property
+    def elapsed(self) -> float:
+        """Session seconds that had passed when the journal was last written."""
+        if self.started_at is None or self.last_at is None:
+            return 0.0
+        return max(0.0, self.last_at - self.started_at)
+
+
+def replay(path: str) -> JournalState:
+    """Rebuild the last session in a journal.
+
+    A torn last record (crash mid-write) is skipped.
+    """
+    state = JournalState()
+    with open(path, "rb") as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            kind = record.get("kind")
+            t = record.get("t", state.last_at)
+            state.records += 1
+            if kind == "resume" and state.started_at is not None and state.last_at is not None:
+                # Time between the crash and the recovery doesn't count
+                state.started_at += t - state.last_at
+            state.last_at = t
+            if kind == "start":
+                # A journal may hold several sessions; the last one wins
+                state.lines = []
+                state.ended = False
+                state.config = record.get("config") or {}
+                state.started_at = t
+            elif kind == "line":
+                state.lines.append(record.get("text", ""))
+            elif kind == "undo":
+                if state.lines:
+                    state.lines.pop()
+            elif kind == "end":
+                state.ended = True
+            elif kind == "resume":
+                state.ended = False
+    return state
+
+
+def recover(path: Optional[str]) -> Optional[JournalState]:
+    """State of an unfinished session journaled at `path`, if there is one."""
+    if not path or not os.path.exists(path):
+        return None
+    state = replay(path)
+    if state.ended or state.started_at is None:
+        return None
+    return state
+
+
+def compact(journal_path: str, out_path: str, remove: bool = False) -> JournalState:
+    """Write the journal's transcript to `out_path` atomically.
+
+    With `remove`, the journal is deleted once the transcript is on disk.
+    """
+    state = replay(journal_path)
+    write_atomic(out_path, "\n".join(state.lines))
+    if remove:
+        os.remove(journal_path)
+    return state
+
+
+def transcript_path(journal_path: str) -> str:
+    """Where a finished session's journal is compacted: `session.jsonl` -> `session.transcript.txt`."""
+    return os.path.splitext(journal_path)[0] + ".transcript.txt"
+
+
+def finish_journal(journal: Journal) -> Optional[str]:
+    """End and close a session's journal, then compact it into its transcript.
+
+    The journal is removed so it doesn't grow across sessions; if
+    compaction fails it is kept (with its end record) and None returned.
+    """
+    journal.end()
+    journal.close()
+    out = transcript_path(journal.path)
+    try:
+        compact(journal.path, out, remove=True)
+    except OSError:
+        return None
+    return out
@@ -1,10 +1,8 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional
 
-
-def _join_lines(lines: List[str]) -> str:
-    return "\n".join(s.strip() for s in lines if s is not None)
+from src.lib.templates import REGISTRY
 
 
 def build_prompt(mode: str, data: Dict) -> str:
@@ -14,32 +12,22 @@ def build_prompt(mode: str, data: Dict) -> str:
     - diary: format diary entry
     - music: format music request
     - image: format image description
+    Modes are looked up in the template registry (`src.lib.templates`),
+    which also holds user-defined templates; unknown modes give the seed.
     """
-    mode = (mode or "").lower().strip()
-    seed = str(data.get("seed", "")).strip() if data else ""
-
-    if mode == "chat":
-        lines = data.get("lines", []) if data else []
-        if lines:
-            return _join_lines(lines)
-        return seed
-
-    if mode == "diary":
-        title = (data.get("title") or "Untitled").strip() if data else "Untitled"
-        body = data.get("body") or seed or ""
-        return f"[Diary]\nTitle: {title}\n{body}".strip()
-
-    if mode == "music":
-        genre = (data.get("genre") or "ambient").strip() if data else "ambient"
-        bpm = data.get("bpm")
-        bpm_part = f" @ {bpm} BPM" if bpm else ""
-        mood = (data.get("mood") or seed or "calm").strip()
-        return f"Music: {genre}{bpm_part}\nMood: {mood}".strip()
-
-    if mode == "image":
-        subject = (data.get("subject") or seed or "a scene").strip()
-        style = (data.get("style") or "photorealistic").strip()
-        return f"Image: {subject}\nStyle: {style}".strip()
-
-    # Fallback
-    return seed
+    return REGISTRY.render(mode, data)
+
+
+def iter_prompt(mode: str, data: Dict) -> Iterator[str]:
+    """`build_prompt` in chunks, for output too large to hold twice.
+
+    `"".join(iter_prompt(mode, data)) == build_prompt(mode, data)`. Chat
+    `lines` may be any iterable of strings (an open file, a generator)
+    and is consumed as the chunks are taken.
+    """
+    return REGISTRY.iter_render(mode, data)
+
+
+def build_prompts(mode: str, records: Iterable[Optional[Dict]]) -> List[str]:
+    """`build_prompt` over many records of one mode, compiling the lookup once."""
+    return REGISTRY.render_many(mode, records)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, List, Optional
+
+from src.lib.speech import speak_async
+
+# The first chunk is short so speech starts after synthesizing at most this
+# many characters, however long the transcript; later chunks are longer so
+# there are fewer gaps between utterances.
+FIRST_CHUNK_CHARS = 40
+MAX_CHUNK_CHARS = 120
+
+# A sentence ends at 。！？!?… (plus closing brackets), at ". " and at line ends
+_SENTENCE = re.compile(r".*?(?:[。．！？!?…]+[」』）)\]\"']*|\.(?=\s)|\n|$)", re.S)
+# Where an over-long sentence may be split, best first
+_SOFT_BREAKS = ("、", "，", ",", "；", ";", "：", ":", " ", "　")
+
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE.findall(text) if s.strip()]
+
+
+def _fit(sentence: str, limit: int) -> List[str]:
+    """Split one sentence into pieces of at most `limit` characters."""
+    pieces = []
+    while len(sentence) > limit:
+        window = sentence[: limit + 1]
+        cut = -1
+        for mark in _SOFT_BREAKS:
+            cut = window.rfind(mark, 1, limit)
+            if cut > 0:
+                break
+        cut = cut + 1 if cut > 0 else limit
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def chunk_text(
+    text: str,
+    max_chars: int = MAX_CHUNK_CHARS,
+    first_chars: int = FIRST_CHUNK_CHARS,
+) -> List[str]:
+    """Split text into speakable chunks at sentence and line boundaries.
+
+    - Japanese (。、！？) and Latin punctuation are both boundaries; a
+      sentence over the limit is split at 、/commas/spaces, then hard.
+    - Short sentences are merged (up to `max_chars`) so long readbacks
+      don't become hundreds of tiny utterances; the first chunk stays
+      within `first_chars`.
+    """
+    chunks: List[str] = []
+    current = ""
+    for sentence in _sentences(text):
+        for piece in _fit(sentence, first_chars if not chunks and not current else max_chars):
+            limit = first_chars if not chunks else max_chars
+            if current and len(current) + 1 + len(piece) <= limit:
+                current += "\n" + piece
+                continue
+            if current:
+                chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def read_back(
+    text: str,
+    voice: Optional[str] = None,
+    rate: Optional[int] = None,
+    *,
+    enabled: bool = True,
+    say: Callable[..., bool] = speak_async,
+) -> int:
+    """Queue `text` as sentence chunks and return immediately.
+
+    The speech engine renders chunk N+1 while chunk N plays (when its
+    backend can), and `barge_in()` (the /stop command, or any new input)
+    drops the rest. Returns how many chunks were queued.
+    """
+    if not enabled:
+        return 0
+    queued = 0
+    for chunk in chunk_text(text):
+        if say(chunk, voice=voice, rate=rate, enabled=True):
+            queued += 1
+    return queued
@@ -1,12 +1,50 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import threading
 import time
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import asdict, dataclass, fields
+from typing import List, Optional, Protocol
 
 from src.lib.eyesfree import parse_command
-from src.lib.speech import speak, chime
-from src.lib.stt import transcribe_once, has_speech_recognition
+from src.lib.journal import Journal, JournalState, finish_journal, write_atomic
+from src.lib.readback import chunk_text
+from src.lib.speech import barge_in, chime, speak, speak_async
+from src.lib.stt import StreamingListener, open_listener
+from src.lib.tracing import traced
+
+
+# Fixed phrases; PHRASES is what the TTS cache pre-renders at startup
+MSG_START = "セッションを開始します。準備ができたら呼吸に注意を向けてください。"
+MSG_PROMPT = "そのまま、いま気づいていることをどうぞ。必要ならスラッシュ・ドーンで終了です。"
+MSG_PAUSED = "一時停止します。再開はスラッシュ・リジューム。"
+MSG_RESUMED = "再開します。"
+MSG_EMPTY = "まだ何もありません。"
+MSG_UNDONE = "取り消しました。"
+MSG_NOTHING_TO_UNDO = "取り消すものはありません。"
+MSG_SAVED = "保存しました。"
+MSG_SAVE_FAILED = "保存に失敗しました。"
+MSG_NO_PATH = "保存先を指定してください。"
+MSG_HELP = "使えるコマンドは、ポーズ、リジューム、スキップ、リード、ストップ、アンドゥ、セーブ、ドーンです。"
+MSG_ACK = "受け取りました。"
+MSG_END = "セッションを終了します。おつかれさまでした。"
+
+PHRASES = (
+    MSG_START,
+    MSG_PROMPT,
+    MSG_PAUSED,
+    MSG_RESUMED,
+    MSG_EMPTY,
+    MSG_UNDONE,
+    MSG_NOTHING_TO_UNDO,
+    MSG_SAVED,
+    MSG_SAVE_FAILED,
+    MSG_NO_PATH,
+    MSG_HELP,
+    MSG_ACK,
+    MSG_END,
+)
 
 
 @dataclass
@@ -19,101 +57,366 @@ class SessionConfig:
     rate: Optional[int] = None
     use_voice_input: bool = False
     save_path: Optional[str] = None
+    stt_backend: Optional[str] = None
+    journal_path: Optional[str] = None
+    fsync_interval: float = 1.0
 
 
-def _now_iso() -> str:
-    return time.strftime("%Y-%m-%dT%H:%M:%S")
+def _now_iso(now: Optional[float] = None) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now))
 
 
-def run_session(cfg: SessionConfig) -> List[str]:
-    """Run a time‑boxed session returning the captured lines.
+class Clock(Protocol):
+    """Wall-clock time for transcript stamps; deadlines use the event loop's clock."""
 
-    Accepts voice (STT) and typed input. Supports commands:
-    /pause /resume /skip /read /undo /save <path> /done
+    def time(self) -> float: ...
+
+
+class SystemClock:
+    def time(self) -> float:
+        return time.time()
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+def _journal_config(cfg: SessionConfig) -> dict:
+    """Config fields worth restoring on recovery (not the journal itself)."""
+    config = asdict(cfg)
+    config.pop("journal_path", None)
+    return config
+
+
+def config_from_journal(state: JournalState, journal_path: str) -> SessionConfig:
+    """SessionConfig of a journaled session, appending to the same journal."""
+    known = {f.name for f in fields(SessionConfig)}
+    cfg = SessionConfig(**{k: v for k, v in state.config.items() if k in known})
+    cfg.journal_path = journal_path
+    return cfg
+
+
+def open_journal(cfg: SessionConfig) -> Optional[Journal]:
+    return Journal(cfg.journal_path, cfg.fsync_interval) if cfg.journal_path else None
+
+
+class SessionOutput(Protocol):
+    """Where a session's speech and cues go (local audio, a browser, a test log)."""
+
+    def say(self, text: str, wait: bool = False) -> None: ...
+
+    def chime(self, sound: str = "Glass") -> None: ...
+
+    def interrupt(self) -> None: ...
+
+
+class SpeechOutput:
+    """Local TTS and cues; acknowledgements are queued, not waited on."""
+
+    def __init__(self, cfg: SessionConfig) -> None:
+        self.cfg = cfg
+
+    def say(self, text: str, wait: bool = False) -> None:
+        say = speak if wait else speak_async
+        say(text, voice=self.cfg.voice_name, rate=self.cfg.rate, enabled=self.cfg.use_voice)
+
+    async def say_and_wait(self, text: str) -> None:
+        """`say(text, wait=True)` that waits on a worker thread, not the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, self.say, text, True)
+
+    def chime(self, sound: str = "Glass") -> None:
+        chime(sound)
+
+    def interrupt(self) -> None:
+        barge_in()
+
+
+async def _say_and_wait(out: SessionOutput, text: str) -> None:
+    # Outputs without `say_and_wait` don't block on wait=True (browser, test log)
+    say_and_wait = getattr(out, "say_and_wait", None)
+    if say_and_wait is None:
+        out.say(text, wait=True)
+    else:
+        await say_and_wait(text)
+
+
+class SessionCore:
+    """The session's rules as a state machine; callers supply time and input.
+
+    - `tick(now)` fires the interval prompt when due and ends the session
+      at its deadline; `next_deadline()` says when to tick next.
+    - `handle(text, now)` applies one utterance or command; lines are
+      stamped with `clock.time()`, so a simulated clock gives simulated
+      stamps.
+    - `begin`/`finish` speak the greeting and farewell to the end;
+      `begin_async`/`finish_async` do the same without blocking the loop.
     """
-    lines: List[str] = []
-    start = time.monotonic()
-    end_at = start + max(1, cfg.minutes) * 60
-    next_mark = start
-    paused = False
-
-    speak("セッションを開始します。準備ができたら呼吸に注意を向けてください。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-    chime()
-
-    def capture_turn() -> Optional[str]:
-        if cfg.use_voice_input and has_speech_recognition():
-            return transcribe_once(lang=cfg.lang)
-        try:
-            return input("> ")
-        except (EOFError, KeyboardInterrupt):
-            return "/done"
 
-    while time.monotonic() < end_at:
-        now = time.monotonic()
-        if not paused and now >= next_mark:
+    __slots__ = (
+        "cfg", "out", "journal", "recovered", "clock", "lines", "paused", "started", "done", "end_at", "next_mark"
+    )
+
+    def __init__(
+        self,
+        cfg: SessionConfig,
+        out: SessionOutput,
+        journal: Optional[Journal] = None,
+        recovered: Optional[JournalState] = None,
+        clock: Optional[Clock] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.out = out
+        self.journal = journal
+        self.recovered = recovered
+        self.clock = clock or SYSTEM_CLOCK
+        self.lines: List[str] = list(recovered.lines) if recovered else []
+        self.paused = False
+        self.started = False
+        self.done = False
+        self.end_at = 0.0
+        self.next_mark = 0.0
+
+    def begin(self, now: float) -> None:
+        self._open(now)
+        self.out.say(MSG_START, wait=True)
+        self.out.chime()
+
+    async def begin_async(self, now: float) -> None:
+        self._open(now)
+        await _say_and_wait(self.out, MSG_START)
+        self.out.chime()
+
+    def finish(self) -> None:
+        if self._close():
+            self.out.chime()
+            self.out.say(MSG_END, wait=True)
+
+    async def finish_async(self) -> None:
+        if self._close():
+            self.out.chime()
+            await _say_and_wait(self.out, MSG_END)
+
+    def _open(self, now: float) -> None:
+        self.started = True
+        elapsed = self.recovered.elapsed if self.recovered else 0.0
+        self.end_at = now + max(1, self.cfg.minutes) * 60 - elapsed
+        self.next_mark = now
+        if self.journal is not None:
+            if self.recovered is not None:
+                self.journal.resume()
+            else:
+                self.journal.start(**_journal_config(self.cfg))
+
+    def _close(self) -> bool:
+        """Mark the session done; True if it had started and the farewell is due."""
+        if not self.started or self.done:
+            self.done = True
+            return False
+        self.done = True
+        if self.journal is not None:
+            finish_journal(self.journal)
+        return True
+
+    def next_deadline(self) -> float:
+        return self.end_at if self.paused else min(self.next_mark, self.end_at)
+
+    def tick(self, now: float) -> bool:
+        """Advance to `now`; False once the session is over."""
+        if self.done:
+            return False
+        if now >= self.end_at:
+            self.finish()
+            return False
+        if not self.paused and now >= self.next_mark:
             # Gentle prompt at each interval
-            chime()
-            speak("そのまま、いま気づいていることをどうぞ。必要ならスラッシュ・ドーンで終了です。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-            next_mark = now + cfg.interval_sec
-
-        text = capture_turn()
-        if text is None:
-            continue
-        if not text.strip():
+            self.out.chime()
+            self.out.say(MSG_PROMPT)
+            self.next_mark = now + self.cfg.interval_sec
+        return True
+
+    @traced("session.handle")
+    def handle(self, text: str, now: float) -> None:
+        if self.done or not text or not text.strip():
             # ignore empty in session
-            continue
+            return
+        # New input interrupts acknowledgements that are still queued
+        self.out.interrupt()
 
         is_cmd, cmd = parse_command(text)
         if is_cmd and cmd:
             name = cmd.name
+            if self.journal is not None:
+                self.journal.command(name, cmd.arg)
             if name == "pause":
-                paused = True
-                speak("一時停止します。再開はスラッシュ・リジューム。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-                continue
-            if name == "resume":
-                paused = False
-                next_mark = time.monotonic()  # prompt soon after resume
-                speak("再開します。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-                continue
-            if name == "skip":
-                next_mark = time.monotonic()  # trigger next prompt
-                chime()
-                continue
-            if name == "read":
-                speak("\n".join(lines) or "まだ何もありません。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-                continue
-            if name == "undo":
-                if lines:
-                    lines.pop()
-                    speak("取り消しました。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
+                self.paused = True
+                self.out.say(MSG_PAUSED)
+            elif name == "resume":
+                self.paused = False
+                self.next_mark = now  # prompt soon after resume
+                self.out.say(MSG_RESUMED)
+            elif name == "skip":
+                self.next_mark = now  # trigger next prompt
+                self.out.chime()
+            elif name == "read":
+                # Chunked so speech starts after the first sentence; new input drops the rest
+                for chunk in chunk_text("\n".join(self.lines)) or [MSG_EMPTY]:
+                    self.out.say(chunk)
+            elif name == "stop":
+                pass  # the interrupt above already silenced the readback
+            elif name == "undo":
+                if self.lines:
+                    self.lines.pop()
+                    if self.journal is not None:
+                        self.journal.undo()
+                    self.out.say(MSG_UNDONE)
                 else:
-                    speak("取り消すものはありません。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-                continue
-            if name == "save":
-                path = cmd.arg or cfg.save_path
+                    self.out.say(MSG_NOTHING_TO_UNDO)
+            elif name == "save":
+                path = cmd.arg or self.cfg.save_path
                 if path:
                     try:
-                        with open(path, "w", encoding="utf-8") as f:
-                            f.write("\n".join(lines))
-                        speak("保存しました。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
+                        write_atomic(path, "\n".join(self.lines))
+                        self.out.say(MSG_SAVED)
                     except Exception:
-                        speak("保存に失敗しました。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
+                        self.out.say(MSG_SAVE_FAILED)
                 else:
-                    speak("保存先を指定してください。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-                continue
-            if name == "done":
-                break
-            # Unknown -> help
-            speak("使えるコマンドは、ポーズ、リジューム、スキップ、リード、アンドゥ、セーブ、ドーンです。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-            continue
+                    self.out.say(MSG_NO_PATH)
+            elif name == "done":
+                self.finish()
+            else:
+                # Unknown -> help
+                self.out.say(MSG_HELP)
+            return
 
         # Regular content line with timestamp
-        stamped = f"[{_now_iso()}] {text}"
-        lines.append(stamped)
+        stamped = f"[{_now_iso(self.clock.time())}] {text}"
+        self.lines.append(stamped)
+        if self.journal is not None:
+            self.journal.line(stamped)
         # Short confirm only in voice mode
-        speak("受け取りました。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
+        self.out.say(MSG_ACK)
+
+
+def _post(
+    loop: asyncio.AbstractEventLoop,
+    inbox: "asyncio.Queue[Optional[str]]",
+    item: Optional[str],
+    stop: threading.Event,
+) -> bool:
+    """Hand `item` to the session from a reader thread; False once the session is over."""
+    if stop.is_set() or loop.is_closed():
+        return False
+    try:
+        loop.call_soon_threadsafe(inbox.put_nowait, item)
+    except RuntimeError:
+        return False  # the loop closed after the check
+    return True
+
+
+def _read_stdin(loop: asyncio.AbstractEventLoop, inbox: "asyncio.Queue[Optional[str]]", stop: threading.Event) -> None:
+    # input() can't be interrupted: a thread blocked in it when the session
+    # ends exits after the next line instead of posting to a closed loop
+    while not stop.is_set():
+        try:
+            line: Optional[str] = input("> ")
+        except (EOFError, KeyboardInterrupt):
+            line = None
+        if not _post(loop, inbox, line, stop) or line is None:
+            return
+
+
+def _read_listener(
+    listener: StreamingListener,
+    loop: asyncio.AbstractEventLoop,
+    inbox: "asyncio.Queue[Optional[str]]",
+    stop: threading.Event,
+) -> None:
+    while not stop.is_set():
+        text = listener.get(timeout=0.2)
+        if text is not None:
+            if not _post(loop, inbox, text, stop):
+                return
+        elif listener.exhausted:
+            _post(loop, inbox, "/done", stop)
+            return
+
+
+async def drive_session(core: SessionCore, inbox: "Optional[asyncio.Queue[Optional[str]]]" = None) -> None:
+    """Run `core` on the event loop until /done or the deadline.
+
+    Input comes from `inbox` if given (None means end of input); otherwise
+    from stdin and, with `use_voice_input`, the STT listener, both read on
+    background threads. Prompts and the session end fire on their timers
+    while waiting for input.
+    """
+    loop = asyncio.get_running_loop()
+    cfg = core.cfg
+    await core.begin_async(loop.time())
+
+    listener = None
+    stop = threading.Event()
+    eof_ends = True
+    if inbox is None:
+        inbox = asyncio.Queue()
+        if cfg.use_voice_input:
+            # Opened once for the whole session; speaking over a prompt cuts it short
+            listener = open_listener(cfg.lang, backend=cfg.stt_backend, on_phrase=core.out.interrupt)
+        if listener is not None:
+            # Typing still works, but closed stdin must not end a voice session
+            eof_ends = False
+            threading.Thread(
+                target=_read_listener, args=(listener, loop, inbox, stop), name="session-stt", daemon=True
+            ).start()
+        # In the caller's context, so under the daemon it reads (and prompts) the requesting client
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_read_stdin, loop, inbox, stop),
+            name="session-stdin",
+            daemon=True,
+        ).start()
+
+    try:
+        while core.tick(loop.time()):
+            timeout = max(0.0, core.next_deadline() - loop.time())
+            try:
+                text = await asyncio.wait_for(inbox.get(), timeout)
+            except asyncio.TimeoutError:
+                continue
+            if text is None:
+                if eof_ends:
+                    core.handle("/done", loop.time())
+                continue
+            core.handle(text, loop.time())
+    finally:
+        stop.set()
+        if listener is not None:
+            listener.stop()
+        await core.finish_async()
+
+
+async def run_session_async(
+    cfg: SessionConfig,
+    inbox: "Optional[asyncio.Queue[Optional[str]]]" = None,
+    out: Optional[SessionOutput] = None,
+    clock: Optional[Clock] = None,
+) -> List[str]:
+    """Asyncio session runner; see `drive_session`. Returns the captured lines."""
+    core = SessionCore(cfg, out or SpeechOutput(cfg), open_journal(cfg), clock=clock)
+    await drive_session(core, inbox)
+    return core.lines
 
-    chime()
-    speak("セッションを終了します。おつかれさまでした。", voice=cfg.voice_name, rate=cfg.rate, enabled=cfg.use_voice)
-    return lines
 
+def run_session(cfg: SessionConfig, recovered: Optional[JournalState] = None) -> List[str]:
+    """Run a time‑boxed session returning the captured lines.
+
+    Accepts voice (STT) and typed input. Supports commands:
+    /pause /resume /skip /read /stop /undo /save <path> /done
+    Blocking wrapper around the asyncio runner. With `cfg.journal_path`
+    every line is journaled as it happens; pass the replayed state as
+    `recovered` to continue a crashed session with its remaining time.
+    """
+    core = SessionCore(cfg, SpeechOutput(cfg), open_journal(cfg), recovered)
+    try:
+        asyncio.run(drive_session(core))
+    except KeyboardInterrupt:
+        core.finish()
+    return core.lines
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+from src.lib import websocket
+from src.lib.eyesfree import parse_command
+from src.lib.session import MSG_SAVED, SessionConfig, SessionCore
+
+# Wire protocol: one JSON object per WebSocket text message.
+#   browser -> host: {"type": "start", "minutes": 15, "interval_sec": 60, "lang": "ja-JP"} once,
+#                    then {"type": "text", "text": "..."} per typed or recognized utterance
+#   host -> browser: {"type": "say", "text"} / {"type": "chime", "sound"} / {"type": "interrupt"},
+#                    {"type": "transcript", "lines"} on /save, {"type": "end", "lines"} at the end,
+#                    {"type": "error", "error"} for a rejected message
+SESSION_PATH = "/session"
+MAX_SESSIONS = 1000
+# A connection that doesn't send "start" within this many seconds is dropped
+START_TIMEOUT = 10.0
+# ...and one that doesn't answer the close at the end within this many is aborted
+CLOSE_TIMEOUT = 5.0
+
+# What a browser may choose, with bounds; everything else comes from the host's defaults
+CLIENT_LIMITS = {"minutes": (1, 180), "interval_sec": (5, 3600)}
+MAX_LANG_LEN = 16
+
+
+def _message(kind: str, **fields: Any) -> str:
+    fields["type"] = kind
+    return json.dumps(fields, ensure_ascii=False)
+
+
+class SocketOutput:
+    """SessionOutput that sends speech and cues to the browser to play."""
+
+    __slots__ = ("ws",)
+
+    def __init__(self, ws: websocket.WebSocket) -> None:
+        self.ws = ws
+
+    def say(self, text: str, wait: bool = False) -> None:
+        self.ws.send(_message("say", text=text))
+
+    def chime(self, sound: str = "Glass") -> None:
+        self.ws.send(_message("chime", sound=sound))
+
+    def interrupt(self) -> None:
+        self.ws.send(_message("interrupt"))
+
+
+def session_config(defaults: SessionConfig, request: Dict[str, Any]) -> SessionConfig:
+    """The host's defaults with the client's bounded choices applied.
+
+    Local audio, STT, journals and server-side save paths are always off:
+    the browser speaks, listens and keeps the file.
+    """
+    cfg = replace(defaults, use_voice=False, use_voice_input=False, save_path=None, journal_path=None)
+    for name, (low, high) in CLIENT_LIMITS.items():
+        value = request.get(name)
+        if isinstance(value, int) and not isinstance(value, bool):
+            setattr(cfg, name, min(high, max(low, value)))
+    lang = request.get("lang")
+    if isinstance(lang, str) and 0 < len(lang) <= MAX_LANG_LEN:
+        cfg.lang = lang
+    return cfg
+
+
+@dataclass
+class HostStats:
+    active: int = 0
+    started: int = 0
+    finished: int = 0
+    rejected: int = 0
+    turns: int = 0
+
+
+class HostedSession:
+    __slots__ = ("core", "ws", "timer")
+
+    def __init__(self, core: SessionCore, ws: websocket.WebSocket) -> None:
+        self.core = core
+        self.ws = ws
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SessionHost:
+    """Many independent timed sessions on one event loop.
+
+    - Each WebSocket connection owns one SessionCore; turns are applied
+      as they arrive and the next prompt or deadline is a single loop
+      timer, so an idle session costs a core, a socket and a timer
+      handle, not a task polling for input.
+    - `/save` sends the transcript to the browser instead of writing a
+      file on the host.
+    """
+
+    def __init__(
+        self,
+        defaults: Optional[SessionConfig] = None,
+        max_sessions: int = MAX_SESSIONS,
+        path: str = SESSION_PATH,
+        start_timeout: float = START_TIMEOUT,
+        close_timeout: float = CLOSE_TIMEOUT,
+    ) -> None:
+        self.defaults = defaults or SessionConfig()
+        self.max_sessions = max_sessions
+        self.path = path
+        self.start_timeout = start_timeout
+        self.close_timeout = close_timeout
+        self.stats = HostStats()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port, limit=websocket.MAX_HEADER)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            ws = await websocket.accept(reader, writer, self.path)
+        except websocket.HandshakeError:
+            return
+        if self.stats.active >= self.max_sessions:
+            self.stats.rejected += 1
+            ws.send(_message("error", error="too many sessions, try again later"))
+            ws.send_close(websocket.CLOSE_TRY_AGAIN)
+            await ws.drain()
+            await ws.close()
+            return
+        # Reserve the slot now: connections still sending "start" count too
+        self.stats.active += 1
+        try:
+            request = await self._start_request(ws)
+            if request is None:
+                await ws.close()
+                return
+            await self._run(HostedSession(SessionCore(session_config(self.defaults, request), SocketOutput(ws)), ws))
+        finally:
+            self.stats.active -= 1
+
+    async def _start_request(self, ws: websocket.WebSocket) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await asyncio.wait_for(ws.recv(), self.start_timeout)
+        except asyncio.TimeoutError:
+            return None
+        request = _decode(raw)
+        if request is None or request.get("type") != "start":
+            ws.send(_message("error", error="expected a start message"))
+            return None
+        return request
+
+    async def _run(self, session: HostedSession) -> None:
+        loop = asyncio.get_running_loop()
+        core, ws = session.core, session.ws
+        self.stats.started += 1
+        try:
+            core.begin(loop.time())
+            self._after(session)
+            await ws.drain()
+            while True:
+                raw = await ws.recv()
+                if raw is None:
+                    break
+                if core.done:
+                    continue  # waiting for the close handshake (see _after)
+                message = _decode(raw)
+                text = message.get("text") if message is not None and message.get("type") == "text" else None
+                if not isinstance(text, str):
+                    ws.send(_message("error", error="expected a text message"))
+                    continue
+                self.stats.turns += 1
+                self._turn(session, text, loop.time())
+                self._after(session)
+                await ws.drain()
+        finally:
+            if session.timer is not None:
+                session.timer.cancel()
+            # A browser that went away mid-session; output to it is dropped
+            core.finish()
+            await ws.close()
+            self.stats.finished += 1
+
+    def _turn(self, session: HostedSession, text: str, now: float) -> None:
+        core = session.core
+        is_cmd, cmd = parse_command(text)
+        if is_cmd and cmd is not None and cmd.name == "save" and not core.done:
+            core.out.interrupt()
+            session.ws.send(_message("transcript", lines=core.lines))
+            core.out.say(MSG_SAVED)
+            return
+        core.handle(text, now)
+
+    def _after(self, session: HostedSession) -> None:
+        """Re-arm the session's timer, or close it once the session is over.
+
+        A browser that doesn't answer the close within `close_timeout` is
+        cut off, so it can't keep its slot.
+        """
+        if session.timer is not None:
+            session.timer.cancel()
+            session.timer = None
+        loop = asyncio.get_running_loop()
+        if session.core.done:
+            session.ws.send(_message("end", lines=session.core.lines))
+            session.ws.send_close()
+            session.timer = loop.call_later(self.close_timeout, session.ws.abort)
+            return
+        session.timer = loop.call_at(session.core.next_deadline(), self._tick, session)
+
+    def _tick(self, session: HostedSession) -> None:
+        session.timer = None
+        session.core.tick(asyncio.get_running_loop().time())
+        self._after(session)
+
+
+def _decode(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    if raw is None:
+        return None
+    try:
+        message = json.loads(raw)
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    defaults: Optional[SessionConfig] = None,
+    max_sessions: int = MAX_SESSIONS,
+) -> None:
+    """Serve sessions until cancelled."""
+    session_host = SessionHost(defaults, max_sessions)
+    server = await session_host.start(host, port)
+    names: List[str] = [f"ws://{s.getsockname()[0]}:{s.getsockname()[1]}{SESSION_PATH}" for s in server.sockets]
+    print(f"Session host listening on {', '.join(names)} (max {max_sessions} sessions)")
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import selectors
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from src.lib.eyesfree import parse_command
+from src.lib.session import MSG_ACK, MSG_END, MSG_PROMPT, MSG_START, SessionConfig, SessionCore, _now_iso, drive_session
+
+# Wall-clock time simulated sessions start at (transcript stamps), local time
+EPOCH = time.mktime((2026, 1, 1, 9, 0, 0, 0, 1, -1))
+# Virtual times closer than this are the same instant
+EPS = 1e-6
+
+# (virtual seconds since the start, utterance or command); None ends the input like EOF
+Step = Tuple[float, Optional[str]]
+
+UTTERANCES = (
+    "呼吸がゆっくりになってきた",
+    "肩の力が抜けている",
+    "外で鳥が鳴いている",
+    "the fan is humming",
+    "少し眠い",
+)
+COMMANDS = ("/pause", "/resume", "/skip", "/read", "/stop", "/undo", "/save", "/help", "/nope", "ポーズ", "再開", "スキップ")
+
+
+class VirtualClock:
+    """Simulated time: `now` seconds since the start, `epoch + now` as wall time."""
+
+    def __init__(self, epoch: float = EPOCH) -> None:
+        self.epoch = epoch
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.epoch + self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Never blocks: waiting for the next timer jumps the clock to it instead."""
+
+    def __init__(self, clock: VirtualClock) -> None:
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout: Optional[float] = None):
+        ready = super().select(0)
+        if ready or timeout == 0:
+            return ready
+        if timeout is None:
+            raise RuntimeError("Simulation stalled: nothing scheduled and no input pending.")
+        self.clock.advance(timeout)
+        return ready
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """An event loop whose `time()` is a VirtualClock, so sleeps and timeouts take no real time."""
+
+    def __init__(self, clock: VirtualClock) -> None:
+        super().__init__(_VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self) -> float:
+        return self.clock.now
+
+
+@dataclass(frozen=True)
+class Event:
+    at: float
+    kind: str  # "say", "chime", "interrupt", or "input" for a line the session handled
+    text: str = ""
+
+
+class RecordingOutput:
+    """SessionOutput that logs every call with its virtual time."""
+
+    def __init__(self, clock: VirtualClock, events: List[Event]) -> None:
+        self.clock = clock
+        self.events = events
+
+    def say(self, text: str, wait: bool = False) -> None:
+        self.events.append(Event(self.clock.now, "say", text))
+
+    def chime(self, sound: str = "Glass") -> None:
+        self.events.append(Event(self.clock.now, "chime", sound))
+
+    def interrupt(self) -> None:
+        self.events.append(Event(self.clock.now, "interrupt"))
+
+
+class _RecordingCore(SessionCore):
+    def handle(self, text: str, now: float) -> None:
+        if not self.done and text and text.strip():
+            self.out.events.append(Event(now, "input", text))
+        super().handle(text, now)
+
+
+@dataclass
+class SimResult:
+    events: List[Event]
+    lines: List[str]
+    ended_at: float
+
+    def said(self) -> List[Tuple[float, str]]:
+        return [(e.at, e.text) for e in self.events if e.kind == "say"]
+
+    def prompts(self) -> List[float]:
+        return [e.at for e in self.events if e.kind == "say" and e.text == MSG_PROMPT]
+
+
+def simulate(cfg: SessionConfig, script: Sequence[Step] = (), epoch: float = EPOCH) -> SimResult:
+    """Run `drive_session` on virtual time with scripted input.
+
+    - Each step's text arrives at its virtual time; the session sees it
+      exactly as a typed or recognized line.
+    - An hour-long session takes milliseconds: the loop jumps from one
+      prompt, input or deadline to the next instead of waiting.
+    - Journals and `/save` paths in `cfg` are still written for real.
+    """
+    clock = VirtualClock(epoch)
+    events: List[Event] = []
+    core = _RecordingCore(cfg, RecordingOutput(clock, events), clock=clock)
+    loop = VirtualEventLoop(clock)
+    try:
+        inbox: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        for at, text in script:
+            loop.call_at(at, inbox.put_nowait, text)
+        loop.run_until_complete(drive_session(core, inbox))
+    finally:
+        loop.close()
+    return SimResult(events, core.lines, clock.now)
+
+
+def random_script(rng: random.Random, cfg: SessionConfig, done_rate: float = 0.3) -> List[Step]:
+    """Utterances and commands at random distinct millisecond times, sometimes ending with /done."""
+    end_ms = max(1, cfg.minutes) * 60_000
+    count = rng.randint(0, 3 * max(1, cfg.minutes))
+    times = sorted(rng.sample(range(1, end_ms), count))
+    script: List[Step] = [
+        (ms / 1000, rng.choice(COMMANDS) if rng.random() < 0.35 else rng.choice(UTTERANCES)) for ms in times
+    ]
+    if script and rng.random() < done_rate:
+        cut = rng.randrange(len(script))
+        script[cut] = (script[cut][0], "/done")
+        del script[cut + 1:]
+    return script
+
+
+def check(result: SimResult, cfg: SessionConfig, epoch: float = EPOCH) -> List[str]:
+    """Properties every session must have; returns what was violated.
+
+    - It opens with the start message and a chime and closes with a chime
+      and the end message, at /done (or end of input) or the deadline.
+    - Prompts fire exactly `interval_sec` apart, or right after /skip or
+      /resume, never while paused, and none is missed.
+    - Every utterance is acknowledged at once and lands in the transcript
+      with its virtual wall-clock stamp; /undo removes the last one.
+    """
+    problems: List[str] = []
+    events = result.events
+    if [(e.at, e.kind, e.text) for e in events[:2]] != [(0.0, "say", MSG_START), (0.0, "chime", "Glass")]:
+        problems.append("does not open with the start message and a chime")
+    if [(e.kind, e.text) for e in events[-2:]] != [("chime", "Glass"), ("say", MSG_END)]:
+        problems.append("does not close with a chime and the end message")
+
+    end = float(max(1, cfg.minutes) * 60)
+    paused = False
+    due = 0.0
+    ack_at: Optional[float] = None
+    lines: List[str] = []
+    last = 0.0
+    for e in events:
+        if e.at < last - EPS:
+            problems.append(f"time went backwards at {e.at:.3f}s")
+        last = e.at
+        if not paused and due < min(e.at, result.ended_at) - EPS:
+            problems.append(f"prompt due at {due:.3f}s missing (next event at {e.at:.3f}s)")
+            due = e.at
+        if e.kind == "say":
+            if ack_at is not None and (e.text != MSG_ACK or abs(e.at - ack_at) > EPS):
+                problems.append(f"utterance at {ack_at:.3f}s not acknowledged")
+            ack_at = None
+            if e.text == MSG_PROMPT:
+                if paused:
+                    problems.append(f"prompt at {e.at:.3f}s while paused")
+                elif abs(e.at - due) > EPS:
+                    problems.append(f"prompt at {e.at:.3f}s, expected at {due:.3f}s")
+                due = e.at + cfg.interval_sec
+        elif e.kind == "input":
+            is_cmd, cmd = parse_command(e.text)
+            if not (is_cmd and cmd):
+                lines.append(f"[{_now_iso(epoch + e.at)}] {e.text}")
+                ack_at = e.at
+            elif cmd.name == "pause":
+                paused = True
+            elif cmd.name == "resume":
+                paused = False
+                due = e.at
+            elif cmd.name == "skip":
+                due = e.at
+            elif cmd.name == "undo" and lines:
+                lines.pop()
+            elif cmd.name == "done":
+                end = min(end, e.at)
+    if abs(result.ended_at - end) > EPS:
+        problems.append(f"ended at {result.ended_at:.3f}s, expected {end:.3f}s")
+    if result.lines != lines:
+        problems.append(f"transcript has {len(result.lines)} lines, expected {len(lines)}")
+    return problems
@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+import atexit
+import functools
+import itertools
 import os
-import platform
-import shlex
-import shutil
+import queue
 import subprocess
-from typing import Optional
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from src.lib import capabilities
+from src.lib.cues import get_player
+from src.lib.tracing import span, traced
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# Polled by a backend once its utterance can be stopped: True if `stop`
+# may already have come and gone
+Cancelled = Optional[Callable[[], bool]]
 
 
 def _is_dry_run(dry_run: Optional[bool]) -> bool:
@@ -15,13 +32,469 @@ def _is_dry_run(dry_run: Optional[bool]) -> bool:
 
 
 def is_mac() -> bool:
-    return platform.system().lower() == "darwin"
+    return capabilities.get().is_mac
+
+
+def _say_command(text: str, voice: Optional[str], rate: Optional[int]) -> List[str]:
+    cmd = ["say"]
+    if voice:
+        cmd += ["-v", voice]
+    if rate:
+        cmd += ["-r", str(rate)]
+    cmd += [text]
+    return cmd
+
+
+class SpeechBackend(Protocol):
+    """What the engine needs from a synthesizer.
+
+    `speak` blocks until the utterance finished or `stop` was called from
+    another thread. A `stop` that arrives before playback could be
+    interrupted is caught by checking `cancelled()` right after that
+    point, so it is never lost. A backend may also offer `prepare(text, voice, rate)`,
+    which the engine calls for the next queued utterance while the
+    current one plays (render-ahead).
+    """
+
+    name: str
+
+    def available(self) -> bool: ...
+
+    def speak(
+        self, text: str, voice: Optional[str], rate: Optional[int], cancelled: Cancelled = None
+    ) -> bool: ...
+
+    def stop(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class NullBackend:
+    """Backend used when no synthesizer exists on this platform."""
+
+    name = "none"
+
+    def available(self) -> bool:
+        return False
+
+    def speak(
+        self, text: str, voice: Optional[str], rate: Optional[int], cancelled: Cancelled = None
+    ) -> bool:
+        return False
+
+    def stop(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SayBackend:
+    """macOS `say`, one child per utterance so it can be interrupted."""
+
+    name = "say"
+
+    def __init__(self) -> None:
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return capabilities.get().say is not None
+
+    def speak(
+        self, text: str, voice: Optional[str], rate: Optional[int], cancelled: Cancelled = None
+    ) -> bool:
+        try:
+            proc = subprocess.Popen(
+                _say_command(text, voice, rate), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except Exception:
+            return False
+        with self._lock:
+            self._proc = proc
+        if cancelled is not None and cancelled():
+            proc.terminate()
+        proc.wait()
+        with self._lock:
+            self._proc = None
+        return proc.returncode == 0
+
+    def stop(self) -> None:
+        with self._lock:
+            proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        self.stop()
+
+
+class NSSpeechBackend:
+    """Resident macOS synthesizer through PyObjC (no process per utterance)."""
+
+    name = "nsspeech"
+
+    def __init__(self) -> None:
+        self._synth = None
+        self._voices: dict = {}
+        self._stopped = threading.Event()
+
+    def available(self) -> bool:
+        return capabilities.get().appkit
+
+    def _synthesizer(self):
+        if self._synth is None:
+            from AppKit import NSSpeechSynthesizer  # type: ignore
+
+            self._synth = NSSpeechSynthesizer.alloc().initWithVoice_(None)
+            for ident in NSSpeechSynthesizer.availableVoices():
+                attrs = NSSpeechSynthesizer.attributesForVoice_(ident)
+                self._voices[str(attrs["VoiceName"]).lower()] = ident
+        return self._synth
+
+    def speak(
+        self, text: str, voice: Optional[str], rate: Optional[int], cancelled: Cancelled = None
+    ) -> bool:
+        try:
+            synth = self._synthesizer()
+            if voice and voice.lower() in self._voices:
+                synth.setVoice_(self._voices[voice.lower()])
+            if rate:
+                synth.setRate_(float(rate))
+            self._stopped.clear()
+            if cancelled is not None and cancelled():
+                return False
+            if not synth.startSpeakingString_(text):
+                return False
+            while synth.isSpeaking():
+                if self._stopped.wait(0.02):
+                    break
+            return not self._stopped.is_set()
+        except Exception:
+            return False
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._synth is not None:
+            try:
+                self._synth.stopSpeaking()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        self.stop()
+
+
+class FakeBackend:
+    """In-memory backend for tests and dry runs on any platform.
+
+    Every utterance is recorded in `spoken` as (text, voice, rate). With
+    `seconds_per_char` set, `speak` takes that long per character unless stopped.
+    """
+
+    name = "fake"
+
+    def __init__(self, seconds_per_char: float = 0.0) -> None:
+        self.seconds_per_char = seconds_per_char
+        self.spoken: List[Tuple[str, Optional[str], Optional[int]]] = []
+        self.stopped = 0
+        self._stop = threading.Event()
+
+    def available(self) -> bool:
+        return True
+
+    def speak(
+        self, text: str, voice: Optional[str], rate: Optional[int], cancelled: Cancelled = None
+    ) -> bool:
+        self._stop.clear()
+        if cancelled is not None and cancelled():
+            return False
+        self.spoken.append((text, voice, rate))
+        if self.seconds_per_char > 0 and self._stop.wait(self.seconds_per_char * len(text)):
+            return False
+        return True
+
+    def stop(self) -> None:
+        self.stopped += 1
+        self._stop.set()
+
+    def close(self) -> None:
+        self.stop()
+
+
+_BACKENDS = {
+    "none": NullBackend,
+    "say": SayBackend,
+    "nsspeech": NSSpeechBackend,
+    "fake": FakeBackend,
+}
+
+
+def default_backend() -> SpeechBackend:
+    """Pick a backend: SPEECH_BACKEND if set, else the best one available."""
+    name = os.getenv("SPEECH_BACKEND", "").lower().strip()
+    if name:
+        factory = _BACKENDS.get(name, NullBackend)
+        return factory()
+    for factory in (NSSpeechBackend, SayBackend):
+        backend = factory()
+        if backend.available():
+            from src.lib.tts_cache import cached_backend
+
+            return cached_backend(backend) or backend
+    return NullBackend()
+
+
+@dataclass(order=True)
+class Utterance:
+    priority: int
+    seq: int
+    text: str = field(compare=False)
+    voice: Optional[str] = field(default=None, compare=False)
+    rate: Optional[int] = field(default=None, compare=False)
+    generation: int = field(default=0, compare=False)
+    spoken: Optional[bool] = field(default=None, compare=False)
+    done: threading.Event = field(default_factory=threading.Event, compare=False, repr=False)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the utterance was spoken, dropped or interrupted."""
+        self.done.wait(timeout)
+        return bool(self.spoken)
 
 
-def speak(text: str, voice: Optional[str] = None, rate: Optional[int] = None, *, enabled: bool = True, dry_run: Optional[bool] = None) -> bool:
-    """Speak the given text.
+_STOP_PRIORITY = 1 << 30
 
-    macOS: uses `say` if available. Others: no-op (returns False) unless dry run.
+
+class SpeechEngine:
+    """Queue utterances and speak them from one background worker thread.
+
+    - `say` enqueues and returns immediately; lower priority values go first.
+    - `flush` drops everything queued and interrupts the current utterance
+      (barge-in when the user starts talking or finishes the session).
+    - The backend object lives as long as the engine, so resident
+      synthesizers are set up once.
+    - While one utterance plays, the next queued one is handed to the
+      backend's `prepare` hook (if any) on a helper thread, so chunked
+      readbacks play back to back instead of render, play, render, play.
+    """
+
+    def __init__(self, backend: Optional[SpeechBackend] = None) -> None:
+        self.backend = backend if backend is not None else default_backend()
+        self._queue: "queue.PriorityQueue[Utterance]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._generation = 0
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._current: Optional[Utterance] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._prefetched = -1
+        self._prefetcher = None
+
+    @property
+    def available(self) -> bool:
+        return self.backend.available()
+
+    @property
+    def speaking(self) -> bool:
+        return self._current is not None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def say(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        rate: Optional[int] = None,
+        *,
+        priority: int = PRIORITY_NORMAL,
+    ) -> Utterance:
+        with self._cond:
+            utt = Utterance(priority, next(self._seq), text, voice, rate, self._generation)
+            if self._closed:
+                utt.spoken = False
+                utt.done.set()
+                return utt
+            self._pending += 1
+            self._ensure_worker()
+        self._queue.put(utt)
+        self._prefetch_next()
+        return utt
+
+    def flush(self) -> int:
+        """Drop queued utterances and interrupt the current one.
+
+        Returns how many utterances were cancelled.
+        """
+        with self._cond:
+            self._generation += 1
+            current = self._current
+        dropped = 0
+        while True:
+            try:
+                utt = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if utt.priority == _STOP_PRIORITY:
+                self._queue.put(utt)
+                break
+            dropped += 1
+            self._finish(utt, False)
+        if current is not None:
+            self.backend.stop()
+            dropped += 1
+        return dropped
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or speaking. False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Speak what is still queued (up to `timeout`), then stop the worker."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(Utterance(_STOP_PRIORITY, next(self._seq), ""))
+            thread.join(timeout)
+            if thread.is_alive():
+                self.flush()
+                thread.join(1.0)
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=False, cancel_futures=True)
+        self.backend.close()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="speech-engine", daemon=True)
+            self._thread.start()
+
+    def _finish(self, utt: Utterance, spoken: bool) -> None:
+        utt.spoken = spoken
+        utt.done.set()
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def _prefetch_next(self) -> None:
+        """Hand the head of the queue to `backend.prepare` while something plays."""
+        prepare = getattr(self.backend, "prepare", None)
+        if prepare is None:
+            return
+        with self._queue.mutex:
+            heap = self._queue.queue
+            nxt = heap[0] if heap else None
+        with self._cond:
+            if self._current is None or nxt is None or nxt.priority == _STOP_PRIORITY:
+                return
+            if nxt.seq == self._prefetched or nxt.generation != self._generation:
+                return
+            self._prefetched = nxt.seq
+            if self._prefetcher is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speech-prepare")
+            prefetcher = self._prefetcher
+        try:
+            prefetcher.submit(self._prepare, prepare, nxt)
+        except RuntimeError:
+            pass  # closing
+
+    def _prepare(self, prepare, utt: Utterance) -> None:
+        if utt.generation != self._generation:
+            return  # flushed while waiting for the helper thread
+        try:
+            with span("tts.prepare"):
+                prepare(utt.text, utt.voice, utt.rate)
+        except Exception:
+            pass
+
+    def _stale(self, utt: Utterance) -> bool:
+        return utt.generation != self._generation
+
+    def _run(self) -> None:
+        while True:
+            utt = self._queue.get()
+            if utt.priority == _STOP_PRIORITY:
+                return
+            with self._cond:
+                stale = utt.generation != self._generation
+                if not stale:
+                    self._current = utt
+            if stale:
+                self._finish(utt, False)
+                continue
+            self._prefetch_next()
+            # A flush between here and the backend's playback starting bumps the generation
+            cancelled = functools.partial(self._stale, utt)
+            try:
+                with span(f"tts.{self.backend.name}"):
+                    ok = self.backend.speak(utt.text, utt.voice, utt.rate, cancelled)
+            except Exception:
+                ok = False
+            with self._cond:
+                self._current = None
+                ok = ok and utt.generation == self._generation
+            self._finish(utt, ok)
+
+
+_engine: Optional[SpeechEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> SpeechEngine:
+    """Return the process-wide engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SpeechEngine()
+        return _engine
+
+
+def set_engine(engine: Optional[SpeechEngine]) -> Optional[SpeechEngine]:
+    """Replace the process-wide engine (e.g. with a FakeBackend one). Returns the old one."""
+    global _engine
+    with _engine_lock:
+        previous, _engine = _engine, engine
+    return previous
+
+
+@atexit.register
+def _shutdown_engine() -> None:
+    engine = _engine
+    if engine is not None:
+        engine.close(timeout=10.0)
+
+
+@traced("speak")
+def speak(
+    text: str,
+    voice: Optional[str] = None,
+    rate: Optional[int] = None,
+    *,
+    enabled: bool = True,
+    dry_run: Optional[bool] = None,
+    priority: int = PRIORITY_NORMAL,
+) -> bool:
+    """Speak the given text and wait until it was spoken.
+
+    Goes through the shared SpeechEngine, so it queues behind pending
+    `speak_async` utterances. macOS: resident synthesizer or `say`.
+    Others: no-op (returns False) unless dry run.
     Returns True if action was performed (or simulated in dry-run).
     """
     if not enabled or not text:
@@ -30,26 +503,90 @@ def speak(text: str, voice: Optional[str] = None, rate: Optional[int] = None, *,
     if _is_dry_run(dry_run):
         return True
 
-    if is_mac() and shutil.which("say"):
-        cmd = ["say"]
-        if voice:
-            cmd += ["-v", voice]
-        if rate:
-            cmd += ["-r", str(rate)]
-        cmd += [text]
-        try:
-            subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        except Exception:
-            return False
-    return False
+    engine = get_engine()
+    if not engine.available:
+        return False
+    return engine.say(text, voice, rate, priority=priority).wait()
+
+
+def speak_async(
+    text: str,
+    voice: Optional[str] = None,
+    rate: Optional[int] = None,
+    *,
+    enabled: bool = True,
+    dry_run: Optional[bool] = None,
+    priority: int = PRIORITY_NORMAL,
+) -> bool:
+    """Queue the text for speaking and return immediately.
+
+    Returns True if the utterance was queued (or simulated in dry-run).
+    """
+    if not enabled or not text:
+        return False
+
+    if _is_dry_run(dry_run):
+        return True
+
+    engine = get_engine()
+    if not engine.available:
+        return False
+    engine.say(text, voice, rate, priority=priority)
+    return True
 
 
+def barge_in() -> int:
+    """Cancel queued and current speech, e.g. when the user starts talking."""
+    engine = _engine
+    if engine is None:
+        return 0
+    return engine.flush()
+
+
+def prewarm(phrases: Iterable[str], voice: Optional[str] = None, rate: Optional[int] = None) -> int:
+    """Render fixed phrases ahead of time if the backend caches audio.
+
+    Returns how many phrases are ready for instant playback.
+    """
+    if _is_dry_run(None):
+        return 0
+    warm = getattr(get_engine().backend, "prewarm", None)
+    if warm is None:
+        return 0
+    try:
+        return warm(list(phrases), voice, rate)
+    except Exception:
+        return 0
+
+
+def cache_stats() -> Optional[Dict[str, int]]:
+    """Hit/miss counters of the audio cache, or None when speech is not cached."""
+    engine = _engine
+    cache = getattr(engine.backend, "cache", None) if engine is not None else None
+    return cache.snapshot() if cache is not None else None
+
+
+def is_speaking() -> bool:
+    """True while speech is playing or queued; used to gate the microphone."""
+    engine = _engine
+    return engine is not None and engine.pending > 0
+
+
+def wait_speech(timeout: Optional[float] = None) -> bool:
+    """Block until queued speech finished, e.g. before opening the microphone."""
+    engine = _engine
+    if engine is None:
+        return True
+    return engine.wait(timeout)
+
+
+@traced("chime")
 def chime(sound: str = "Glass", *, enabled: bool = True, dry_run: Optional[bool] = None) -> bool:
-    """Play a short cue sound.
+    """Play a short cue sound without blocking.
 
-    macOS: plays a system sound via `afplay`.
-    Others: falls back to terminal bell (print("\a")) if not in dry-run.
+    Cues ("Glass", "Pop", "Submarine") are synthesized once in memory and
+    played in-process when an audio module is installed; otherwise through
+    a player binary, or the terminal bell as a last resort.
     Returns True if action was performed (or simulated in dry-run).
     """
     if not enabled:
@@ -58,20 +595,7 @@ def chime(sound: str = "Glass", *, enabled: bool = True, dry_run: Optional[bool]
     if _is_dry_run(dry_run):
         return True
 
-    if is_mac() and shutil.which("afplay"):
-        path = f"/System/Library/Sounds/{sound}.aiff"
-        if not os.path.exists(path):
-            path = "/System/Library/Sounds/Glass.aiff"
-        try:
-            subprocess.run(["afplay", path], check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        except Exception:
-            return False
-    else:
-        try:
-            # Terminal bell as a minimal cue
-            print("\a", end="", flush=True)
-            return True
-        except Exception:
-            return False
-
+    try:
+        return get_player().play(sound)
+    except Exception:
+        return False
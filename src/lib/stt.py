@@ -1,7 +1,34 @@
 from __future__ import annotations
 
+import json
+import math
 import os
-from typing import Optional
+import queue
+import sys
+import threading
+import time
+import wave
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Protocol, Tuple, Union
+
+from src.lib import capabilities
+from src.lib.tracing import get_tracer, span, traced
+
+# Capture: frames are this long, and this much audio before an onset is
+# kept (pre-roll) so the first syllables aren't clipped
+FRAME_MS = 30
+PREROLL_SEC = 0.5
+# Longest phrase before it is cut (a limit for runaway capture, not for speech)
+MAX_PHRASE_SEC = 30.0
+# Trailing silence that ends a phrase: PAUSE_FACTOR x the speaker's average
+# pause (an exponential average with weight PAUSE_ALPHA), clamped to these
+MIN_PAUSE_SEC = 0.3
+MAX_PAUSE_SEC = 1.5
+PAUSE_FACTOR = 1.5
+PAUSE_ALPHA = 0.3
+# Gaps shorter than this are between syllables, not pauses, and don't adapt it
+PAUSE_FLOOR_SEC = 0.15
 
 
 def _dry_text() -> Optional[str]:
@@ -11,41 +38,818 @@ def _dry_text() -> Optional[str]:
 
 
 def has_speech_recognition() -> bool:
-    try:
-        import speech_recognition  # type: ignore
-
-        return True
-    except Exception:
-        return False
+    return capabilities.get().speech_recognition
 
 
-def transcribe_once(lang: str = "ja-JP", timeout: float = 3.0, phrase_time_limit: float = 6.0) -> str:
-    """Capture microphone audio and transcribe once.
+@traced("stt.transcribe_once")
+def transcribe_once(
+    lang: str = "ja-JP",
+    timeout: float = 3.0,
+    phrase_time_limit: float = MAX_PHRASE_SEC,
+    backend: Optional[str] = None,
+) -> str:
+    """Capture one phrase from the microphone and transcribe it.
 
+    - Waits up to `timeout` seconds for speech to start; the phrase ends on
+      the speaker's trailing silence, or after `phrase_time_limit` seconds.
     - Dry run: set STT_DRY_RUN=1 and optionally STT_DRY_RUN_TEXT to bypass audio.
     - If SpeechRecognition is unavailable, returns empty string.
-    - Uses Google recognizer when available; offline engines are optional.
+    - `backend` names a registered STTBackend (default: STT_BACKEND or Google).
     """
     dry = _dry_text()
     if dry is not None:
         return dry
 
     try:
-        import speech_recognition as sr  # type: ignore
+        source = MicrophoneSource(phrase_time_limit=phrase_time_limit)
     except Exception:
         return ""
 
-    r = sr.Recognizer()
     try:
-        with sr.Microphone() as source:
-            r.adjust_for_ambient_noise(source, duration=0.3)
-            audio = r.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+        with span("stt.listen"):
+            source.open()
+            source.calibrate()
+            phrase = source.next_phrase(timeout)
     except Exception:
         return ""
+    finally:
+        source.close()
+    if not isinstance(phrase, AudioSegment):
+        return ""
 
-    # Try Google (online); if it fails, return empty string
     try:
-        return r.recognize_google(audio, language=lang)
+        with span("stt.recognize"):
+            return get_backend(backend).transcribe(phrase, lang).text
     except Exception:
         return ""
 
+
+@dataclass
+class AudioSegment:
+    """One phrase of raw PCM audio; `offset` is seconds from the stream start.
+
+    Captured phrases carry `metrics`; speech starts `metrics.preroll`
+    seconds into `pcm`.
+    """
+
+    pcm: bytes = field(repr=False)
+    sample_rate: int
+    sample_width: int = 2
+    offset: float = 0.0
+    metrics: Optional["CaptureMetrics"] = None
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / float(self.sample_rate * self.sample_width)
+
+
+# A source hands out audio to recognize, or text directly (scripted dry runs)
+Phrase = Union[AudioSegment, str]
+
+
+class PhraseSource(Protocol):
+    """Segments an input stream into phrases.
+
+    `next_phrase` returns None when nothing was said within `timeout` and
+    raises EOFError once the input is exhausted.
+    """
+
+    def open(self) -> None: ...
+
+    def calibrate(self) -> None: ...
+
+    def next_phrase(self, timeout: float) -> Optional[Phrase]: ...
+
+    def close(self) -> None: ...
+
+
+class ScriptedSource:
+    """Yields prepared texts in order, then ends."""
+
+    def __init__(self, texts: List[str]) -> None:
+        self._texts = list(texts)
+
+    def open(self) -> None:
+        pass
+
+    def calibrate(self) -> None:
+        pass
+
+    def next_phrase(self, timeout: float) -> Optional[Phrase]:
+        if not self._texts:
+            raise EOFError
+        return self._texts.pop(0)
+
+    def close(self) -> None:
+        pass
+
+
+def _rms(frame: bytes) -> float:
+    """RMS of 16-bit little-endian samples, read in place on little-endian hosts."""
+    n = len(frame) // 2
+    if not n:
+        return 0.0
+    if sys.byteorder == "little":
+        samples: Union[memoryview, array] = memoryview(frame)[: n * 2].cast("h")
+    else:
+        samples = array("h", frame[: n * 2])
+        samples.byteswap()
+    return math.sqrt(sum(s * s for s in samples) / n)
+
+
+class RingBuffer:
+    """The most recent `capacity` bytes of audio in one preallocated buffer.
+
+    `write` copies into place, so keeping pre-roll costs no allocation per
+    frame; `getvalue` returns the contents oldest first.
+    """
+
+    __slots__ = ("capacity", "_buf", "_pos", "_size")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(0, capacity)
+        self._buf = bytearray(self.capacity)
+        self._pos = 0  # where the next byte goes
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        self._pos = 0
+        self._size = 0
+
+    def write(self, data: bytes) -> None:
+        cap = self.capacity
+        view = memoryview(data)
+        n = len(view)
+        if not cap or not n:
+            return
+        if n >= cap:
+            self._buf[:] = view[n - cap:]
+            self._pos = 0
+            self._size = cap
+            return
+        end = self._pos + n
+        if end <= cap:
+            self._buf[self._pos:end] = view
+        else:
+            first = cap - self._pos
+            self._buf[self._pos:] = view[:first]
+            self._buf[: n - first] = view[first:]
+        self._pos = end % cap
+        self._size = min(cap, self._size + n)
+
+    def getvalue(self) -> bytes:
+        if self._size < self.capacity:
+            # Not wrapped yet: the data is the start of the buffer
+            return bytes(self._buf[: self._size])
+        return bytes(self._buf[self._pos:]) + bytes(self._buf[: self._pos])
+
+
+@dataclass
+class CaptureMetrics:
+    """How a phrase was captured, in seconds of audio."""
+
+    preroll: float = 0.0  # audio kept from before the detected onset
+    clipped_start: bool = False  # no quiet audio before the onset (stream start, or right after a cut): speech was under way
+    end_latency: float = 0.0  # from the end of speech to the endpoint decision
+    trailing_silence: float = 0.0  # the silence that ended the phrase, as adapted so far
+    cut_off: bool = False  # ended at the phrase length limit, not in silence
+
+
+class Endpointer:
+    """Energy endpointing over fixed-size frames of 16-bit mono PCM.
+
+    - Every frame also goes into a RingBuffer of `preroll_sec`; a phrase
+      starts with that pre-roll, so the first syllables after a chime (or
+      just under the threshold) reach the recognizer.
+    - A phrase ends after `trailing` seconds of silence, which follows the
+      speaker: `PAUSE_FACTOR` times the running average of their pauses
+      inside phrases (and of gaps after which they carried on), within
+      [`min_pause_sec`, `max_pause_sec`]. Gaps under `PAUSE_FLOOR_SEC`
+      (between syllables) don't count. Quick answers end sooner and
+      slow, halting speech isn't split; `max_phrase_sec` caps a phrase.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        *,
+        frame_ms: int = FRAME_MS,
+        preroll_sec: float = PREROLL_SEC,
+        pause_sec: float = 0.5,
+        min_pause_sec: float = MIN_PAUSE_SEC,
+        max_pause_sec: float = MAX_PAUSE_SEC,
+        max_phrase_sec: float = MAX_PHRASE_SEC,
+        min_threshold: float = 300.0,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.bytes_per_sec = 2 * sample_rate
+        self.frame_bytes = 2 * max(1, sample_rate * frame_ms // 1000)
+        self.ring = RingBuffer(2 * int(preroll_sec * sample_rate))
+        self.trailing = pause_sec
+        self.min_pause_sec = min_pause_sec
+        self.max_pause_sec = max_pause_sec
+        self.max_phrase_bytes = 2 * max(1, int(max_phrase_sec * sample_rate))
+        self.min_threshold = min_threshold
+        self.threshold = min_threshold
+        self.position = 0  # bytes of stream seen
+        self._phrase: Optional[bytearray] = None
+        self._start = 0  # stream offset of the phrase's first byte
+        self._preroll = 0
+        self._clipped = False
+        self._quiet = 0  # silence right before the current position, outside phrases
+        self._speech_end = 0  # phrase length at the end of its last loud frame
+        self._silent = 0
+        self._pause_avg: Optional[float] = None
+        self._last_end: Optional[int] = None  # stream offset where the previous phrase's speech ended
+
+    @property
+    def in_phrase(self) -> bool:
+        return self._phrase is not None
+
+    def calibrate(self, noise: bytes, consumed: bool = False) -> None:
+        """Set the threshold from background noise.
+
+        With `consumed`, the noise was read off the stream (a microphone)
+        and also becomes the first phrase's pre-roll.
+        """
+        self.threshold = max(self.min_threshold, _rms(noise) * 3)
+        if consumed:
+            self.ring.write(noise)
+            self.position += len(noise)
+            self._quiet += len(noise)
+
+    def push(self, frame: bytes) -> Optional[AudioSegment]:
+        """Feed one frame; returns a phrase once its end is detected."""
+        loud = _rms(frame) >= self.threshold
+        segment = None
+        phrase = self._phrase
+        if phrase is None:
+            if loud:
+                self._begin(frame)
+            else:
+                self._quiet += len(frame)
+        else:
+            phrase += frame
+            if loud:
+                if self._silent:
+                    self._observe_pause(self._silent)
+                self._silent = 0
+                self._speech_end = len(phrase)
+            else:
+                self._silent += len(frame)
+            if self._silent >= self.trailing * self.bytes_per_sec:
+                segment = self._end(cut_off=False)
+            elif len(phrase) >= self.max_phrase_bytes:
+                segment = self._end(cut_off=True)
+        self.ring.write(frame)
+        self.position += len(frame)
+        return segment
+
+    def flush(self) -> Optional[AudioSegment]:
+        """The phrase still open at the end of the stream, if any."""
+        return self._end(cut_off=False) if self._phrase is not None else None
+
+    def _begin(self, frame: bytes) -> None:
+        preroll = self.ring.getvalue()
+        if self._last_end is not None:
+            gap = self.position - self._last_end
+            if gap < self.max_pause_sec * self.bytes_per_sec:
+                # They carried on soon after the endpoint: it came too early
+                self._observe_pause(gap)
+        self._clipped = self._quiet == 0
+        self._quiet = 0
+        self._phrase = bytearray(preroll)
+        self._phrase += frame
+        self._start = self.position - len(preroll)
+        self._preroll = len(preroll)
+        self._speech_end = len(self._phrase)
+        self._silent = 0
+
+    def _observe_pause(self, nbytes: int) -> None:
+        pause = nbytes / self.bytes_per_sec
+        if pause < PAUSE_FLOOR_SEC:
+            return
+        avg = pause if self._pause_avg is None else self._pause_avg + PAUSE_ALPHA * (pause - self._pause_avg)
+        self._pause_avg = avg
+        self.trailing = min(self.max_pause_sec, max(self.min_pause_sec, PAUSE_FACTOR * avg))
+
+    def _end(self, cut_off: bool) -> AudioSegment:
+        phrase = self._phrase
+        assert phrase is not None
+        end = len(phrase) if cut_off else self._speech_end
+        metrics = CaptureMetrics(
+            preroll=self._preroll / self.bytes_per_sec,
+            clipped_start=self._clipped,
+            end_latency=(len(phrase) - self._speech_end) / self.bytes_per_sec,
+            trailing_silence=self.trailing,
+            cut_off=cut_off,
+        )
+        segment = AudioSegment(bytes(phrase[:end]), self.sample_rate, 2, self._start / self.bytes_per_sec, metrics)
+        # A phrase cut at the limit says nothing about the speaker's pauses
+        self._last_end = None if cut_off else self._start + self._speech_end
+        # The trailing silence is what precedes the next onset
+        self._quiet = 0 if cut_off else self._silent
+        self._phrase = None
+        self._silent = 0
+        return segment
+
+
+class WavFileSource:
+    """Energy-based phrase segmentation over a 16-bit mono WAV file (see Endpointer)."""
+
+    def __init__(
+        self,
+        path: str,
+        frame_ms: int = FRAME_MS,
+        pause_sec: float = 0.5,
+        calibration_sec: float = 0.3,
+        min_threshold: float = 300.0,
+        preroll_sec: float = PREROLL_SEC,
+        max_phrase_sec: float = MAX_PHRASE_SEC,
+    ) -> None:
+        self.path = path
+        self.frame_ms = frame_ms
+        self.pause_sec = pause_sec
+        self.calibration_sec = calibration_sec
+        self.min_threshold = min_threshold
+        self.preroll_sec = preroll_sec
+        self.max_phrase_sec = max_phrase_sec
+        self.endpointer: Optional[Endpointer] = None
+        self._wav: Optional[wave.Wave_read] = None
+
+    def open(self) -> None:
+        self._wav = wave.open(self.path, "rb")
+        if self._wav.getsampwidth() != 2 or self._wav.getnchannels() != 1:
+            raise ValueError(f"{self.path}: expected 16-bit mono WAV")
+        self.sample_rate = self._wav.getframerate()
+        self.endpointer = Endpointer(
+            self.sample_rate,
+            frame_ms=self.frame_ms,
+            preroll_sec=self.preroll_sec,
+            pause_sec=self.pause_sec,
+            max_phrase_sec=self.max_phrase_sec,
+            min_threshold=self.min_threshold,
+        )
+
+    def calibrate(self) -> None:
+        assert self._wav is not None and self.endpointer is not None
+        pos = self._wav.tell()
+        self._wav.setpos(0)
+        self.endpointer.calibrate(self._wav.readframes(int(self.calibration_sec * self.sample_rate)))
+        self._wav.setpos(pos)
+
+    def next_phrase(self, timeout: float) -> Optional[Phrase]:
+        assert self._wav is not None and self.endpointer is not None
+        ep = self.endpointer
+        samples = ep.frame_bytes // 2
+        while True:
+            frame = self._wav.readframes(samples)
+            if not frame:
+                segment = ep.flush()
+                if segment is None:
+                    raise EOFError
+                return segment
+            segment = ep.push(frame)
+            if segment is not None:
+                return segment
+
+    def close(self) -> None:
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class MicrophoneSource:
+    """The default microphone, read frame by frame and endpointed here.
+
+    - Opened once for the listener's lifetime; SpeechRecognition only
+      provides the PyAudio stream.
+    - The stream is read continuously through an Endpointer, so speech
+      that starts right after the chime is already in the pre-roll and a
+      phrase ends on the speaker's own trailing silence.
+    """
+
+    def __init__(
+        self,
+        phrase_time_limit: Optional[float] = MAX_PHRASE_SEC,
+        calibration_sec: float = 0.3,
+        preroll_sec: float = PREROLL_SEC,
+    ) -> None:
+        import speech_recognition as sr  # type: ignore
+
+        self._sr = sr
+        self.phrase_time_limit = phrase_time_limit
+        self.calibration_sec = calibration_sec
+        self.preroll_sec = preroll_sec
+        self.endpointer: Optional[Endpointer] = None
+        self._mic = None
+        self._source = None
+
+    def open(self) -> None:
+        self._mic = self._sr.Microphone()
+        self._source = self._mic.__enter__()
+        if self._source.SAMPLE_WIDTH != 2:
+            raise ValueError("expected 16-bit microphone audio")
+        self.sample_rate = self._source.SAMPLE_RATE
+        self.endpointer = Endpointer(
+            self.sample_rate,
+            preroll_sec=self.preroll_sec,
+            max_phrase_sec=self.phrase_time_limit or MAX_PHRASE_SEC,
+        )
+
+    def _read(self) -> bytes:
+        assert self._source is not None and self.endpointer is not None
+        return self._source.stream.read(self.endpointer.frame_bytes // 2)
+
+    def calibrate(self) -> None:
+        assert self.endpointer is not None
+        frames = max(1, int(self.calibration_sec * self.endpointer.bytes_per_sec / self.endpointer.frame_bytes))
+        self.endpointer.calibrate(b"".join(self._read() for _ in range(frames)), consumed=True)
+
+    def next_phrase(self, timeout: float) -> Optional[Phrase]:
+        assert self.endpointer is not None
+        ep = self.endpointer
+        waited = 0.0
+        while True:
+            frame = self._read()
+            segment = ep.push(frame)
+            if segment is not None:
+                return segment
+            if not ep.in_phrase:
+                waited += len(frame) / ep.bytes_per_sec
+                if waited >= timeout:
+                    return None
+
+    def close(self) -> None:
+        if self._mic is not None:
+            self._mic.__exit__(None, None, None)
+            self._mic = None
+
+
+@dataclass
+class Transcript:
+    text: str
+    confidence: Optional[float] = None
+
+
+class STTBackend(Protocol):
+    """A speech-to-text engine.
+
+    `load` does the expensive setup (models, clients) and is called once
+    per process by `get_backend`; `transcribe` must not raise for bad audio
+    and returns an empty Transcript instead.
+    """
+
+    name: str
+
+    def load(self) -> None: ...
+
+    def transcribe(self, segment: AudioSegment, lang: str) -> Transcript: ...
+
+
+class GoogleBackend:
+    """Google Web Speech through SpeechRecognition (online)."""
+
+    name = "google"
+
+    def load(self) -> None:
+        import speech_recognition as sr  # type: ignore
+
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def transcribe(self, segment: AudioSegment, lang: str) -> Transcript:
+        audio = self._sr.AudioData(segment.pcm, segment.sample_rate, segment.sample_width)
+        try:
+            result = self._recognizer.recognize_google(audio, language=lang, show_all=True)
+        except Exception:
+            return Transcript("")
+        alternatives = result.get("alternative") if isinstance(result, dict) else None
+        if not alternatives:
+            return Transcript("")
+        best = alternatives[0]
+        return Transcript(best.get("transcript", ""), best.get("confidence"))
+
+
+class VoskBackend:
+    """Offline Kaldi models through `vosk`; VOSK_MODEL points at the model directory."""
+
+    name = "vosk"
+
+    def load(self) -> None:
+        import vosk  # type: ignore
+
+        path = os.getenv("VOSK_MODEL")
+        if not path:
+            raise RuntimeError("set VOSK_MODEL to an unpacked Vosk model directory")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self._model = vosk.Model(path)
+
+    def transcribe(self, segment: AudioSegment, lang: str) -> Transcript:
+        try:
+            rec = self._vosk.KaldiRecognizer(self._model, segment.sample_rate)
+            rec.SetWords(True)
+            rec.AcceptWaveform(segment.pcm)
+            result = json.loads(rec.FinalResult())
+        except Exception:
+            return Transcript("")
+        words = result.get("result") or []
+        confidence = sum(w.get("conf", 0.0) for w in words) / len(words) if words else None
+        # Japanese models emit space-separated tokens
+        text = result.get("text", "")
+        if lang.lower().startswith(("ja", "zh")):
+            text = text.replace(" ", "")
+        return Transcript(text, confidence)
+
+
+class WhisperBackend:
+    """Offline Whisper through `faster-whisper`; WHISPER_MODEL picks the size (default "small")."""
+
+    name = "whisper"
+
+    def load(self) -> None:
+        import numpy as np  # type: ignore
+        from faster_whisper import WhisperModel  # type: ignore
+
+        self._np = np
+        size = os.getenv("WHISPER_MODEL", "small")
+        self._model = WhisperModel(size, device="cpu", compute_type="int8")
+
+    def transcribe(self, segment: AudioSegment, lang: str) -> Transcript:
+        np = self._np
+        if segment.sample_width != 2:
+            return Transcript("")
+        audio = np.frombuffer(segment.pcm, dtype="<i2").astype(np.float32) / 32768.0
+        if segment.sample_rate != 16000 and len(audio):
+            # Whisper expects 16 kHz; linear resampling is enough for speech
+            n = int(len(audio) * 16000 / segment.sample_rate)
+            audio = np.interp(np.linspace(0, len(audio) - 1, n), np.arange(len(audio)), audio)
+            audio = audio.astype(np.float32)
+        try:
+            parts, _ = self._model.transcribe(audio, language=lang.split("-")[0].lower(), beam_size=1)
+            parts = list(parts)
+        except Exception:
+            return Transcript("")
+        if not parts:
+            return Transcript("")
+        logprob = sum(p.avg_logprob for p in parts) / len(parts)
+        return Transcript("".join(p.text for p in parts).strip(), math.exp(logprob))
+
+
+class ScriptedBackend:
+    """Returns prepared texts for successive segments (dry runs over WAV files)."""
+
+    name = "scripted"
+
+    def __init__(self, texts: Optional[List[str]] = None, default: str = "") -> None:
+        self._texts = list(texts or [])
+        self.default = default
+        self.segments: List[AudioSegment] = []
+
+    def load(self) -> None:
+        pass
+
+    def transcribe(self, segment: AudioSegment, lang: str) -> Transcript:
+        self.segments.append(segment)
+        return Transcript(self._texts.pop(0) if self._texts else self.default, 1.0)
+
+
+_REGISTRY: Dict[str, Callable[[], STTBackend]] = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "whisper": WhisperBackend,
+}
+_LOADED: Dict[str, STTBackend] = {}
+_registry_lock = threading.Lock()
+
+DEFAULT_BACKEND = "google"
+
+
+def register_backend(name: str, factory: Callable[[], STTBackend]) -> None:
+    """Add or replace a backend; the next `get_backend(name)` loads it."""
+    with _registry_lock:
+        _REGISTRY[name] = factory
+        _LOADED.pop(name, None)
+
+
+def backend_names() -> List[str]:
+    return sorted(_REGISTRY)
+
+
+def resolve_backend(name: Optional[str] = None) -> Tuple[str, Callable[[], STTBackend]]:
+    """The name `get_backend(name)` would load (default: STT_BACKEND or "google") and its factory.
+
+    Raises KeyError for unknown names.
+    """
+    name = name or os.getenv("STT_BACKEND") or DEFAULT_BACKEND
+    with _registry_lock:
+        return name, _REGISTRY[name]
+
+
+def get_backend(name: Optional[str] = None) -> STTBackend:
+    """Loaded backend by name (default: STT_BACKEND or "google"), kept resident.
+
+    Raises KeyError for unknown names and RuntimeError when the engine
+    cannot be loaded (missing package or model).
+    """
+    name = name or os.getenv("STT_BACKEND") or DEFAULT_BACKEND
+    with _registry_lock:
+        backend = _LOADED.get(name)
+        if backend is not None:
+            return backend
+        factory = _REGISTRY[name]
+        backend = factory()
+        try:
+            backend.load()
+        except Exception as e:
+            raise RuntimeError(f"STT backend {name!r} unavailable: {e}") from e
+        _LOADED[name] = backend
+        return backend
+
+
+_END = object()
+
+
+class StreamingListener:
+    """Continuous capture on a background thread, phrases out through a queue.
+
+    - The source is opened and calibrated once, then recalibrated after
+      `recalibrate_sec` whenever it is idle.
+    - Capture and recognition run on separate threads, so speech keeps
+      being captured while the previous phrase is recognized.
+    - `gate()` returning True drops captured audio (e.g. while our own TTS
+      is playing); `on_phrase` fires as soon as a phrase was captured.
+    - Captured phrases are counted (`phrases`, `clipped_starts`), and each
+      one's end-of-speech latency goes to the `stt.end_of_speech` stage
+      of `--profile`.
+    """
+
+    def __init__(
+        self,
+        source: PhraseSource,
+        backend: Optional[STTBackend] = None,
+        lang: str = "ja-JP",
+        *,
+        recalibrate_sec: float = 120.0,
+        gate: Optional[Callable[[], bool]] = None,
+        on_phrase: Optional[Callable[[], None]] = None,
+        poll_sec: float = 1.0,
+    ) -> None:
+        self.source = source
+        self.backend = backend
+        self.lang = lang
+        self.recalibrate_sec = recalibrate_sec
+        self.gate = gate
+        self.on_phrase = on_phrase
+        self.poll_sec = poll_sec
+        self.exhausted = False
+        self.error: Optional[BaseException] = None
+        self.phrases = 0
+        self.clipped_starts = 0
+        self._audio: "queue.Queue[object]" = queue.Queue()
+        self._text: "queue.Queue[object]" = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "StreamingListener":
+        if not self._threads:
+            for target, name in ((self._capture, "stt-capture"), (self._recognize, "stt-recognize")):
+                thread = threading.Thread(target=target, name=name, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next recognized phrase; None on timeout or once the source ended."""
+        if self.exhausted:
+            return None
+        try:
+            item = self._text.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item is _END:
+            self.exhausted = True
+            return None
+        return item  # type: ignore[return-value]
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            text = self.get()
+            if text is None:
+                return
+            yield text
+
+    def __enter__(self) -> "StreamingListener":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _capture(self) -> None:
+        try:
+            with span("stt.mic_setup"):
+                self.source.open()
+                self.source.calibrate()
+            calibrated_at = time.monotonic()
+            while not self._stop.is_set():
+                phrase = self.source.next_phrase(self.poll_sec)
+                if phrase is None:
+                    if time.monotonic() - calibrated_at >= self.recalibrate_sec:
+                        self.source.calibrate()
+                        calibrated_at = time.monotonic()
+                    continue
+                if self.gate is not None and self.gate():
+                    continue
+                if isinstance(phrase, AudioSegment) and phrase.metrics is not None:
+                    self._record(phrase.metrics)
+                if self.on_phrase is not None:
+                    self.on_phrase()
+                self._audio.put(phrase)
+        except EOFError:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            try:
+                self.source.close()
+            except Exception:
+                pass
+            self._audio.put(_END)
+
+    def _record(self, metrics: CaptureMetrics) -> None:
+        self.phrases += 1
+        if metrics.clipped_start:
+            self.clipped_starts += 1
+        tracer = get_tracer()
+        if tracer is not None:
+            tracer.record("stt.end_of_speech", 0, int(metrics.end_latency * 1e9))
+
+    def _recognize(self) -> None:
+        while True:
+            item = self._audio.get()
+            if item is _END:
+                self._text.put(_END)
+                return
+            if isinstance(item, str):
+                text = item
+            else:
+                try:
+                    if self.backend is None:
+                        self.backend = get_backend()
+                    with span("stt.recognize"):
+                        text = self.backend.transcribe(item, self.lang).text  # type: ignore[arg-type]
+                except Exception:
+                    text = ""
+            if text and text.strip():
+                self._text.put(text)
+
+
+def _dry_script() -> List[str]:
+    script = os.getenv("STT_DRY_RUN_SCRIPT")
+    if script is not None:
+        return [s for s in script.split("|") if s.strip()]
+    text = os.getenv("STT_DRY_RUN_TEXT", "")
+    return [text] if text else []
+
+
+def open_listener(
+    lang: str = "ja-JP",
+    *,
+    backend: Optional[str] = None,
+    gate: Optional[Callable[[], bool]] = None,
+    on_phrase: Optional[Callable[[], None]] = None,
+) -> Optional[StreamingListener]:
+    """Start a listener for the current environment; None without a mic stack.
+
+    - Dry run (STT_DRY_RUN=1): STT_DRY_RUN_WAV=<file> segments that file and
+      recognizes segments from STT_DRY_RUN_SCRIPT ("one|two|/done");
+      without a WAV the script (or STT_DRY_RUN_TEXT) is yielded directly.
+    - Otherwise the default microphone with the named backend, loaded once.
+    """
+    engine: Optional[STTBackend] = None
+    if _dry_text() is not None:
+        wav = os.getenv("STT_DRY_RUN_WAV")
+        if wav:
+            source: PhraseSource = WavFileSource(wav)
+            engine = ScriptedBackend(_dry_script())
+        else:
+            source = ScriptedSource(_dry_script())
+    else:
+        if not capabilities.get().microphone:
+            return None
+        try:
+            source = MicrophoneSource()
+            engine = get_backend(backend)
+        except Exception:
+            return None
+    listener = StreamingListener(source, engine, lang, gate=gate, on_phrase=on_phrase)
+    return listener.start()
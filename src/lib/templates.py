@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+# Template syntax (rendered output is always stripped):
+#   {title|'Untitled':strip}  first truthy of data["title"] or the literal, then filters
+#   {seed}                    str(data["seed"]).strip(), the mode-independent fallback text
+#   {[ @ {bpm} BPM]}          optional section, dropped unless every field in it is truthy
+#   {{ and }}                 literal braces
+BUILTIN_TEMPLATES: Dict[str, str] = {
+    "diary": "[Diary]\nTitle: {title|'Untitled':strip}\n{body|seed|''}",
+    "music": "Music: {genre|'ambient':strip}{[ @ {bpm} BPM]}\nMood: {mood|seed|'calm':strip}",
+    "image": "Image: {subject|seed|'a scene':strip}\nStyle: {style|'photorealistic':strip}",
+}
+
+TEMPLATE_SUFFIX = ".tmpl"
+ENTRY_POINT_GROUP = "xxx.prompt_templates"
+CACHE_SIZE = 1024
+# Characters per chunk when a renderer streams its output
+STREAM_CHUNK_CHARS = 64 * 1024
+
+_FILTERS = {"strip": ".strip()", "lower": ".lower()", "upper": ".upper()"}
+
+Renderer = Callable[[Dict], str]
+
+
+class TemplateError(ValueError):
+    pass
+
+
+@dataclass
+class _Field:
+    names: List[str]
+    default: Optional[str] = None
+    filters: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Section:
+    parts: List[Union[str, _Field]]
+
+
+def _parse_field(expr: str, source: str) -> _Field:
+    body, _, filters = expr.partition(":")
+    out = _Field([], None, [f.strip() for f in filters.split(":") if f.strip()] if filters else [])
+    for alt in body.split("|"):
+        alt = alt.strip()
+        if len(alt) >= 2 and alt[0] == alt[-1] and alt[0] in "'\"":
+            out.default = alt[1:-1]
+        elif alt.isidentifier() and out.default is None:
+            out.names.append(alt)
+        else:
+            raise TemplateError(f"bad field {{{expr}}} in {source!r}")
+    for name in out.filters:
+        if name not in _FILTERS:
+            raise TemplateError(f"unknown filter {name!r} in {source!r}")
+    if not out.names and out.default is None:
+        raise TemplateError(f"empty field in {source!r}")
+    return out
+
+
+def _parse(source: str, pos: int = 0, section: bool = False) -> Tuple[List[Union[str, _Field, _Section]], int]:
+    parts: List[Union[str, _Field, _Section]] = []
+    text: List[str] = []
+    while pos < len(source):
+        if source.startswith("{{", pos) or source.startswith("}}", pos):
+            text.append(source[pos])
+            pos += 2
+        elif section and source.startswith("]}", pos):
+            break
+        elif source.startswith("{[", pos):
+            if section:
+                raise TemplateError(f"nested optional section in {source!r}")
+            inner, pos = _parse(source, pos + 2, section=True)
+            if not source.startswith("]}", pos):
+                raise TemplateError(f"unclosed optional section in {source!r}")
+            pos += 2
+            parts.append("".join(text))
+            text = []
+            parts.append(_Section(inner))  # type: ignore[arg-type]
+        elif source[pos] == "{":
+            end = source.find("}", pos)
+            if end < 0:
+                raise TemplateError(f"unclosed field in {source!r}")
+            parts.append("".join(text))
+            text = []
+            parts.append(_parse_field(source[pos + 1:end], source))
+            pos = end + 1
+        elif source[pos] == "}":
+            raise TemplateError(f"stray '}}' in {source!r}")
+        else:
+            text.append(source[pos])
+            pos += 1
+    parts.append("".join(text))
+    return [p for p in parts if p != ""], pos
+
+
+def compile_template(source: str, name: str = "<template>") -> Renderer:
+    """Compile template `source` into a plain Python function of `data`.
+
+    Each field becomes one local (`data.get(a) or data.get(b) or 'default'`)
+    and the output a single concatenation, so rendering does no parsing.
+    """
+    parts, _ = _parse(source)
+    body: List[str] = []
+    uses_seed = False
+    locals_: Dict[int, str] = {}
+
+    def value(f: _Field) -> str:
+        nonlocal uses_seed
+        if id(f) in locals_:
+            return locals_[id(f)]
+        alts = []
+        for n in f.names:
+            if n == "seed":
+                uses_seed = True
+                alts.append("seed")
+            else:
+                alts.append(f"data.get({n!r})")
+        if f.default is not None:
+            alts.append(repr(f.default))
+        expr = " or ".join(alts)
+        if f.filters:
+            expr = f"({expr})" + "".join(_FILTERS[x] for x in f.filters)
+        var = f"_v{len(locals_)}"
+        body.append(f"    {var} = {expr}")
+        locals_[id(f)] = var
+        return var
+
+    def text(f: _Field) -> str:
+        var = value(f)
+        # Filtered values are already str; the rest format like an f-string
+        return var if f.filters else f"format({var}, '')"
+
+    def concat(items: Iterable[Union[str, _Field]]) -> str:
+        pieces = [repr(p) if isinstance(p, str) else text(p) for p in items]
+        return " + ".join(pieces) or "''"
+
+    pieces: List[str] = []
+    for part in parts:
+        if isinstance(part, _Section):
+            fields = [p for p in part.parts if isinstance(p, _Field)]
+            inner = concat(part.parts)
+            cond = " and ".join(value(f) for f in fields) or "True"
+            pieces.append(f"(({inner}) if {cond} else '')")
+        elif isinstance(part, _Field):
+            pieces.append(text(part))
+        else:
+            pieces.append(repr(part))
+    if uses_seed:
+        body.insert(0, "    seed = str(data.get('seed', '')).strip()")
+    code = "def render(data):\n" + "\n".join(body + [f"    return ({' + '.join(pieces) or repr('')}).strip()"])
+    namespace: Dict = {}
+    exec(compile(code, f"<template {name}>", "exec"), namespace)
+    render = namespace["render"]
+    render.source = source
+    return render
+
+
+def _render_chat(data: Dict) -> str:
+    lines = data.get("lines", [])
+    if lines:
+        return "\n".join(s.strip() for s in lines if s is not None)
+    return str(data.get("seed", "")).strip()
+
+
+def _stream_chat(data: Dict) -> Iterator[str]:
+    """`_render_chat` in chunks; `lines` may be any iterable, read once."""
+    lines = data.get("lines", [])
+    if not lines:
+        yield str(data.get("seed", "")).strip()
+        return
+    parts: List[str] = []
+    size = 0
+    sep = ""
+    for s in lines:
+        if s is None:
+            continue
+        s = s.strip()
+        parts.append(sep)
+        parts.append(s)
+        sep = "\n"
+        size += len(s) + 1
+        if size >= STREAM_CHUNK_CHARS:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+_render_chat.stream = _stream_chat  # type: ignore[attr-defined]
+
+
+def _render_fallback(data: Dict) -> str:
+    return str(data.get("seed", "")).strip()
+
+
+def _cache_key(mode: str, data: Dict) -> Optional[Hashable]:
+    try:
+        # Types are part of the key: 1 and True hash alike but render differently
+        key = (mode, frozenset((k, v.__class__, v) for k, v in data.items()))
+        hash(key)
+        return key
+    except TypeError:
+        return None  # lists and dicts (chat lines) aren't memoized
+
+
+class TemplateRegistry:
+    """Mode name -> compiled render function, with an LRU of rendered output
+    for renderers registered as cacheable.
+
+    - Built-ins are registered up front; `.tmpl` files from
+      `PROMPT_TEMPLATES_DIR` and `xxx.prompt_templates` entry points are
+      loaded on first use and may override them.
+    - Unknown modes render the seed.
+    """
+
+    def __init__(self, cache_size: int = CACHE_SIZE) -> None:
+        self._renderers: Dict[str, Renderer] = {}
+        self._cached: Set[str] = set()
+        self._cache: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._plugins_loaded = False
+
+    def register(self, mode: str, template: Union[str, Renderer], cache: Optional[bool] = None) -> None:
+        """Add or replace `mode`; a string is compiled, a callable used as is.
+
+        Output is memoized only with `cache` (default: the callable's
+        `cacheable` attribute). Compiled templates render faster than a
+        cache lookup costs, so this is for slow, pure renderers.
+        """
+        mode = mode.lower().strip()
+        render = compile_template(template, mode) if isinstance(template, str) else template
+        if cache is None:
+            cache = bool(getattr(render, "cacheable", False))
+        with self._lock:
+            self._renderers[mode] = render
+            if cache:
+                self._cached.add(mode)
+            else:
+                self._cached.discard(mode)
+            self._cache.clear()
+
+    def load_dir(self, path: str) -> List[str]:
+        """Register every `<mode>.tmpl` in `path`; returns the modes loaded."""
+        modes = []
+        for entry in sorted(os.listdir(path)):
+            if entry.endswith(TEMPLATE_SUFFIX):
+                with open(os.path.join(path, entry), encoding="utf-8") as f:
+                    source = f.read()
+                # Editors add a trailing newline; it isn't part of the template
+                mode = entry[: -len(TEMPLATE_SUFFIX)]
+                self.register(mode, source[:-1] if source.endswith("\n") else source)
+                modes.append(mode)
+        return modes
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> List[str]:
+        """Register templates (strings or render callables) published by installed packages.
+
+        A callable with `cacheable = True` gets its output memoized.
+        """
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:
+            return []
+        try:
+            eps = entry_points()
+            found = eps.select(group=group) if hasattr(eps, "select") else eps.get(group, [])
+        except Exception:
+            return []
+        modes = []
+        for ep in found:
+            try:
+                self.register(ep.name, ep.load())
+                modes.append(ep.name)
+            except Exception:
+                continue
+        return modes
+
+    def _load_plugins(self) -> None:
+        self._plugins_loaded = True
+        self.load_entry_points()
+        path = os.environ.get("PROMPT_TEMPLATES_DIR")
+        if path and os.path.isdir(path):
+            self.load_dir(path)
+
+    def get(self, mode: str) -> Renderer:
+        if not self._plugins_loaded:
+            self._load_plugins()
+        return self._renderers.get((mode or "").lower().strip(), _render_fallback)
+
+    def modes(self) -> List[str]:
+        if not self._plugins_loaded:
+            self._load_plugins()
+        return sorted(self._renderers)
+
+    def render(self, mode: str, data: Optional[Dict]) -> str:
+        if not self._plugins_loaded:
+            self._load_plugins()
+        mode = (mode or "").lower().strip()
+        data = data or {}
+        if mode in self._cached and self.cache_size > 0:
+            return self._render_cached(mode, data)
+        return self._renderers.get(mode, _render_fallback)(data)
+
+    def _render_cached(self, mode: str, data: Dict) -> str:
+        key = _cache_key(mode, data)
+        if key is not None:
+            with self._lock:
+                out = self._cache.get(key)
+                if out is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return out
+        out = self._renderers[mode](data)
+        if key is not None:
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = out
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return out
+
+    def iter_render(self, mode: str, data: Optional[Dict]) -> Iterator[str]:
+        """`render` as a sequence of chunks that join to the same string.
+
+        Renderers with a `stream(data)` attribute (chat) yield as they go,
+        so a long transcript is never held as one string; the rest yield
+        their whole output once.
+        """
+        if not self._plugins_loaded:
+            self._load_plugins()
+        mode = (mode or "").lower().strip()
+        data = data or {}
+        stream = getattr(self._renderers.get(mode), "stream", None)
+        if stream is None or mode in self._cached:
+            yield self.render(mode, data)
+            return
+        yield from stream(data)
+
+    def render_many(self, mode: str, records: Iterable[Optional[Dict]]) -> List[str]:
+        """Render many records of one mode with a single template lookup (no cache)."""
+        render = self.get(mode)
+        return [render(data or {}) for data in records]
+
+
+def default_registry() -> TemplateRegistry:
+    registry = TemplateRegistry()
+    registry.register("chat", _render_chat)
+    for mode, source in BUILTIN_TEMPLATES.items():
+        registry.register(mode, source)
+    return registry
+
+
+REGISTRY = default_registry()
+
+
+def register(mode: str, template: Union[str, Renderer]) -> None:
+    REGISTRY.register(mode, template)
+
+
+def render(mode: str, data: Optional[Dict]) -> str:
+    return REGISTRY.render(mode, data)
+
+
+def iter_render(mode: str, data: Optional[Dict]) -> Iterator[str]:
+    return REGISTRY.iter_render(mode, data)
+
+
+def render_many(mode: str, records: Iterable[Optional[Dict]]) -> List[str]:
+    return REGISTRY.render_many(mode, records)
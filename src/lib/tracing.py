@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+from typing import IO, Any, Callable, Dict, List, Optional, TypeVar
+
+# Histogram buckets grow by 2**(1/4) (~19%) from 1 us up to ~18 min,
+# so percentiles are within one bucket width of the true value.
+_BUCKETS_PER_DOUBLING = 4
+_MIN_NS = 1_000
+_NUM_BUCKETS = 30 * _BUCKETS_PER_DOUBLING + 1
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    """Fixed-size log-bucket histogram of durations in nanoseconds."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns: int) -> None:
+        if ns < _MIN_NS:
+            idx = 0
+        else:
+            idx = min(_NUM_BUCKETS - 1, 1 + int(math.log2(ns / _MIN_NS) * _BUCKETS_PER_DOUBLING))
+        self.counts[idx] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, pct: float) -> float:
+        """Upper edge of the bucket holding the `pct`th percentile, in seconds."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                upper = _MIN_NS * 2 ** (idx / _BUCKETS_PER_DOUBLING)
+                return min(upper, self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total": self.total_ns / 1e9,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max_ns / 1e9,
+        }
+
+
+class Tracer:
+    """Per-stage latency histograms, plus Chrome trace events if asked for.
+
+    Spans nest freely and may run on any thread; events are capped at
+    `max_events` so a long session can't grow without bound.
+    """
+
+    def __init__(self, events: bool = False, max_events: int = 200_000) -> None:
+        self.histograms: Dict[str, Histogram] = {}
+        self.events: Optional[List[Dict[str, Any]]] = [] if events else None
+        self.max_events = max_events
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter_ns()
+
+    def record(self, name: str, start_ns: int, end_ns: int) -> None:
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.add(end_ns - start_ns)
+            if self.events is not None:
+                if len(self.events) < self.max_events:
+                    self.events.append(
+                        {
+                            "name": name,
+                            "ph": "X",
+                            "ts": (start_ns - self._t0) / 1000,
+                            "dur": (end_ns - start_ns) / 1000,
+                            "pid": os.getpid(),
+                            "tid": threading.get_ident(),
+                        }
+                    )
+                else:
+                    self.dropped += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: hist.summary() for name, hist in self.histograms.items()}
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write events in the Trace Event format (chrome://tracing, Perfetto)."""
+        with self._lock:
+            events = list(self.events or [])
+        names = {t.ident: t.name for t in threading.enumerate()}
+        meta = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": names[tid]}}
+            for tid in {e["tid"] for e in events}
+            if tid in names
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: Tracer, name: str) -> None:
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.tracer.record(self.name, self.start, time.perf_counter_ns())
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+_tracer: Optional[Tracer] = None
+
+
+def enable(events: bool = False) -> Tracer:
+    """Start recording spans process-wide (`events` also keeps a Chrome trace)."""
+    global _tracer
+    _tracer = Tracer(events=events)
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Stop recording; returns the tracer that was active."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str):
+    """`with span("stt"):` times the block; a shared no-op while tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of `span`; costs one global check per call while off."""
+
+    def wrap(fn: F) -> F:
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tracer.record(name, start, time.perf_counter_ns())
+
+        return inner  # type: ignore[return-value]
+
+    return wrap
+
+
+def format_summary(summary: Dict[str, Dict[str, float]], extra: Optional[Dict[str, Any]] = None) -> str:
+    """Table of stages by total time, in milliseconds."""
+    rows = [f"{'stage':<24} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'total s':>8}"]
+    for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["total"]):
+        rows.append(
+            f"{name:<24} {int(s['count']):>6} {s['p50'] * 1e3:>9.2f} {s['p95'] * 1e3:>9.2f} "
+            f"{s['p99'] * 1e3:>9.2f} {s['max'] * 1e3:>9.2f} {s['total']:>8.2f}"
+        )
+    for key, value in (extra or {}).items():
+        rows.append(f"{key}: {value}")
+    return "\n".join(rows)
+
+
+def report(out: IO[str], trace_path: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> None:
+    """Print the active tracer's summary (and write its Chrome trace)."""
+    tracer = _tracer
+    if tracer is None:
+        return
+    print(format_summary(tracer.summary(), extra), file=out)
+    if trace_path:
+        tracer.write_chrome_trace(trace_path)
+        dropped = f" ({tracer.dropped} events dropped)" if tracer.dropped else ""
+        print(f"Trace written to {trace_path}{dropped}", file=out)
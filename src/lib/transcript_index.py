@@ -0,0 +1,535 @@
+from __future__ import annotations
+
+import bisect
+import glob
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import time
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from src.lib.journal import write_atomic
+
+# Saved transcripts and diaries; directories are searched recursively for these
+TEXT_SUFFIXES = (".txt", ".md")
+INDEX_VERSION = 1
+# More segments than this are merged into one on the next update
+MAX_SEGMENTS = 8
+
+MANIFEST = "manifest.json"  # live segments and their dead files: all `search` reads
+FILES = "files.json"  # per-file stat/hash, only `index` reads it
+
+# `[2024-01-01T10:00:00] text` lines written by run_session and the CLI
+_STAMP = re.compile(r"^\[(\d{4}-\d\d-\d\d)[T ](\d\d:\d\d:\d\d)\]\s*")
+_NO_TIME = -1
+
+# Segment file: header, sorted gram keys (u64), posting starts (u32, one
+# more than keys), postings (u32 line ids), the line table as columns
+# (file, line number, text offset, text length: u32; unix time or -1: i64),
+# UTF-8 text, and a JSON list of [path, mtime] for the lines' files.
+# Sections are 8-byte aligned so each one is a typed memoryview of the map.
+_MAGIC = b"XTI1"
+_HEADER = struct.Struct("<4sIIIQQQ")  # magic, version, grams, lines, postings, text bytes, files bytes
+_COLUMNS = (("file", "I"), ("lineno", "I"), ("offset", "I"), ("length", "I"), ("ts", "q"))
+_CHAR_BITS = 21  # every code point fits; a gram key is (first << 21) | second
+_END = 0  # "second character" after the last one of a run, so single characters are findable
+
+
+def default_index_dir() -> str:
+    root = os.getenv("TRANSCRIPT_INDEX_DIR")
+    if root:
+        return root
+    base = os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "xxx", "index")
+
+
+def normalize(text: str) -> str:
+    """Comparison form: NFKC (full-width ASCII, half-width kana) and lowercase."""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _runs(text: str) -> Iterator[str]:
+    """Maximal runs of letters and digits; punctuation and spaces separate them."""
+    start = -1
+    for i, ch in enumerate(text):
+        if unicodedata.category(ch)[0] in "LN":
+            if start < 0:
+                start = i
+        elif start >= 0:
+            yield text[start:i]
+            start = -1
+    if start >= 0:
+        yield text[start:]
+
+
+def line_grams(normalized: str) -> Set[int]:
+    """Character bigram keys of a line (Japanese has no spaces to split words on)."""
+    keys: Set[int] = set()
+    for run in _runs(normalized):
+        codes = [ord(c) for c in run]
+        codes.append(_END)
+        for a, b in zip(codes, codes[1:]):
+            keys.add((a << _CHAR_BITS) | b)
+    return keys
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+@dataclass
+class Line:
+    file: int
+    lineno: int
+    ts: int
+    text: str
+
+
+def write_segment(path: str, files: Sequence[Tuple[str, float]], lines: Sequence[Line]) -> None:
+    """Write an immutable segment for `lines` (whose `file` indexes `files`)."""
+    postings: Dict[int, array] = {}
+    for line_id, line in enumerate(lines):
+        for key in line_grams(normalize(line.text)):
+            ids = postings.get(key)
+            if ids is None:
+                postings[key] = ids = array("I")
+            ids.append(line_id)
+    keys = array("Q", sorted(postings))
+    starts = array("I", [0])
+    flat = array("I")
+    for key in keys:
+        flat.extend(postings[key])
+        starts.append(len(flat))
+    columns = {name: array(code) for name, code in _COLUMNS}
+    text = bytearray()
+    for line in lines:
+        data = line.text.encode("utf-8")
+        columns["file"].append(line.file)
+        columns["lineno"].append(line.lineno)
+        columns["offset"].append(len(text))
+        columns["length"].append(len(data))
+        columns["ts"].append(line.ts)
+        text += data
+    file_blob = json.dumps([list(f) for f in files], ensure_ascii=False).encode("utf-8")
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, INDEX_VERSION, len(keys), len(lines), len(flat), len(text), len(file_blob)))
+        blocks = [keys, starts, flat] + [columns[name] for name, _ in _COLUMNS]
+        for block in (b.tobytes() for b in blocks):
+            f.write(block)
+            f.write(b"\0" * (_align(len(block)) - len(block)))
+        f.write(text)
+        f.write(file_blob)
+    os.replace(tmp, path)
+
+
+class Segment:
+    """A memory-mapped segment; the OS pages in only what a query touches."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_keys, n_lines, n_postings, text_len, files_len = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != INDEX_VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: not a version {INDEX_VERSION} index segment")
+        view = memoryview(self._map)
+        pos = _HEADER.size
+        sections = []
+        for code, count in [("Q", n_keys), ("I", n_keys + 1), ("I", n_postings)] + [(c, n_lines) for _, c in _COLUMNS]:
+            size = struct.calcsize(code) * count
+            sections.append(view[pos:pos + size].cast(code))
+            pos = _align(pos + size)
+        self.keys, self.starts, self.postings = sections[:3]
+        self.file, self.lineno, self.offset, self.length, self.ts = sections[3:]
+        self._sections = sections
+        self._text = pos
+        self.text_bytes = text_len
+        self._files_at = self._text + text_len
+        self._files_len = files_len
+        self._files: Optional[List[Tuple[str, float]]] = None
+        self._view = view
+        self.lines = n_lines
+
+    @property
+    def files(self) -> List[Tuple[str, float]]:
+        if self._files is None:
+            raw = bytes(self._map[self._files_at:self._files_at + self._files_len])
+            self._files = [(p, m) for p, m in json.loads(raw.decode("utf-8"))]
+        return self._files
+
+    def _range(self, i: int) -> memoryview:
+        return self.postings[self.starts[i]:self.starts[i + 1]]
+
+    def lookup(self, key: int) -> Optional[memoryview]:
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self._range(i)
+        return None
+
+    def starting_with(self, code: int) -> Set[int]:
+        """Lines containing character `code` anywhere (union over its bigrams)."""
+        lo = bisect.bisect_left(self.keys, code << _CHAR_BITS)
+        hi = bisect.bisect_left(self.keys, (code + 1) << _CHAR_BITS)
+        found: Set[int] = set()
+        for i in range(lo, hi):
+            found.update(self._range(i))
+        return found
+
+    def text(self, line_id: int) -> str:
+        start = self._text + self.offset[line_id]
+        return self._map[start:start + self.length[line_id]].decode("utf-8")
+
+    def line(self, line_id: int) -> Line:
+        return Line(self.file[line_id], self.lineno[line_id], self.ts[line_id], self.text(line_id))
+
+    def close(self) -> None:
+        for view in self._sections + [self._view]:
+            view.release()
+        self._map.close()
+
+
+@dataclass
+class Hit:
+    path: str
+    lineno: int
+    timestamp: float
+    text: str
+    score: float
+    # No `[timestamp]` on the line: `timestamp` is the file's mtime
+    approximate: bool = False
+
+    def format(self) -> str:
+        when = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.timestamp))
+        return f"{self.path}:{self.lineno}: [{'~' if self.approximate else ''}{when}] {self.text}"
+
+
+@dataclass
+class UpdateSummary:
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    lines: int = 0
+    segments: int = 0
+    merged: bool = False
+    elapsed: float = 0.0
+
+
+def expand_inputs(patterns: Iterable[str], skip_dir: Optional[str] = None) -> List[str]:
+    """Directories (searched recursively for .txt/.md), globs and plain files."""
+    skip = os.path.abspath(skip_dir) + os.sep if skip_dir else None
+    found: Dict[str, None] = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [
+                p for suffix in TEXT_SUFFIXES for p in glob.glob(os.path.join(pattern, "**", "*" + suffix), recursive=True)
+            ]
+        elif glob.has_magic(pattern):
+            matches = glob.glob(pattern, recursive=True)
+        else:
+            matches = [pattern] if os.path.isfile(pattern) else []
+        for path in sorted(matches):
+            path = os.path.abspath(path)
+            if skip is None or not path.startswith(skip):
+                found[path] = None
+    return list(found)
+
+
+def parse_lines(text: str) -> Iterator[Tuple[int, int, str]]:
+    """(line number, unix time or -1, text without its stamp) per non-blank line."""
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        if not raw.strip():
+            continue
+        ts = _NO_TIME
+        m = _STAMP.match(raw)
+        if m:
+            try:
+                ts = int(time.mktime(time.strptime(f"{m.group(1)} {m.group(2)}", "%Y-%m-%d %H:%M:%S")))
+                raw = raw[m.end():]
+            except (ValueError, OverflowError):
+                pass
+        yield lineno, ts, raw.strip()
+
+
+def _seg_name(seg_id: int) -> str:
+    return f"seg-{seg_id:06d}.idx"
+
+
+class TranscriptIndex:
+    """Inverted index of transcript lines in `root`, updated incrementally.
+
+    - Lines are tokenized into character bigrams, so Japanese needs no
+      word segmentation; a query matches lines that contain every one of
+      its whitespace-separated terms, ranked by BM25 then recency.
+    - Each `update` writes one new immutable segment for new and changed
+      files and marks their old lines dead; segments are merged once
+      there are more than MAX_SEGMENTS or half the lines are dead.
+    - Unchanged files are recognized by size and mtime (then content
+      hash), so re-indexing a large archive reads only what changed.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._segments: Dict[int, Segment] = {}
+        manifest = self._read_json(MANIFEST)
+        if manifest.get("version") != INDEX_VERSION:
+            manifest = {}
+        self.next_id: int = manifest.get("next", 1)
+        # live segment id -> its local file ids whose lines are superseded
+        self.segments: Dict[int, Set[int]] = {int(k): set(v) for k, v in manifest.get("segments", {}).items()}
+
+    def _read_json(self, name: str) -> Dict:
+        try:
+            with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def segment(self, seg_id: int) -> Segment:
+        seg = self._segments.get(seg_id)
+        if seg is None:
+            seg = self._segments[seg_id] = Segment(os.path.join(self.root, _seg_name(seg_id)))
+        return seg
+
+    def close(self) -> None:
+        for seg in self._segments.values():
+            seg.close()
+        self._segments.clear()
+
+    def __enter__(self) -> "TranscriptIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # --- updating -------------------------------------------------------
+
+    def update(self, paths: Iterable[str], rebuild: bool = False) -> UpdateSummary:
+        """Index `paths`; files indexed before that no longer exist are dropped."""
+        t0 = time.perf_counter()
+        os.makedirs(self.root, exist_ok=True)
+        summary = UpdateSummary()
+        files: Dict[str, Dict] = {} if rebuild else self._read_json(FILES).get("files", {})
+        stale: List[int] = []
+        if rebuild:
+            stale, self.segments = list(self.segments), {}
+
+        new_files: List[Tuple[str, float]] = []
+        new_lines: List[Line] = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = files.get(path)
+            if entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                summary.unchanged += 1
+                continue
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            if entry is not None and entry["sha256"] == digest:
+                entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                summary.unchanged += 1
+                continue
+            if entry is not None:
+                self._kill(entry)
+                summary.changed += 1
+            else:
+                summary.added += 1
+            file_id = len(new_files)
+            new_files.append((path, st.st_mtime))
+            for lineno, ts, text in parse_lines(data.decode("utf-8", errors="replace")):
+                new_lines.append(Line(file_id, lineno, ts, text))
+            files[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest, "segment": 0, "file": file_id}
+
+        for path in [p for p in files if not os.path.exists(p)]:
+            self._kill(files.pop(path))
+            summary.removed += 1
+
+        if new_files:
+            seg_id = self._new_segment(new_files, new_lines)
+            for path, _ in new_files:
+                files[path]["segment"] = seg_id
+        summary.lines = len(new_lines)
+        if self._should_merge():
+            self._merge(files)
+            summary.merged = True
+        self._drop_empty(files)
+        self._save(files)
+        # Deleted only once the new manifest no longer names them
+        for seg_id in stale:
+            self._remove_segment(seg_id)
+        summary.segments = len(self.segments)
+        summary.elapsed = time.perf_counter() - t0
+        return summary
+
+    def _kill(self, entry: Dict) -> None:
+        dead = self.segments.get(entry["segment"])
+        if dead is not None:
+            dead.add(entry["file"])
+
+    def _new_segment(self, files: Sequence[Tuple[str, float]], lines: Sequence[Line]) -> int:
+        seg_id = self.next_id
+        self.next_id += 1
+        write_segment(os.path.join(self.root, _seg_name(seg_id)), files, lines)
+        self.segments[seg_id] = set()
+        return seg_id
+
+    def _should_merge(self) -> bool:
+        if len(self.segments) > MAX_SEGMENTS:
+            return True
+        total = dead = 0
+        for seg_id, dead_files in self.segments.items():
+            seg = self.segment(seg_id)
+            total += seg.lines
+            if dead_files:
+                files = array("I", seg.file)  # one copy, then C-speed counts
+                dead += sum(files.count(f) for f in dead_files)
+        return len(self.segments) > 1 and dead * 2 > total
+
+    def _merge(self, files: Dict[str, Dict]) -> None:
+        """Rewrite every live line into one segment (no source files are read)."""
+        merged_files: List[Tuple[str, float]] = []
+        merged_lines: List[Line] = []
+        for seg_id in sorted(self.segments):
+            seg = self.segment(seg_id)
+            remap: Dict[int, int] = {}
+            for local, (path, mtime) in enumerate(seg.files):
+                if local not in self.segments[seg_id]:
+                    remap[local] = len(merged_files)
+                    merged_files.append((path, mtime))
+                    entry = files.get(path)
+                    if entry is not None:
+                        entry["file"] = remap[local]
+            for line_id in range(seg.lines):
+                line = seg.line(line_id)
+                if line.file in remap:
+                    line.file = remap[line.file]
+                    merged_lines.append(line)
+        old = list(self.segments)
+        seg_id = self._new_segment(merged_files, merged_lines)
+        for path, _ in merged_files:
+            if path in files:
+                files[path]["segment"] = seg_id
+        for old_id in old:
+            self._remove_segment(old_id)
+
+    def _drop_empty(self, files: Dict[str, Dict]) -> None:
+        live = {entry["segment"] for entry in files.values()}
+        for seg_id in [s for s in self.segments if s not in live]:
+            self._remove_segment(seg_id)
+
+    def _remove_segment(self, seg_id: int) -> None:
+        seg = self._segments.pop(seg_id, None)
+        if seg is not None:
+            seg.close()
+        self.segments.pop(seg_id, None)
+        try:
+            os.remove(os.path.join(self.root, _seg_name(seg_id)))
+        except OSError:
+            pass
+
+    def _save(self, files: Dict[str, Dict]) -> None:
+        write_atomic(os.path.join(self.root, FILES), json.dumps({"version": INDEX_VERSION, "files": files}))
+        manifest = {
+            "version": INDEX_VERSION,
+            "next": self.next_id,
+            "segments": {str(k): sorted(v) for k, v in sorted(self.segments.items())},
+        }
+        write_atomic(os.path.join(self.root, MANIFEST), json.dumps(manifest))
+
+    # --- searching ------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10) -> List[Hit]:
+        """Lines containing every term of `query`, best first."""
+        terms = [t for t in (normalize(w) for w in query.split()) if any(True for _ in _runs(t))]
+        if not terms:
+            return []
+        # One- and two-character terms are matched exactly by their postings, so
+        # lines need decoding only for longer terms (and for the hits shown)
+        verify = any(len(t) > 2 or [t] != list(_runs(t)) for t in terms)
+        total_lines = 0
+        # Per term, its rarest gram's posting count: an upper bound on its document frequency
+        df = [0] * len(terms)
+        ones = [1] * len(terms)
+        text_bytes = 0
+        found: List[Tuple[Segment, Set[int], List[int]]] = []
+        for seg_id, dead in self.segments.items():
+            seg = self.segment(seg_id)
+            total_lines += seg.lines
+            text_bytes += seg.text_bytes
+            candidates = self._candidates(seg, terms, df)
+            if candidates:
+                found.append((seg, dead, candidates))
+        idf = [math.log(1 + (total_lines - n + 0.5) / (n + 0.5)) for n in df]
+        avg_len = text_bytes / max(1, total_lines)
+        scored: List[Tuple[float, int, int, Segment]] = []
+        for seg, dead, candidates in found:
+            files, lengths, times = seg.file, seg.length, seg.ts
+            for line_id in candidates:
+                if dead and files[line_id] in dead:
+                    continue
+                tfs = ones
+                if verify:
+                    text = normalize(seg.text(line_id))
+                    tfs = [text.count(t) for t in terms]
+                    if not all(tfs):
+                        continue
+                # BM25 (k1=1.2, b=0.75) with line length in bytes
+                norm = 1.2 * (0.25 + 0.75 * lengths[line_id] / avg_len)
+                score = 0.0
+                for w, tf in zip(idf, tfs):
+                    score += w * tf * 2.2 / (tf + norm)
+                scored.append((score, times[line_id], line_id, seg))
+        hits = []
+        for score, ts, line_id, seg in heapq.nlargest(limit, scored, key=lambda s: s[:3]):
+            line = seg.line(line_id)
+            path, mtime = seg.files[line.file]
+            approximate = ts == _NO_TIME
+            hits.append(Hit(path, line.lineno, mtime if approximate else ts, line.text, round(score, 4), approximate))
+        return hits
+
+    @staticmethod
+    def _candidates(seg: Segment, terms: List[str], df: List[int]) -> List[int]:
+        """Line ids that contain every term's grams (verified against the text later)."""
+        lists: List[Sequence[int]] = []
+        for i, term in enumerate(terms):
+            rarest = seg.lines
+            for run in _runs(term):
+                if len(run) == 1:
+                    found: Sequence[int] = sorted(seg.starting_with(ord(run)))
+                    lists.append(found)
+                    rarest = min(rarest, len(found))
+                    continue
+                for a, b in zip(run, run[1:]):
+                    ids = seg.lookup((ord(a) << _CHAR_BITS) | ord(b))
+                    found = ids if ids is not None else ()
+                    lists.append(found)
+                    rarest = min(rarest, len(found))
+            df[i] += rarest
+        lists.sort(key=len)
+        if not lists[0]:
+            return []
+        # Set intersection runs in C; iterating the longer lists beats a Python bisect per id
+        result = set(lists[0])
+        for other in lists[1:]:
+            result.intersection_update(other)
+            if not result:
+                return []
+        return sorted(result)
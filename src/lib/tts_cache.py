@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Protocol
+
+from src.lib import capabilities, cues
+from src.lib.speech import Cancelled, _say_command
+from src.lib.tracing import span
+
+
+def default_cache_dir() -> str:
+    root = os.getenv("SPEECH_CACHE_DIR")
+    if root:
+        return root
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "xxx", "tts")
+
+
+class Renderer(Protocol):
+    """Turns text into an audio file."""
+
+    name: str
+    ext: str
+
+    def available(self) -> bool: ...
+
+    def render(self, text: str, voice: Optional[str], rate: Optional[int], out_path: str) -> bool: ...
+
+
+class SayRenderer:
+    """macOS `say -o` into an AIFF file."""
+
+    name = "say"
+    ext = ".aiff"
+
+    def available(self) -> bool:
+        return capabilities.get().say is not None
+
+    def render(self, text: str, voice: Optional[str], rate: Optional[int], out_path: str) -> bool:
+        cmd = _say_command(text, voice, rate)
+        cmd[1:1] = ["-o", out_path]
+        try:
+            done = subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception:
+            return False
+        return done.returncode == 0 and os.path.exists(out_path)
+
+
+class SayWavRenderer(SayRenderer):
+    """macOS `say -o` into 16-bit mono WAV, for joining into one file."""
+
+    name = "say-wav"
+    ext = ".wav"
+
+    def render(self, text: str, voice: Optional[str], rate: Optional[int], out_path: str) -> bool:
+        cmd = _say_command(text, voice, rate)
+        cmd[1:1] = ["-o", out_path, "--file-format=WAVE", f"--data-format=LEI16@{cues.SAMPLE_RATE}", "--channels=1"]
+        try:
+            done = subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception:
+            return False
+        return done.returncode == 0 and os.path.exists(out_path)
+
+
+class EspeakRenderer:
+    """`espeak-ng -w` into a WAV file (Linux); `voice` is an espeak voice such as "ja"."""
+
+    name = "espeak"
+    ext = ".wav"
+
+    def available(self) -> bool:
+        return capabilities.get().espeak is not None
+
+    def render(self, text: str, voice: Optional[str], rate: Optional[int], out_path: str) -> bool:
+        binary = capabilities.get().espeak
+        if binary is None:
+            return False
+        cmd = [binary, "-w", out_path]
+        if voice:
+            cmd += ["-v", voice]
+        if rate:
+            cmd += ["-s", str(rate)]
+        cmd += ["--", text]
+        try:
+            done = subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception:
+            return False
+        return done.returncode == 0 and os.path.exists(out_path)
+
+
+class SineRenderer:
+    """A tone as long as the text would take to say, for machines without TTS.
+
+    - The pitch is derived from the text, so chunks are told apart by ear
+      and the same text always gives the same file.
+    - `rate` (words per minute) scales the length like it would speech.
+    """
+
+    name = "sine"
+    ext = ".wav"
+    SECONDS_PER_CHAR = 0.06
+    DEFAULT_RATE = 175
+
+    def available(self) -> bool:
+        return True
+
+    def render(self, text: str, voice: Optional[str], rate: Optional[int], out_path: str) -> bool:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        freq = 220.0 + digest[0] * 2.0
+        duration = max(0.1, len(text) * self.SECONDS_PER_CHAR * self.DEFAULT_RATE / (rate or self.DEFAULT_RATE))
+        spec = cues.CueSpec(((freq, 0.6),), duration=duration, decay=duration * 4, attack=0.01, release=0.02)
+        with open(out_path, "wb") as f:
+            f.write(cues.wav_bytes(cues.synthesize(spec)))
+        return True
+
+
+class FakeRenderer:
+    """Writes the request itself as the "audio"; records every render."""
+
+    name = "fake"
+    ext = ".txt"
+
+    def __init__(self) -> None:
+        self.rendered: List[str] = []
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return True
+
+    def render(self, text: str, voice: Optional[str], rate: Optional[int], out_path: str) -> bool:
+        with self._lock:
+            self.rendered.append(text)
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(f"{voice}|{rate}|{text}")
+        return True
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    renders: int = 0
+    failures: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class AudioCache:
+    """Content-addressed audio files keyed by (text, voice, rate, renderer).
+
+    - `fetch` returns a cached file or renders it once; concurrent fetches
+      of the same phrase share one render.
+    - Recency is kept in memory and in file mtimes; the least recently used
+      files are evicted once the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, root: str, renderer: Renderer, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.root = root
+        self.renderer = renderer
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def key(self, text: str, voice: Optional[str], rate: Optional[int]) -> str:
+        raw = json.dumps([text, voice, rate, self.renderer.name], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + self.renderer.ext)
+
+    def get(self, text: str, voice: Optional[str] = None, rate: Optional[int] = None) -> Optional[str]:
+        """Cached file for the phrase, or None. Does not render."""
+        key = self.key(text, voice, rate)
+        with self._lock:
+            if key not in self._lru:
+                return None
+            self._lru.move_to_end(key)
+            self.stats.hits += 1
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._drop(key)
+            return None
+        return path
+
+    def fetch(self, text: str, voice: Optional[str] = None, rate: Optional[int] = None) -> Optional[str]:
+        """Cached file for the phrase, rendering it on a miss. None if rendering failed."""
+        path = self.get(text, voice, rate)
+        if path is not None:
+            return path
+        key = self.key(text, voice, rate)
+        with self._lock:
+            self.stats.misses += 1
+            waiter = self._inflight.get(key)
+            if waiter is None:
+                self._inflight[key] = threading.Event()
+        if waiter is not None:
+            waiter.wait()
+            with self._lock:
+                return self.path_for(key) if key in self._lru else None
+        try:
+            return self._render(key, text, voice, rate)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def prewarm(
+        self,
+        phrases: Iterable[str],
+        voice: Optional[str] = None,
+        rate: Optional[int] = None,
+        max_workers: int = 4,
+    ) -> int:
+        """Render all missing phrases in parallel. Returns how many are now cached."""
+        unique = [p for p in dict.fromkeys(phrases) if p]
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            results = list(pool.map(lambda p: self.fetch(p, voice, rate), unique))
+        return sum(1 for r in results if r)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            self.stats.entries = len(self._lru)
+            return dict(vars(self.stats))
+
+    def _render(self, key: str, text: str, voice: Optional[str], rate: Optional[int]) -> Optional[str]:
+        path = self.path_for(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp{self.renderer.ext}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with span("tts.render"):
+                ok = self.renderer.render(text, voice, rate, tmp)
+            if ok:
+                os.replace(tmp, path)
+                size = os.path.getsize(path)
+        except Exception:
+            ok = False
+        if not ok:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            with self._lock:
+                self.stats.failures += 1
+            return None
+        with self._lock:
+            self.stats.renders += 1
+            self._lru[key] = size
+            self.stats.bytes += size
+            self._evict(keep=key)
+        return path
+
+    def _evict(self, keep: str) -> None:
+        for key in list(self._lru):
+            if self.stats.bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+            self._drop(key)
+            self.stats.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        size = self._lru.pop(key, None)
+        if size is not None:
+            self.stats.bytes -= size
+
+    def _load(self) -> None:
+        found = []
+        if os.path.isdir(self.root):
+            for sub in os.scandir(self.root):
+                if not sub.is_dir():
+                    continue
+                for entry in os.scandir(sub.path):
+                    name = entry.name
+                    if not name.endswith(self.renderer.ext) or ".tmp" in name:
+                        continue
+                    st = entry.stat()
+                    found.append((st.st_mtime, name[: -len(self.renderer.ext)], st.st_size))
+        for _, key, size in sorted(found):
+            self._lru[key] = size
+            self.stats.bytes += size
+
+
+class CachedBackend:
+    """SpeechBackend that plays cached renders and speaks long text live.
+
+    Texts up to `max_text_len` characters go through the cache (the fixed
+    session phrases and readback chunks); longer ones use `fallback`.
+    """
+
+    def __init__(self, cache: AudioCache, fallback, max_text_len: int = 200) -> None:
+        self.cache = cache
+        self.fallback = fallback
+        self.max_text_len = max_text_len
+        self.name = f"cached-{cache.renderer.name}"
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return self.cache.renderer.available() and capabilities.get().afplay is not None
+
+    def speak(
+        self, text: str, voice: Optional[str], rate: Optional[int], cancelled: Cancelled = None
+    ) -> bool:
+        if len(text) > self.max_text_len:
+            return self.fallback.speak(text, voice, rate, cancelled)
+        path = self.cache.fetch(text, voice, rate)
+        if path is None:
+            return self.fallback.speak(text, voice, rate, cancelled)
+        return self._play(path, cancelled)
+
+    def prepare(self, text: str, voice: Optional[str], rate: Optional[int]) -> None:
+        """Render `text` ahead of time; the engine calls this for the next utterance."""
+        if len(text) <= self.max_text_len:
+            self.cache.fetch(text, voice, rate)
+
+    def prewarm(self, phrases: Iterable[str], voice: Optional[str] = None, rate: Optional[int] = None) -> int:
+        return self.cache.prewarm((p for p in phrases if len(p) <= self.max_text_len), voice, rate)
+
+    def stop(self) -> None:
+        with self._lock:
+            proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        self.fallback.stop()
+
+    def close(self) -> None:
+        self.stop()
+        self.fallback.close()
+
+    def _play(self, path: str, cancelled: Cancelled = None) -> bool:
+        try:
+            proc = subprocess.Popen(["afplay", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception:
+            return False
+        with self._lock:
+            self._proc = proc
+        if cancelled is not None and cancelled():
+            proc.terminate()
+        with span("tts.afplay"):
+            proc.wait()
+        with self._lock:
+            self._proc = None
+        return proc.returncode == 0
+
+
+def cached_backend(fallback) -> Optional[CachedBackend]:
+    """Wrap `fallback` with the on-disk cache if it is enabled and usable here."""
+    if os.getenv("SPEECH_CACHE", "1") == "0":
+        return None
+    renderer = SayRenderer()
+    if not renderer.available() or capabilities.get().afplay is None:
+        return None
+    try:
+        max_mb = int(os.getenv("SPEECH_CACHE_MB", "64"))
+    except ValueError:
+        max_mb = 64
+    return CachedBackend(AudioCache(default_cache_dir(), renderer, max_mb * 1024 * 1024), fallback)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# How a spoken command starts. Typed "/" is one more spelling of it, and
+# requiring it keeps ordinary sentences ("次に…") from firing commands.
+# Clipped forms ("スラッシ") are left to near-miss matching: "ラッシュ" is
+# a word of its own.
+PREFIXES = ("/", "スラッシュ", "slash", "slush", "surasshu")
+
+# Spoken forms of each command: katakana, romaji, English, kanji and the
+# mis-transcriptions STT engines actually produce for them
+ALIASES: Dict[str, Tuple[str, ...]] = {
+    "undo": ("undo", "アンドゥ", "アンドゥー", "アンドウ", "アンドー", "andu", "ando", "取り消し", "とりけし"),
+    "read": ("read", "リード", "read back", "読み上げ", "よみあげ", "rido"),
+    "done": ("done", "ドーン", "ダン", "ダウン", "down", "dan", "don", "終了", "しゅうりょう", "終わり", "おわり"),
+    "help": ("help", "ヘルプ", "ヘロプ", "herupu"),
+    "save": ("save", "セーブ", "セイブ", "セーヴ", "sebu", "seibu", "保存", "ほぞん"),
+    "pause": ("pause", "ポーズ", "ポース", "pose", "pozu", "一時停止", "いちじていし"),
+    "resume": ("resume", "リジューム", "レジューム", "リズーム", "rijumu", "再開", "さいかい"),
+    "skip": ("skip", "スキップ", "sukippu", "次", "つぎ"),
+    "stop": ("stop", "ストップ", "sutoppu", "止めて", "とめて", "停止", "ていし"),
+}
+
+# Commands whose remaining words are an argument ("/save notes.txt")
+TAKES_ARG = frozenset({"save"})
+
+# Utterances accepted below this confidence are treated as plain text
+MIN_CONFIDENCE = 0.8
+
+_MAX_TOKENS = 4  # longest prefix + command spelled as separate words ("slash read back")
+_DROP = frozenset("ー")  # long-vowel marks come and go between engines
+
+
+@dataclass(frozen=True)
+class Match:
+    name: str
+    arg: Optional[str] = None
+    confidence: float = 1.0
+    alias: str = ""
+
+
+def _to_katakana(ch: str) -> str:
+    code = ord(ch)
+    return chr(code + 0x60) if 0x3041 <= code <= 0x3096 else ch
+
+
+def normalize(text: str) -> str:
+    """Comparison key: NFKC, lowercase, hiragana folded to katakana,
+    punctuation, spaces and long-vowel marks removed ("/" is kept)."""
+    out = []
+    for ch in unicodedata.normalize("NFKC", text).lower():
+        if ch == "/":
+            out.append(ch)
+        elif ch not in _DROP and unicodedata.category(ch)[0] in "LN":
+            out.append(_to_katakana(ch))
+    return "".join(out)
+
+
+def _is_native(alias: str) -> bool:
+    """Kanji or hiragana: an everyday word ("次", "終わり") that STT spells
+    exactly, so only an exact prefix + word counts as the command."""
+    return any(0x3041 <= ord(ch) <= 0x309F or unicodedata.name(ch, "").startswith("CJK UNIFIED") for ch in alias)
+
+
+def _deletes(key: str) -> Set[str]:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def _max_distance(key: str) -> int:
+    return 0 if len(key) < 5 else 1 if len(key) < 9 else 2
+
+
+class CommandIndex:
+    """Every prefix + alias spelling, normalized into one hash table.
+
+    - Exact lookups are a single dict hit.
+    - Near misses go through a deletion index (each key with one
+      character removed), so a typo'd utterance is found with
+      len(utterance) lookups instead of a scan; how the two met gives
+      the edit distance without computing it.
+    - Kanji and hiragana aliases match exactly or not at all.
+    """
+
+    def __init__(self, aliases: Dict[str, Iterable[str]], prefixes: Iterable[str] = PREFIXES) -> None:
+        self.exact: Dict[str, Tuple[str, str]] = {}
+        self._alias_len: Dict[str, int] = {}
+        self.near: Dict[str, List[str]] = {}
+        for name, spellings in aliases.items():
+            for prefix in prefixes:
+                for alias in spellings:
+                    key = normalize(prefix + alias)
+                    other = self.exact.get(key)
+                    if other is not None and other[0] != name:
+                        raise ValueError(f"alias {alias!r} of {name!r} collides with {other[0]!r}")
+                    self.exact[key] = (name, alias)
+                    if not _is_native(alias):
+                        self._alias_len[key] = len(normalize(alias))
+        # Only keys with an alias length take part in near-miss matching
+        for key in self._alias_len:
+            for variant in _deletes(key):
+                self.near.setdefault(variant, []).append(key)
+        self.max_len = max(len(k) for k in self.exact) + 2
+
+    def lookup(self, key: str) -> Optional[Match]:
+        hit = self.exact.get(key)
+        if hit is not None:
+            return Match(hit[0], None, 1.0, hit[1])
+        limit = _max_distance(key)
+        if not limit or len(key) > self.max_len:
+            return None
+        # Candidate -> edit distance. `key` is a candidate minus one
+        # character, or a candidate plus one; two same-length strings with a
+        # common deletion differ by one substitution, or else by two edits.
+        found = dict.fromkeys(self.near.get(key, ()), 1)
+        for variant in _deletes(key):
+            if variant in self._alias_len:
+                found[variant] = 1
+            for cand in self.near.get(variant, ()):
+                if cand not in found:
+                    found[cand] = 1 if sum(a != b for a, b in zip(key, cand)) == 1 else 2
+        best: Optional[Tuple[int, str]] = None
+        for cand, d in found.items():
+            # A typo may blur the command word, not replace it ("スラッシュ" alone isn't "スラッシュドン")
+            if d <= limit and d < self._alias_len[cand] and (best is None or (d, cand) < best):
+                best = (d, cand)
+        if best is None:
+            return None
+        d, cand = best
+        name, alias = self.exact[cand]
+        return Match(name, None, round(1.0 - d / max(len(key), len(cand)), 3), alias)
+
+    def match(self, utterance: str) -> Optional[Match]:
+        """The command spoken or typed in `utterance`, if any.
+
+        The first few words are tried as the command (longest first) and
+        the rest becomes its argument; commands without one must fill
+        the whole utterance.
+        """
+        words = utterance.split()
+        if not words:
+            return None
+        keys = [normalize(w) for w in words[:_MAX_TOKENS]]
+        for k in range(len(keys), 0, -1):
+            rest = words[k:]
+            found = self.lookup("".join(keys[:k]))
+            if found is None or (rest and found.name not in TAKES_ARG):
+                continue
+            return Match(found.name, " ".join(rest) or None, found.confidence, found.alias)
+        return None
+
+
+INDEX = CommandIndex(ALIASES)
+
+
+def match(utterance: str, min_confidence: float = MIN_CONFIDENCE) -> Optional[Match]:
+    found = INDEX.match(utterance)
+    if found is None or found.confidence < min_confidence:
+        return None
+    return found
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+# Minimal RFC 6455 over asyncio streams: text messages, ping/pong and the
+# close handshake, which is all the session host and its load generator need.
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_MESSAGE = 64 * 1024
+MAX_HEADER = 8 * 1024
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+CLOSE_NORMAL = 1000
+CLOSE_PROTOCOL = 1002
+CLOSE_TOO_BIG = 1009
+CLOSE_TRY_AGAIN = 1013
+
+
+class HandshakeError(Exception):
+    def __init__(self, status: int, msg: str) -> None:
+        super().__init__(msg)
+        self.status = status
+
+
+def accept_key(key: str) -> str:
+    digest = hashlib.sha1((key + GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def _mask(payload: bytes, key: bytes) -> bytes:
+    if not payload:
+        return payload
+    # XOR as one big integer: far faster than a per-byte loop in Python
+    repeated = (key * (len(payload) // 4 + 1))[: len(payload)]
+    n = int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")
+    return n.to_bytes(len(payload), "big")
+
+
+def encode_frame(opcode: int, payload: bytes, mask: bool = False) -> bytes:
+    """One final frame; clients must mask what they send, servers must not."""
+    size = len(payload)
+    head = bytes([0x80 | opcode])
+    bit = 0x80 if mask else 0
+    if size < 126:
+        head += bytes([bit | size])
+    elif size < 1 << 16:
+        head += bytes([bit | 126]) + struct.pack("!H", size)
+    else:
+        head += bytes([bit | 127]) + struct.pack("!Q", size)
+    if not mask:
+        return head + payload
+    key = os.urandom(4)
+    return head + key + _mask(payload, key)
+
+
+class WebSocket:
+    """An open connection, either side.
+
+    - `send` only buffers (the transport flushes on its own); await
+      `drain` where backpressure matters.
+    - `recv` returns the next text message, or None once the connection
+      is closed; pings are answered inside it.
+    """
+
+    __slots__ = ("reader", "writer", "is_client", "closed", "_close_sent")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, is_client: bool = False) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.is_client = is_client
+        self.closed = False
+        self._close_sent = False
+
+    def send(self, text: str) -> None:
+        self._write(OP_TEXT, text.encode("utf-8"))
+
+    async def drain(self) -> None:
+        if not self.closed:
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                self.closed = True
+
+    def _write(self, opcode: int, payload: bytes) -> None:
+        if self.closed or self._close_sent or self.writer.is_closing():
+            return
+        self.writer.write(encode_frame(opcode, payload, mask=self.is_client))
+
+    def send_close(self, code: int = CLOSE_NORMAL, reason: str = "") -> None:
+        """Start the close handshake; `recv` returns None once the peer answers."""
+        self._write(OP_CLOSE, struct.pack("!H", code) + reason.encode("utf-8")[:120])
+        self._close_sent = True
+
+    async def _frame(self) -> Tuple[bool, int, bytes]:
+        b0, b1 = await self.reader.readexactly(2)
+        size = b1 & 0x7F
+        if size == 126:
+            (size,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif size == 127:
+            (size,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        if size > MAX_MESSAGE:
+            raise ValueError("message too big")
+        key = await self.reader.readexactly(4) if b1 & 0x80 else b""
+        payload = await self.reader.readexactly(size)
+        return bool(b0 & 0x80), b0 & 0x0F, _mask(payload, key) if key else payload
+
+    async def recv(self) -> Optional[str]:
+        parts = []
+        total = 0
+        while not self.closed:
+            try:
+                fin, opcode, payload = await self._frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except ValueError:
+                self.send_close(CLOSE_TOO_BIG)
+                break
+            if opcode == OP_PING:
+                self._write(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self._close_sent:
+                    self._write(OP_CLOSE, payload[:2])
+                    self._close_sent = True
+                break
+            if opcode not in (OP_TEXT, OP_BINARY, OP_CONT) or (opcode == OP_CONT) != bool(parts):
+                self.send_close(CLOSE_PROTOCOL)
+                break
+            parts.append(payload)
+            total += len(payload)
+            if total > MAX_MESSAGE:
+                self.send_close(CLOSE_TOO_BIG)
+                break
+            if fin:
+                data = b"".join(parts)
+                parts, total = [], 0
+                try:
+                    return data.decode("utf-8")
+                except UnicodeDecodeError:
+                    self.send_close(CLOSE_PROTOCOL)
+                    break
+        await self.close()
+        return None
+
+    def abort(self) -> None:
+        """Drop the connection without a handshake (a peer that stopped answering)."""
+        self.closed = True
+        self.writer.transport.abort()
+
+    async def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.writer.close()
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+def _parse_headers(raw: bytes) -> Tuple[str, Dict[str, str]]:
+    lines = raw.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+async def _read_head(reader: asyncio.StreamReader) -> bytes:
+    try:
+        return await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise HandshakeError(431, "headers too large")
+    except asyncio.IncompleteReadError:
+        raise HandshakeError(400, "incomplete request")
+
+
+async def accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> WebSocket:
+    """Server side of the opening handshake for GET `path`.
+
+    Raises HandshakeError after answering the client with an HTTP error.
+    """
+    try:
+        request_line, headers = _parse_headers(await _read_head(reader))
+        parts = request_line.split()
+        if len(parts) != 3 or parts[0] != "GET":
+            raise HandshakeError(405, "only GET upgrades")
+        if parts[1].split("?", 1)[0] != path:
+            raise HandshakeError(404, "not found")
+        key = headers.get("sec-websocket-key")
+        if "websocket" not in headers.get("upgrade", "").lower() or not key:
+            raise HandshakeError(426, "expected a WebSocket upgrade")
+    except HandshakeError as e:
+        body = f"{e}\n".encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {e.status} {e}\r\nContent-Type: text/plain\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        writer.close()
+        raise
+    writer.write(
+        (
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+        ).encode("latin-1")
+    )
+    return WebSocket(reader, writer)
+
+
+async def connect(host: str, port: int, path: str = "/") -> WebSocket:
+    """Client side: open a connection to ws://host:port/path."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write(
+        (
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode("latin-1")
+    )
+    try:
+        status_line, headers = _parse_headers(await _read_head(reader))
+    except HandshakeError:
+        writer.close()
+        raise
+    status = status_line.split()
+    if len(status) < 2 or status[1] != "101" or headers.get("sec-websocket-accept") != accept_key(key):
+        writer.close()
+        raise HandshakeError(int(status[1]) if len(status) > 1 and status[1].isdigit() else 502, status_line)
+    return WebSocket(reader, writer, is_client=True)
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Subsystems a one-shot prompt or --help must not load
+LAZY = {
+    "src.lib.speech",
+    "src.lib.stt",
+    "src.lib.session",
+    "src.lib.eyesfree",
+    "src.lib.voice_commands",
+    "src.lib.cues",
+    "src.lib.journal",
+    "src.lib.tracing",
+    "src.lib.transcript_index",
+    "asyncio",
+}
+# Import time of src.app.main as a fraction of main plus the subsystems it
+# defers, measured in the same process so machine speed cancels out:
+# ~40 of ~185 ms here (0.22); loading them up front makes it 1.0
+IMPORT_BUDGET_RATIO = float(os.environ.get("IMPORT_BUDGET_RATIO", "0.5"))
+
+
+def _importtime(*args: str, top_level: bool = False) -> Dict[str, int]:
+    """Module -> cumulative import microseconds, from `python -X importtime`.
+
+    With `top_level`, only modules imported directly by the command (their
+    cumulative time includes everything they pulled in).
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT, SPEECH_DRY_RUN="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if top_level and name.startswith("  "):
+                continue
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_one_shot_cli_skips_subsystems():
+    for argv in (["--help"], ["diary", "hello"]):
+        loaded = LAZY & set(_importtime("-m", "src.app.main", *argv))
+        assert not loaded, f"{' '.join(argv)} imported {sorted(loaded)}"
+
+
+def test_import_time_budget():
+    deferred = ", ".join(sorted(LAZY))
+    ratios = []
+    for _ in range(3):
+        modules = _importtime("-c", f"import src.app.main; import {deferred}", top_level=True)
+        main = modules["src.app.main"]
+        ratios.append(main / sum(modules[name] for name in (modules.keys() & LAZY) | {"src.app.main"}))
+    best = min(ratios)
+    assert best < IMPORT_BUDGET_RATIO, f"import src.app.main took {best:.0%} of loading everything up front"
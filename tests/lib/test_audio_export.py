@@ -0,0 +1,79 @@
+import wave
+
+import pytest
+
+from src.lib.audio_export import LINE_GAP_SEC, export_audio, read_chapters
+from src.lib.tts_cache import AudioCache, SineRenderer
+
+
+class CountingSine(SineRenderer):
+    def __init__(self):
+        self.rendered = []
+
+    def render(self, text, voice, rate, out_path):
+        self.rendered.append(text)
+        return super().render(text, voice, rate, out_path)
+
+
+class OddRateSine(CountingSine):
+    """Renders lines containing "別" at a sample rate the others don't use."""
+
+    def render(self, text, voice, rate, out_path):
+        if "別" not in text:
+            return super().render(text, voice, rate, out_path)
+        with wave.open(out_path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(8000)
+            w.writeframes(bytes(1600))
+        return True
+
+
+def test_read_chapters_from_transcript_and_build_jsonl():
+    text = (
+        "[2026-01-02 10:00:00] こんにちは。\n"
+        "\n"
+        '{"id": 7, "prompt": "Built prompt."}\n'
+        '{"mode": "music", "title": "x"}\n'
+        '{"mode": "no-such-mode"}\n'
+    )
+    chapters = read_chapters(text)
+    assert [(c.line, c.title) for c in chapters] == [(1, None), (3, "7"), (4, "music")]
+    assert chapters[0].text == "こんにちは。" and chapters[1].text == "Built prompt."
+
+
+def test_export_joins_chunks_in_order_and_reuses_them(tmp_path):
+    renderer = CountingSine()
+    cache = AudioCache(str(tmp_path / "cache"), renderer)
+    out = str(tmp_path / "out.wav")
+    lines = ["一つ目。", "二つ目の行です。" * 30, "三つ目。"]
+    chapters = read_chapters("\n".join(lines))
+    summary = export_audio(chapters, out, cache, workers=3, max_chars=40)
+    assert summary.failed == 0 and summary.chunks > 3 and summary.rendered == len(set(renderer.rendered))
+
+    with wave.open(out, "rb") as w:
+        assert abs(w.getnframes() / w.getframerate() - summary.duration) < 1e-6
+    assert chapters[0].start == 0.0
+    for before, after in zip(chapters, chapters[1:]):
+        assert abs(before.start + before.duration + LINE_GAP_SEC - after.start) < 1e-3
+    assert abs(chapters[-1].start + chapters[-1].duration - summary.duration) < 1e-3
+
+    # Re-export with one line changed: only that line is rendered again
+    renderer.rendered.clear()
+    lines[2] = "三つ目を直した。"
+    again = export_audio(read_chapters("\n".join(lines)), out, AudioCache(str(tmp_path / "cache"), renderer), workers=3, max_chars=40)
+    assert renderer.rendered == ["三つ目を直した。"]
+    assert again.rendered == 1 and again.reused == summary.chunks - 1
+
+
+def test_rejected_chunks_leave_no_gap(tmp_path):
+    cache = AudioCache(str(tmp_path / "cache"), OddRateSine())
+    out = str(tmp_path / "out.wav")
+    chapters = read_chapters("一つ目。\n別の形式。\n三つ目。")
+    summary = export_audio(chapters, out, cache, workers=2)
+    assert summary.failed == 1
+    first, skipped, third = chapters
+    assert (skipped.start, skipped.duration) == (0.0, 0.0)
+    # Only the one line gap between the two chapters that made it in
+    assert third.start == pytest.approx(first.duration + LINE_GAP_SEC, abs=1e-3)
+    assert third.start + third.duration == pytest.approx(summary.duration, abs=1e-3)
@@ -0,0 +1,103 @@
+import io
+import json
+import math
+import struct
+import wave
+
+from src.lib import stt
+from src.lib.batch_stt import completed_files, expand_inputs, open_output, run_batch, transcribe_file
+
+
+class LengthBackend:
+    name = "length"
+
+    def load(self):
+        pass
+
+    def transcribe(self, segment, lang):
+        return stt.Transcript(f"{segment.duration:.1f}s", 0.9)
+
+
+def _write_wav(path, bursts):
+    rate = 8000
+    frames = bytearray()
+    for seconds, amp in bursts:
+        for i in range(int(seconds * rate)):
+            frames += struct.pack("<h", int(amp * math.sin(2 * math.pi * 440 * i / rate)))
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+
+
+def test_transcribe_file_segments_with_offsets(tmp_path):
+    path = tmp_path / "a.wav"
+    _write_wav(path, [(0.5, 0), (1.0, 8000), (1.0, 0), (0.5, 8000), (0.6, 0)])
+    records = transcribe_file(str(path), "ja-JP", LengthBackend())
+    assert [(round(r["offset"], 1), r["text"]) for r in records] == [(0.5, "1.0s"), (2.5, "0.5s")]
+    assert [r["segment"] for r in records] == [0, 1]
+    assert all(r["segments"] == 2 and r["confidence"] == 0.9 for r in records)
+
+
+def test_run_batch_streams_jsonl_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(stt, "_REGISTRY", dict(stt._REGISTRY))
+    stt.register_backend("length", LengthBackend)
+    for name in ("a", "b", "c"):
+        _write_wav(tmp_path / f"{name}.wav", [(0.4, 0), (0.5, 8000), (0.6, 0)])
+    paths = expand_inputs([str(tmp_path)])
+    assert len(paths) == 3
+
+    out_path = str(tmp_path / "out.jsonl")
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"file": paths[0], "text": "x", "segment": 0, "segments": 1}) + "\n")
+        f.write('{"file": "torn')
+    skip = completed_files(out_path)
+    assert skip == {paths[0]}
+
+    out = open_output(out_path, resume=True)
+    summary = run_batch(paths, out, backend="length", workers=2, skip=skip)
+    out.close()
+    assert (summary.files, summary.skipped, summary.failed) == (2, 1, 0)
+    assert completed_files(out_path) == set(paths)
+
+
+def test_run_batch_reports_broken_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(stt, "_REGISTRY", dict(stt._REGISTRY))
+    stt.register_backend("length", LengthBackend)
+    bad = tmp_path / "bad.wav"
+    bad.write_bytes(b"not a wav")
+    out = io.StringIO()
+    summary = run_batch([str(bad)], out, backend="length", workers=1)
+    assert summary.failed == 1
+    assert "error" in json.loads(out.getvalue())
+
+
+def test_run_batch_workers_get_runtime_backends_without_fork(tmp_path, monkeypatch):
+    import functools
+    import multiprocessing
+
+    from src.lib import batch_stt
+
+    # spawn (macOS) and forkserver start workers from fresh imports
+    monkeypatch.setattr(
+        batch_stt,
+        "ProcessPoolExecutor",
+        functools.partial(batch_stt.ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")),
+    )
+    monkeypatch.setattr(stt, "_REGISTRY", dict(stt._REGISTRY))
+    stt.register_backend("length", LengthBackend)
+    _write_wav(tmp_path / "a.wav", [(0.4, 0), (0.5, 8000), (0.6, 0)])
+    out = io.StringIO()
+    summary = run_batch([str(tmp_path / "a.wav")], out, backend="length", workers=1)
+    assert (summary.files, summary.failed) == (1, 0)
+    assert json.loads(out.getvalue())["text"] == "0.5s"
+
+
+def test_transcribe_reports_an_unknown_backend(tmp_path, monkeypatch, capsys):
+    from src.app.main import transcribe_main
+
+    _write_wav(tmp_path / "a.wav", [(0.5, 8000)])
+    monkeypatch.setenv("STT_BACKEND", "nope")
+    assert transcribe_main([str(tmp_path)]) == 1
+    assert "Unknown STT backend 'nope'" in capsys.readouterr().err
@@ -0,0 +1,41 @@
+import io
+import json
+
+from src.lib.bulk import build_chunk, build_record, run_build
+from src.lib.prompt_builder import build_prompt
+
+
+def _records(n):
+    modes = ["chat", "diary", "music", "image"]
+    return [json.dumps({"id": i, "mode": modes[i % 4], "seed": f"seed {i}"}) + "\n" for i in range(n)]
+
+
+def test_build_record_matches_build_prompt():
+    rec = build_record('{"mode": "music", "genre": "dub", "bpm": 90}')
+    assert rec == {"mode": "music", "prompt": build_prompt("music", {"genre": "dub", "bpm": 90})}
+    assert build_record("  \n") is None
+
+
+def test_bad_records_report_their_line():
+    text, records, errors = build_chunk(10, ['{"mode": "chat", "seed": "ok"}\n', "not json\n", '{"seed": "x"}\n'])
+    out = [json.loads(line) for line in text.splitlines()]
+    assert records == 3 and errors == 2
+    assert out[1]["line"] == 11 and out[2] == {"line": 12, "error": "ValueError: missing mode"}
+
+
+def test_workers_preserve_input_order():
+    lines = _records(250)
+    serial, parallel = io.StringIO(), io.StringIO()
+    summary = run_build(iter(lines), serial, chunk_size=7)
+    run_build(iter(lines), parallel, workers=2, chunk_size=7)
+    assert summary.records == 250 and summary.errors == 0
+    assert parallel.getvalue() == serial.getvalue()
+    assert [json.loads(line)["id"] for line in serial.getvalue().splitlines()] == list(range(250))
+
+
+def test_build_reports_a_missing_input(tmp_path, capsys):
+    from src.app.main import build_main
+
+    assert build_main([str(tmp_path / "missing.jsonl"), "-o", str(tmp_path / "out.jsonl")]) == 1
+    assert "missing.jsonl" in capsys.readouterr().err
+    assert not (tmp_path / "out.jsonl").exists()
@@ -0,0 +1,31 @@
+import shutil
+
+from src.lib import capabilities
+
+
+def test_probes_run_once_until_reset(monkeypatch):
+    calls = []
+
+    def which(name):
+        calls.append(name)
+        return f"/usr/bin/{name}" if name == "aplay" else None
+
+    monkeypatch.setattr(shutil, "which", which)
+    capabilities.reset()
+    try:
+        caps = capabilities.get()
+        assert caps.audio_player == "aplay"
+        assert capabilities.get().audio_player == "aplay"
+        assert calls == ["afplay", "aplay"]
+        capabilities.reset()
+        assert capabilities.get() is not caps
+        capabilities.get().audio_player
+        assert calls == ["afplay", "aplay", "afplay", "aplay"]
+    finally:
+        capabilities.reset()
+
+
+def test_as_dict_lists_every_probe():
+    info = capabilities.get().as_dict()
+    assert set(info) >= {"system", "say", "audio_player", "speech_recognition", "microphone"}
+    assert isinstance(info["microphone"], bool)
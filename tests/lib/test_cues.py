@@ -0,0 +1,35 @@
+import io
+import wave
+
+from src.lib.cues import CUES, SAMPLE_RATE, CueBank, CuePlayer, MemorySink, synthesize
+
+
+def test_bank_preloads_all_named_cues():
+    bank = CueBank()
+    assert sorted(bank.names()) == ["Glass", "Pop", "Submarine"]
+
+
+def test_pcm_matches_spec():
+    spec = CUES["Pop"]
+    pcm = synthesize(spec)
+    assert len(pcm) == 2 * int(spec.duration * SAMPLE_RATE)
+    samples = memoryview(pcm).cast("h")
+    assert samples[0] == 0  # attack ramps up from silence
+    assert max(abs(s) for s in samples) <= 32767 // 2 + 1
+
+
+def test_sink_receives_exact_wav_samples():
+    sink = MemorySink()
+    bank = CueBank()
+    player = CuePlayer(bank, sink)
+    assert player.play("Submarine") is True
+    name, data = sink.played[0]
+    assert name == "Submarine"
+    with wave.open(io.BytesIO(data)) as w:
+        assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, SAMPLE_RATE)
+        assert w.readframes(w.getnframes()) == synthesize(CUES["Submarine"])
+
+
+def test_unknown_cue_falls_back_to_glass():
+    bank = CueBank()
+    assert bank.get("Nope") is bank.get("Glass")
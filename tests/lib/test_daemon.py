@@ -0,0 +1,160 @@
+import asyncio
+import contextvars
+import io
+import os
+import sys
+import threading
+
+import pytest
+
+from src.app.client import absolute_paths, connect, forward
+from src.lib import daemon
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch):
+    # The daemon swaps sys streams for per-request proxies; put them back afterwards
+    for name in ("stdin", "stdout", "stderr"):
+        monkeypatch.setattr(sys, name, getattr(sys, name))
+    servers = []
+
+    def start(run):
+        path = str(tmp_path / "d.sock")
+        server = daemon.make_server(path, run)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return path
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _call(path, argv, stdin=""):
+    out, err = io.StringIO(), io.StringIO()
+    code = forward(connect(path), argv, io.StringIO(stdin), out, err)
+    return code, out.getvalue(), err.getvalue()
+
+
+def test_forwards_argv_stdin_and_exit_code(serve):
+    def run(argv):
+        while True:
+            try:
+                line = input("> ")
+            except EOFError:
+                break
+            print(line.upper())
+        print(" ".join(argv), file=sys.stderr)
+        return 3
+
+    path = serve(run)
+    code, out, err = _call(path, ["a", "b"], "one\ntwo\n")
+    assert (code, out, err) == (3, "> ONE\n> TWO\n> ", "a b\n")
+
+
+def test_stdin_is_only_sent_when_read(serve):
+    path = serve(lambda argv: print(sys.stdin.readline().strip() if argv == ["read"] else "skip"))
+    untouched = io.StringIO("keep\n")
+    assert forward(connect(path), ["no"], untouched, io.StringIO(), io.StringIO()) == 0
+    assert untouched.read() == "keep\n"
+    assert _call(path, ["read"], "line\n") == (0, "line\n", "")
+
+
+def test_threads_started_by_a_request_use_its_streams(serve):
+    def run(argv):
+        # Like the session's stdin reader: input and output on a worker thread in the request's context
+        worker = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(lambda: print(sys.stdin.readline().strip().upper()),),
+            daemon=True,
+        )
+        worker.start()
+        worker.join(5)
+
+    path = serve(run)
+    assert _call(path, [], "hello\n") == (0, "HELLO\n", "")
+
+
+def test_session_typed_input_comes_from_the_client(serve, monkeypatch):
+    from src.lib.session import SessionConfig, run_session_async
+
+    monkeypatch.setenv("SPEECH_DRY_RUN", "1")
+
+    def run(argv):
+        lines = asyncio.run(run_session_async(SessionConfig(minutes=1, use_voice=False)))
+        print(len(lines), lines[0].split("] ", 1)[1])
+
+    path = serve(run)
+    code, out, _ = _call(path, [], "hello\n/done\n")
+    assert code == 0 and out.endswith("1 hello\n")
+
+
+def test_serves_clients_concurrently(serve):
+    both = threading.Barrier(2, timeout=5)
+
+    def run(argv):
+        both.wait()  # only passes if the two requests overlap
+        print(argv[0])
+
+    path = serve(run)
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.update({n: _call(path, [n])})) for n in ("x", "y")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert results == {"x": (0, "x\n", ""), "y": (0, "y\n", "")}
+
+
+def test_runs_the_cli_and_reports_usage_errors(serve):
+    from src.app.main import main
+
+    path = serve(main)
+    code, out, _ = _call(path, ["music", "dub"])
+    assert code == 0 and out == "Music: ambient\nMood: dub\n"
+    code, _, err = _call(path, ["--no-such-flag"])
+    assert code == 2 and "unrecognized arguments" in err
+
+
+def test_client_side_helpers(tmp_path):
+    assert connect(str(tmp_path / "none.sock")) is None
+    cwd = str(tmp_path)
+    assert absolute_paths(["diary", "--save", "out.txt", "--journal=j.jsonl"], cwd) == [
+        "diary",
+        "--save",
+        os.path.join(cwd, "out.txt"),
+        f"--journal={os.path.join(cwd, 'j.jsonl')}",
+    ]
+    assert absolute_paths(["build", "in.jsonl", "-o", "/abs/out"], cwd) == [
+        "build",
+        os.path.join(cwd, "in.jsonl"),
+        "-o",
+        "/abs/out",
+    ]
+
+
+def test_client_resolves_every_subcommands_paths(tmp_path):
+    cwd = str(tmp_path)
+
+    def at(*names):
+        return [os.path.join(cwd, n) for n in names]
+
+    assert absolute_paths(["transcribe", "--lang", "en-US", "rec/", "b/*.wav", "-o", "out.jsonl"], cwd) == [
+        "transcribe", "--lang", "en-US", *at("rec/", "b/*.wav"), "-o", *at("out.jsonl")
+    ]
+    assert absolute_paths(["build", "-", "--workers", "2", "-o", "out.jsonl"], cwd) == [
+        "build", "-", "--workers", "2", "-o", *at("out.jsonl")
+    ]
+    assert absolute_paths(["index", "notes", "diary.md", "--index", "idx"], cwd) == [
+        "index", *at("notes", "diary.md"), "--index", *at("idx")
+    ]
+    # Search terms aren't paths, but the index is
+    assert absolute_paths(["search", "呼吸", "-n", "5", "--index=idx"], cwd) == [
+        "search", "呼吸", "-n", "5", f"--index={at('idx')[0]}"
+    ]
+    assert absolute_paths(
+        ["export-audio", "t.txt", "-o", "o.wav", "--index", "o.json", "--cache-dir", "c", "--rate", "180"], cwd
+    ) == ["export-audio", *at("t.txt"), "-o", *at("o.wav"), "--index", *at("o.json"), "--cache-dir", *at("c"), "--rate", "180"]
+    # Prompt modes and free text stay as typed
+    assert absolute_paths(["diary", "notes.txt", "--lines", "t.txt"], cwd) == ["diary", "notes.txt", "--lines", *at("t.txt")]
@@ -18,3 +18,11 @@ def test_parse_save_with_arg():
     is_cmd, cmd = parse_command("/save out.txt")
     assert is_cmd is True
     assert cmd and cmd.name == "save" and cmd.arg == "out.txt"
+
+
+def test_parse_spoken_and_session_commands():
+    for text, name in [("スラッシュ ドーン", "done"), ("slash undo", "undo"), ("/pause", "pause"), ("/skip", "skip")]:
+        is_cmd, cmd = parse_command(text)
+        assert is_cmd is True
+        assert cmd and cmd.name == name
+    assert parse_command("/unknown") == (True, Command("help"))
@@ -0,0 +1,135 @@
+import json
+import os
+import stat
+
+from src.lib.journal import Journal, compact, finish_journal, recover, replay, transcript_path, write_atomic
+from src.lib.session import SessionConfig, SessionCore, config_from_journal
+
+
+class SilentOutput:
+    def say(self, text, wait=False):
+        pass
+
+    def chime(self, sound="Glass"):
+        pass
+
+    def interrupt(self):
+        pass
+
+
+def test_replay_applies_lines_and_undo(tmp_path):
+    path = str(tmp_path / "j.jsonl")
+    with Journal(path, fsync_interval=0) as j:
+        j.start(mode="test")
+        j.line("a")
+        j.line("b")
+        j.undo()
+        j.command("read")
+        j.line("c")
+        assert j.syncs == j.records == 6
+    state = replay(path)
+    assert state.lines == ["a", "c"]
+    assert state.config == {"mode": "test"}
+    assert not state.ended
+
+
+def test_torn_last_record_is_skipped_and_repaired(tmp_path):
+    path = tmp_path / "j.jsonl"
+    with Journal(str(path), fsync_interval=0) as j:
+        j.start()
+        j.line("kept")
+    with open(path, "ab") as f:
+        f.write(b'{"t": 1, "kind": "line", "te')
+    assert replay(str(path)).lines == ["kept"]
+    with Journal(str(path), fsync_interval=0) as j:
+        j.line("after")
+    assert replay(str(path)).lines == ["kept", "after"]
+    json.loads(path.read_text().splitlines()[-1])
+
+
+def test_recover_only_unfinished_sessions(tmp_path):
+    path = str(tmp_path / "j.jsonl")
+    assert recover(path) is None
+    j = Journal(path)
+    j.start()
+    j.line("x")
+    j.close()
+    assert recover(path).lines == ["x"]
+    with Journal(path) as j:
+        j.end()
+    assert recover(path) is None
+
+
+def test_batched_fsync_coalesces_records(tmp_path):
+    path = str(tmp_path / "j.jsonl")
+    j = Journal(path, fsync_interval=5.0)
+    for i in range(100):
+        j.line(str(i))
+    assert j.syncs == 0
+    j.close()
+    assert j.syncs == 1
+    assert len(replay(path).lines) == 100
+
+
+def test_write_atomic_and_compact(tmp_path):
+    out = tmp_path / "out.txt"
+    out.write_text("old")
+    write_atomic(str(out), "new")
+    assert out.read_text() == "new"
+    path = str(tmp_path / "j.jsonl")
+    with Journal(path) as j:
+        j.start()
+        j.line("one")
+        j.line("two")
+    compact(path, str(out))
+    assert out.read_text() == "one\ntwo"
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".tmp-")] == []
+
+
+def test_write_atomic_keeps_permissions(tmp_path):
+    from src.lib import journal
+
+    kept = tmp_path / "kept.txt"
+    kept.write_text("old")
+    os.chmod(kept, 0o640)
+    write_atomic(str(kept), "new")
+    assert stat.S_IMODE(os.stat(kept).st_mode) == 0o640
+    # A new file gets the umask's default rather than mkstemp's 0600
+    fresh = tmp_path / "fresh.txt"
+    write_atomic(str(fresh), "text")
+    assert stat.S_IMODE(os.stat(fresh).st_mode) == 0o666 & ~journal._UMASK
+
+
+def test_finished_journal_is_compacted_into_its_transcript(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    j = Journal(path, fsync_interval=0)
+    j.start()
+    j.line("one")
+    j.line("two")
+    j.undo()
+    assert finish_journal(j) == str(tmp_path / "session.transcript.txt") == transcript_path(path)
+    assert (tmp_path / "session.transcript.txt").read_text() == "one"
+    assert not (tmp_path / "session.jsonl").exists()
+
+
+def test_session_core_recovers_lines_and_remaining_time(tmp_path):
+    path = str(tmp_path / "j.jsonl")
+    cfg = SessionConfig(minutes=2, use_voice=False, journal_path=path, fsync_interval=0)
+    core = SessionCore(cfg, SilentOutput(), Journal(path, 0))
+    core.begin(0.0)
+    core.handle("first", 1.0)
+    core.journal.close()  # crash: no end record
+
+    state = recover(path)
+    assert state is not None and len(state.lines) == 1
+    cfg2 = config_from_journal(state, path)
+    assert cfg2.minutes == 2 and cfg2.journal_path == path
+    core2 = SessionCore(cfg2, SilentOutput(), Journal(path, 0), state)
+    core2.begin(100.0)
+    assert 100.0 + 120.0 - 1.0 <= core2.end_at <= 100.0 + 120.0
+    core2.handle("second", 101.0)
+    core2.handle("/done", 102.0)
+    assert [line.split("] ", 1)[1] for line in core2.lines] == ["first", "second"]
+    assert recover(path) is None
+    with open(transcript_path(path), encoding="utf-8") as f:
+        assert f.read() == "\n".join(core2.lines)
@@ -1,4 +1,5 @@
-from src.lib.prompt_builder import build_prompt
+from src.lib import templates
+from src.lib.prompt_builder import build_prompt, iter_prompt
 
 
 def test_chat_seed_only():
@@ -24,3 +25,32 @@ def test_music():
 def test_image():
     out = build_prompt("image", {"subject": "cat", "style": "cartoon"})
     assert out == "Image: cat\nStyle: cartoon"
+
+
+def test_iter_prompt_matches_build_prompt(monkeypatch):
+    monkeypatch.setattr(templates, "STREAM_CHUNK_CHARS", 10)
+    lines = [" first ", None, "", "二行目", "third line"] * 5
+    cases = [
+        ("chat", {"lines": lines}),
+        ("chat", {"lines": [], "seed": " s "}),
+        ("chat", {}),
+        ("diary", {"title": "My Day", "body": "It was fine."}),
+        ("nope", {"seed": "x"}),
+    ]
+    for mode, data in cases:
+        assert "".join(iter_prompt(mode, data)) == build_prompt(mode, data)
+    chunks = list(iter_prompt("chat", {"lines": iter(lines)}))
+    assert len(chunks) > 1 and "".join(chunks) == build_prompt("chat", {"lines": lines})
+    # An iterable is always "some lines", as with build_prompt: no seed fallback
+    assert "".join(iter_prompt("chat", {"lines": iter([]), "seed": "s"})) == build_prompt("chat", {"lines": iter([]), "seed": "s"})
+
+
+def test_cli_streams_a_transcript_file(tmp_path, capsys):
+    from src.app.main import main
+
+    transcript = tmp_path / "t.txt"
+    transcript.write_text("[2026-01-01T09:00:00] one \n\n two\n", encoding="utf-8")
+    main(["--lines", str(transcript), "--save", str(tmp_path / "out.txt")])
+    expected = build_prompt("chat", {"lines": transcript.read_text(encoding="utf-8").splitlines()})
+    assert capsys.readouterr().out == expected + "\n"
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == expected
@@ -0,0 +1,65 @@
+import threading
+
+from src.lib.readback import FIRST_CHUNK_CHARS, MAX_CHUNK_CHARS, chunk_text, read_back
+from src.lib.speech import FakeBackend, SpeechEngine
+
+
+def test_chunks_split_at_japanese_and_latin_sentences():
+    text = "今日は晴れでした。散歩に行きました！楽しかった？\nHello there. " + "長い文、" * 60 + "おわり。"
+    chunks = chunk_text(text)
+    assert chunks[0] == "今日は晴れでした。\n散歩に行きました！\n楽しかった？\nHello there."
+    assert len(chunks[0]) <= FIRST_CHUNK_CHARS
+    assert all(len(c) <= MAX_CHUNK_CHARS for c in chunks)
+    # Long sentences break after 、 rather than mid-word
+    assert all(c.endswith(("、", "。", "？", ".")) for c in chunks)
+    assert "".join(chunks).replace("\n", "").replace(" ", "") == text.replace("\n", "").replace(" ", "")
+
+
+def test_first_chunk_is_bounded_however_long_the_transcript():
+    lines = [f"[2024-01-01T10:{i % 60:02d}:00] line number {i} of a long transcript." for i in range(2000)]
+    chunks = chunk_text("\n".join(lines))
+    assert len(chunks[0]) <= FIRST_CHUNK_CHARS
+    assert chunk_text("") == [] and chunk_text("short") == ["short"]
+
+
+class _PreparingBackend(FakeBackend):
+    def __init__(self) -> None:
+        super().__init__(seconds_per_char=0.002)
+        self.events = []
+        self._lock = threading.Lock()
+
+    def prepare(self, text, voice, rate):
+        with self._lock:
+            self.events.append(("prepare", text))
+
+    def speak(self, text, voice, rate, cancelled=None):
+        ok = super().speak(text, voice, rate, cancelled)
+        with self._lock:
+            self.events.append(("end", text))
+        return ok
+
+
+def test_next_chunk_is_prepared_while_the_current_one_plays():
+    backend = _PreparingBackend()
+    engine = SpeechEngine(backend)
+    text = "。".join(f"文{i}" * 8 for i in range(10)) + "。"
+    chunks = chunk_text(text)
+    assert read_back(text, say=lambda chunk, **kw: bool(engine.say(chunk))) == len(chunks) > 2
+    assert engine.wait(timeout=5)
+    engine.close()
+    events = backend.events
+    for current, upcoming in zip(chunks, chunks[1:]):
+        assert events.index(("prepare", upcoming)) < events.index(("end", current))
+
+
+def test_stop_drops_the_rest_of_the_readback():
+    backend = FakeBackend(seconds_per_char=0.01)
+    engine = SpeechEngine(backend)
+    for chunk in chunk_text("一つ目の文です。二つ目の文です。" * 20):
+        engine.say(chunk)
+    while not engine.speaking:
+        pass
+    assert engine.flush() > 1
+    assert engine.wait(timeout=5)
+    assert len(backend.spoken) == 1
+    engine.close()
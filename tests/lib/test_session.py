@@ -0,0 +1,174 @@
+import asyncio
+import io
+import threading
+import time
+
+from src.lib.session import (
+    MSG_ACK,
+    MSG_END,
+    MSG_PAUSED,
+    MSG_PROMPT,
+    MSG_RESUMED,
+    MSG_START,
+    MSG_UNDONE,
+    SessionConfig,
+    SessionCore,
+    run_session_async,
+)
+
+
+class RecordingOutput:
+    def __init__(self):
+        self.events = []
+
+    def say(self, text, wait=False):
+        self.events.append((time.monotonic(), "say", text))
+
+    def chime(self, sound="Glass"):
+        self.events.append((time.monotonic(), "chime", sound))
+
+    def interrupt(self):
+        pass
+
+    def said(self):
+        return [e[2] for e in self.events if e[1] == "say"]
+
+
+def test_core_prompts_on_interval_and_ends_at_deadline():
+    out = RecordingOutput()
+    core = SessionCore(SessionConfig(minutes=1, interval_sec=20), out)
+    core.begin(0.0)
+    assert core.tick(0.0)
+    assert core.next_deadline() == 20.0
+    assert core.tick(19.9)
+    assert core.tick(20.0)
+    assert core.tick(59.0)
+    assert core.tick(60.0) is False
+    assert out.said() == [MSG_START, MSG_PROMPT, MSG_PROMPT, MSG_PROMPT, MSG_END]
+
+
+def test_core_commands():
+    out = RecordingOutput()
+    core = SessionCore(SessionConfig(minutes=1, interval_sec=20), out)
+    core.begin(0.0)
+    core.tick(0.0)
+    core.handle("first", 1.0)
+    core.handle("second", 2.0)
+    core.handle("/undo", 3.0)
+    assert core.next_deadline() == 20.0
+    core.handle("/done", 6.0)
+    assert core.done and core.tick(7.0) is False
+    assert [line.split("] ", 1)[1] for line in core.lines] == ["first"]
+    assert out.said()[2:5] == [MSG_ACK, MSG_ACK, MSG_UNDONE]
+    assert out.said()[-1] == MSG_END
+
+
+def test_core_pause_holds_prompts_until_resume():
+    out = RecordingOutput()
+    core = SessionCore(SessionConfig(minutes=1, interval_sec=20), out)
+    core.begin(0.0)
+    core.tick(0.0)
+    core.handle("スラッシュ ポーズ", 1.0)
+    assert core.paused and core.next_deadline() == 60.0
+    core.tick(30.0)
+    core.handle("/resume", 31.0)
+    core.tick(31.0)
+    assert out.said()[2:] == [MSG_PAUSED, MSG_RESUMED, MSG_PROMPT]
+
+
+def test_async_runner_fires_prompts_on_time_without_input():
+    out = RecordingOutput()
+
+    async def scenario():
+        inbox = asyncio.Queue()
+        task = asyncio.ensure_future(
+            run_session_async(SessionConfig(minutes=1, interval_sec=1), inbox, out)
+        )
+        await asyncio.sleep(1.3)
+        inbox.put_nowait("hello")
+        inbox.put_nowait(None)  # end of input
+        return await task
+
+    start = time.monotonic()
+    lines = asyncio.run(scenario())
+    prompts = [t - start for t, kind, text in out.events if text == MSG_PROMPT]
+    assert len(prompts) == 2
+    assert abs(prompts[1] - prompts[0] - 1.0) < 0.1
+    assert len(lines) == 1 and lines[0].endswith("] hello")
+    assert out.said()[-1] == MSG_END
+
+
+def test_stdin_reader_outlives_the_session_quietly(monkeypatch):
+    import os
+    import sys
+    import threading
+
+    read_fd, write_fd = os.pipe()
+    monkeypatch.setattr(sys, "stdin", os.fdopen(read_fd, "r"))
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    os.write(write_fd, b"hello\n/done\n")
+    lines = asyncio.run(run_session_async(SessionConfig(minutes=1, use_voice=False), None, RecordingOutput()))
+    assert len(lines) == 1
+    # The reader is blocked in input() again; a line after the loop closed must not blow up
+    (reader,) = [t for t in threading.enumerate() if t.name == "session-stdin"]
+    os.write(write_fd, b"late\n")
+    reader.join(5)
+    os.close(write_fd)
+    assert not reader.is_alive() and errors == []
+
+
+def test_greeting_and_farewell_do_not_block_the_loop(monkeypatch):
+    from src.lib import session
+    from src.lib.speech import FakeBackend, SpeechEngine, set_engine
+
+    monkeypatch.delenv("SPEECH_DRY_RUN", raising=False)
+    monkeypatch.setattr(session, "chime", lambda sound="Glass": None)
+    backend = FakeBackend(seconds_per_char=0.01)  # the greeting takes ~0.3 s
+    engine = SpeechEngine(backend)
+    previous = set_engine(engine)
+    cfg = SessionConfig(minutes=1, use_voice=True)
+
+    async def scenario():
+        gaps = []
+
+        async def ticker():
+            while True:
+                t0 = time.monotonic()
+                await asyncio.sleep(0.01)
+                gaps.append(time.monotonic() - t0)
+
+        tick = asyncio.ensure_future(ticker())
+        inbox = asyncio.Queue()
+        inbox.put_nowait("/done")
+        await run_session_async(cfg, inbox, session.SpeechOutput(cfg))
+        tick.cancel()
+        return gaps
+
+    try:
+        start = time.monotonic()
+        gaps = asyncio.run(scenario())
+        elapsed = time.monotonic() - start
+    finally:
+        set_engine(previous)
+        engine.close()
+    said = [t for t, _, _ in backend.spoken]
+    assert said[0] == MSG_START and said[-1] == MSG_END
+    # Both messages were waited for, while the loop kept running
+    assert elapsed > 0.5 and max(gaps, default=elapsed) < 0.2
+
+
+def test_recognized_speech_interrupts_our_own(monkeypatch):
+    class Interruptible(RecordingOutput):
+        def interrupt(self):
+            self.events.append((time.monotonic(), "interrupt", threading.current_thread().name))
+
+    monkeypatch.setenv("STT_DRY_RUN", "1")
+    monkeypatch.setenv("STT_DRY_RUN_SCRIPT", "hello|/done")
+    monkeypatch.setattr("sys.stdin", io.StringIO(""))  # closed stdin doesn't end a voice session
+    out = Interruptible()
+    cfg = SessionConfig(minutes=1, use_voice=False, use_voice_input=True)
+    lines = asyncio.run(run_session_async(cfg, None, out))
+    assert len(lines) == 1 and lines[0].endswith("] hello")
+    # Each phrase barges in as soon as it was captured, rather than being dropped while we talk
+    assert any(kind == "interrupt" and thread == "stt-capture" for _, kind, thread in out.events)
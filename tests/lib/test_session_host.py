@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+from src.lib import websocket
+from src.lib.session import MSG_ACK, MSG_END, MSG_SAVED, MSG_START
+from src.lib.session_host import SessionHost
+
+
+async def _messages_until(ws, kind):
+    seen = []
+    while True:
+        raw = await ws.recv()
+        assert raw is not None, f"closed before {kind}: {seen}"
+        message = json.loads(raw)
+        seen.append(message)
+        if message["type"] == kind:
+            return seen
+
+
+async def _session(port, index):
+    ws = await websocket.connect("127.0.0.1", port, "/session")
+    ws.send(json.dumps({"type": "start", "minutes": 5, "interval_sec": 3600}))
+    ws.send(json.dumps({"type": "text", "text": f"こんにちは {index}"}))
+    ws.send(json.dumps({"type": "text", "text": "/save ../../etc/passwd"}))
+    seen = await _messages_until(ws, "transcript")
+    ws.send(json.dumps({"type": "text", "text": "/done"}))
+    seen += await _messages_until(ws, "end")
+    assert await ws.recv() is None  # host closes after the end message
+    return seen
+
+
+def test_concurrent_sessions_are_independent():
+    async def main():
+        host = SessionHost()
+        server = await host.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        results = await asyncio.gather(*(_session(port, i) for i in range(40)))
+        server.close()
+        return host, results
+
+    host, results = asyncio.run(main())
+    for i, seen in enumerate(results):
+        says = [m["text"] for m in seen if m["type"] == "say"]
+        assert says[0] == MSG_START and MSG_ACK in says and MSG_SAVED in says and says[-1] == MSG_END
+        # /save hands the transcript to the browser; nothing is written on the host
+        transcript = next(m for m in seen if m["type"] == "transcript")
+        end = next(m for m in seen if m["type"] == "end")
+        assert len(end["lines"]) == 1 and end["lines"][0].endswith(f"こんにちは {i}")
+        assert transcript["lines"] == end["lines"]
+    assert host.stats.started == host.stats.finished == 40
+    assert host.stats.active == 0 and host.stats.turns == 120
+
+
+def test_host_rejects_sessions_over_capacity_and_bad_starts():
+    async def main():
+        host = SessionHost(max_sessions=1)
+        server = await host.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        first = await websocket.connect("127.0.0.1", port, "/session")
+        first.send(json.dumps({"type": "start"}))
+        await _messages_until(first, "say")
+        second = await websocket.connect("127.0.0.1", port, "/session")
+        full = json.loads(await second.recv())
+        assert await second.recv() is None
+        first.send("not json")
+        bad = (await _messages_until(first, "error"))[-1]
+        await first.close()
+        third = await websocket.connect("127.0.0.1", port, "/session")
+        third.send(json.dumps({"type": "text", "text": "hi"}))
+        no_start = json.loads(await third.recv())
+        await second.close()
+        await third.close()
+        server.close()
+        return host, full, bad, no_start
+
+    host, full, bad, no_start = asyncio.run(main())
+    assert full["type"] == bad["type"] == no_start["type"] == "error"
+    assert host.stats.rejected == 1
+
+
+def test_frames_round_trip_masked_and_fragmented():
+    async def main():
+        received = []
+
+        async def echo(reader, writer):
+            ws = await websocket.accept(reader, writer, "/")
+            while True:
+                text = await ws.recv()
+                if text is None:
+                    return
+                received.append(text)
+                ws.send(text)
+
+        server = await asyncio.start_server(echo, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        ws = await websocket.connect("127.0.0.1", port, "/")
+        big = "あ" * 30000  # 90 KB in UTF-8: over the 64 KiB limit
+        # Fragmented text message: TEXT without FIN, then a final continuation
+        first = bytearray(websocket.encode_frame(websocket.OP_TEXT, "前半".encode(), mask=True))
+        first[0] &= 0x7F
+        ws.writer.write(bytes(first) + websocket.encode_frame(websocket.OP_CONT, "後半".encode(), mask=True))
+        echoed = await ws.recv()
+        ws.send(big)
+        closed = await ws.recv()
+        await ws.close()
+        server.close()
+        return received, echoed, closed
+
+    received, echoed, closed = asyncio.run(main())
+    assert received == ["前半後半"] and echoed == "前半後半"
+    assert closed is None
+
+
+def test_pending_starts_hold_slots_and_silent_closers_are_cut_off():
+    async def main():
+        host = SessionHost(max_sessions=1, close_timeout=0.2)
+        server = await host.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        # Neither has sent "start" yet: the second must still be turned away
+        first = await websocket.connect("127.0.0.1", port, "/session")
+        second = await websocket.connect("127.0.0.1", port, "/session")
+        full = json.loads(await second.recv())
+        first.send(json.dumps({"type": "start"}))
+        first.send(json.dumps({"type": "text", "text": "/done"}))
+        await _messages_until(first, "end")
+        # Never answer the host's close; it drops the connection after close_timeout
+        for _ in range(50):
+            if host.stats.active == 0:
+                break
+            await asyncio.sleep(0.05)
+        active = host.stats.active
+        await first.close()
+        await second.close()
+        server.close()
+        return host, full, active
+
+    host, full, active = asyncio.run(main())
+    assert full["type"] == "error" and host.stats.rejected == 1
+    assert active == 0 and host.stats.finished == 1
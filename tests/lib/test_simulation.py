@@ -0,0 +1,44 @@
+import random
+import time
+
+from src.lib.session import MSG_ACK, MSG_END, MSG_PAUSED, MSG_PROMPT, MSG_RESUMED, SessionConfig
+from src.lib.simulation import SimResult, check, random_script, simulate
+
+
+def test_hour_long_session_runs_on_virtual_time():
+    cfg = SessionConfig(minutes=60, interval_sec=60, use_voice=False)
+    script = [(5.0, "hello"), (125.5, "/pause"), (300.0, "/resume"), (301.0, "world"), (400.0, "/undo")]
+    t0 = time.perf_counter()
+    result = simulate(cfg, script)
+    assert time.perf_counter() - t0 < 1.0
+    assert result.ended_at == 3600.0 and result.said()[-1] == (3600.0, MSG_END)
+    assert result.lines == ["[2026-01-01T09:00:05] hello"]
+    prompts = result.prompts()
+    # Every minute until the pause, again right at /resume, then every minute from there
+    assert prompts[:3] == [0.0, 60.0, 120.0] and prompts[3] == 300.0 and prompts[-1] == 3540.0
+    assert (125.5, MSG_PAUSED) in result.said() and (300.0, MSG_RESUMED) in result.said()
+    assert (5.0, MSG_ACK) in result.said()
+    assert check(result, cfg) == []
+
+
+def test_end_of_input_finishes_early():
+    cfg = SessionConfig(minutes=30, interval_sec=60, use_voice=False)
+    result = simulate(cfg, [(90.0, "one"), (95.0, None)])
+    assert result.ended_at == 95.0 and len(result.lines) == 1
+    assert check(result, cfg) == []
+
+
+def test_random_scenarios_keep_the_session_rules():
+    rng = random.Random(20261018)
+    for _ in range(200):
+        cfg = SessionConfig(minutes=rng.randint(1, 60), interval_sec=rng.choice((5, 30, 60, 90)), use_voice=False)
+        result = simulate(cfg, random_script(rng, cfg))
+        assert check(result, cfg) == []
+
+
+def test_check_reports_a_missing_prompt():
+    cfg = SessionConfig(minutes=5, interval_sec=60, use_voice=False)
+    result = simulate(cfg)
+    dropped = [e for e in result.events if not (e.text == MSG_PROMPT and e.at == 120.0)]
+    problems = check(SimResult(dropped, result.lines, result.ended_at), cfg)
+    assert problems and "120.000s" in problems[0]
@@ -1,4 +1,5 @@
 import os
+import time
 
 from src.lib.speech import speak, chime, is_mac
 
@@ -20,3 +21,100 @@ def test_speak_disabled():
 def test_chime_disabled():
     assert chime(enabled=False) is False
 
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_engine_speaks_in_priority_order():
+    from src.lib.speech import FakeBackend, SpeechEngine, PRIORITY_HIGH, PRIORITY_LOW
+
+    backend = FakeBackend(seconds_per_char=0.01)
+    engine = SpeechEngine(backend)
+    engine.say("first")
+    assert _wait_until(lambda: engine.speaking)
+    engine.say("later", priority=PRIORITY_LOW)
+    engine.say("urgent", priority=PRIORITY_HIGH)
+    assert engine.wait(timeout=5)
+    assert [t for t, _, _ in backend.spoken] == ["first", "urgent", "later"]
+    engine.close()
+
+
+def test_engine_flush_cancels_queue_and_current():
+    from src.lib.speech import FakeBackend, SpeechEngine
+
+    backend = FakeBackend(seconds_per_char=1.0)
+    engine = SpeechEngine(backend)
+    current = engine.say("long utterance")
+    queued = engine.say("never spoken")
+    assert _wait_until(lambda: engine.speaking)
+    assert engine.flush() == 2
+    assert current.wait(timeout=5) is False
+    assert queued.wait(timeout=5) is False
+    assert engine.wait(timeout=5)
+    assert [t for t, _, _ in backend.spoken] == ["long utterance"]
+    engine.close()
+
+
+def test_flush_before_playback_starts_is_not_lost():
+    import threading
+
+    from src.lib.speech import FakeBackend, SpeechEngine
+
+    class SlowStart(FakeBackend):
+        """Takes a while to become interruptible, like `say` starting up."""
+
+        def __init__(self):
+            super().__init__(seconds_per_char=1.0)
+            self.entered = threading.Event()
+            self.release = threading.Event()
+
+        def speak(self, text, voice, rate, cancelled=None):
+            self.entered.set()
+            self.release.wait(5)
+            return super().speak(text, voice, rate, cancelled)
+
+    backend = SlowStart()
+    engine = SpeechEngine(backend)
+    utt = engine.say("long utterance")
+    assert backend.entered.wait(5)
+    engine.flush()
+    backend.release.set()
+    assert utt.wait(timeout=2) is False and utt.done.is_set()
+    assert backend.spoken == []
+    engine.close()
+
+
+def test_speak_is_sync_wrapper_over_engine(monkeypatch):
+    from src.lib.speech import FakeBackend, SpeechEngine, set_engine, speak_async
+
+    monkeypatch.delenv("SPEECH_DRY_RUN", raising=False)
+    backend = FakeBackend()
+    engine = SpeechEngine(backend)
+    previous = set_engine(engine)
+    try:
+        assert speak("hello", voice="Alex", rate=190) is True
+        assert speak_async("bye") is True
+        assert engine.wait(timeout=5)
+    finally:
+        set_engine(previous)
+    assert backend.spoken == [("hello", "Alex", 190), ("bye", None, None)]
+
+
+def test_chime_plays_preloaded_cue(monkeypatch):
+    from src.lib.cues import CueBank, CuePlayer, MemorySink, set_player
+
+    monkeypatch.delenv("SPEECH_DRY_RUN", raising=False)
+    sink = MemorySink()
+    bank = CueBank()
+    previous = set_player(CuePlayer(bank, sink))
+    try:
+        assert chime(sound="Pop") is True
+    finally:
+        set_player(previous)
+    assert sink.played == [("Pop", bank.get("Pop").wav)]
@@ -16,3 +16,170 @@ def test_stt_no_dep_graceful(monkeypatch):
     # We can't enforce library absence here; just call and ensure it returns a string.
     out = transcribe_once(lang="en-US", timeout=0.1, phrase_time_limit=0.1)
     assert isinstance(out, str)
+
+
+def _write_wav(path, rate=16000, pattern=((0.5, 0), (0.4, 8000), (0.8, 0), (0.3, 8000), (0.7, 0))):
+    import math
+    import struct
+    import wave
+
+    frames = bytearray()
+    for seconds, amp in pattern:
+        for i in range(int(seconds * rate)):
+            frames += struct.pack("<h", int(amp * math.sin(2 * math.pi * 440 * i / rate)))
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+
+
+def test_listener_scripted_source_in_order():
+    from src.lib.stt import ScriptedSource, StreamingListener
+
+    with StreamingListener(ScriptedSource(["one", "", "two"])) as listener:
+        assert list(listener) == ["one", "two"]
+        assert listener.exhausted
+
+
+def test_listener_segments_wav_file(tmp_path):
+    from src.lib.stt import ScriptedBackend, StreamingListener, WavFileSource
+
+    wav = tmp_path / "two_phrases.wav"
+    _write_wav(wav)
+    backend = ScriptedBackend(["first", "second"])
+    with StreamingListener(WavFileSource(str(wav)), backend) as listener:
+        assert list(listener) == ["first", "second"]
+    # Each phrase starts with 0.5 s of pre-roll before the detected onset
+    onsets = [round(seg.offset + seg.metrics.preroll, 1) for seg in backend.segments]
+    assert onsets == [0.5, 1.7]
+    assert all(0.45 <= seg.metrics.preroll <= 0.5 for seg in backend.segments)
+    assert 0.35 <= backend.segments[0].duration - backend.segments[0].metrics.preroll <= 0.45
+    assert not any(seg.metrics.clipped_start for seg in backend.segments)
+
+
+def test_ring_buffer_keeps_the_latest_bytes():
+    from src.lib.stt import RingBuffer
+
+    ring = RingBuffer(5)
+    ring.write(b"ab")
+    assert ring.getvalue() == b"ab" and len(ring) == 2
+    ring.write(b"cde")
+    ring.write(b"fg")
+    assert ring.getvalue() == b"cdefg"
+    ring.write(b"0123456789")
+    assert ring.getvalue() == b"56789"
+
+
+def _phrases(path, **kwargs):
+    from src.lib.stt import WavFileSource
+
+    source = WavFileSource(str(path), **kwargs)
+    source.open()
+    source.calibrate()
+    out = []
+    try:
+        while True:
+            out.append(source.next_phrase(0))
+    except EOFError:
+        return out
+    finally:
+        source.close()
+
+
+def test_endpointing_adapts_to_the_speaker(tmp_path):
+    # A long halting thought: 0.45 s pauses between words, 9 s in all; a
+    # fixed 0.5 s endpoint would barely hold it and a 6 s limit would cut it
+    halting = tmp_path / "halting.wav"
+    _write_wav(halting, rate=8000, pattern=((0.5, 0),) + ((0.5, 8000), (0.45, 0)) * 10 + ((2.0, 0),))
+    (thought,) = _phrases(halting)
+    assert not thought.metrics.cut_off and thought.duration > 9.0
+    assert thought.metrics.trailing_silence > 0.6 and thought.metrics.end_latency > 0.6
+
+    # The same with 60 ms gaps between syllables: those aren't pauses
+    word = ((0.2, 8000), (0.06, 0)) * 3 + ((0.2, 8000),)
+    syllables = tmp_path / "syllables.wav"
+    _write_wav(syllables, rate=8000, pattern=((0.5, 0),) + (word + ((0.45, 0),)) * 8 + ((2.0, 0),))
+    (thought,) = _phrases(syllables)
+    assert thought.duration > 8.0 and thought.metrics.trailing_silence > 0.6
+
+    # Quick answers with short gaps end sooner than the initial 0.5 s
+    quick = tmp_path / "quick.wav"
+    _write_wav(quick, rate=8000, pattern=((0.5, 0),) + ((0.3, 8000), (0.2, 0)) * 3 + ((1.0, 0),))
+    (answer,) = _phrases(quick)
+    assert answer.metrics.end_latency < 0.4
+
+    # Speech already under way when capture starts, and a runaway phrase
+    clipped = tmp_path / "clipped.wav"
+    _write_wav(clipped, rate=8000, pattern=((3.0, 8000), (0.6, 0)))
+    (cut, rest) = _phrases(clipped, calibration_sec=0.0, max_phrase_sec=2.0)
+    assert cut.metrics.clipped_start and cut.metrics.preroll == 0.0 and cut.metrics.cut_off
+    assert round(cut.duration, 1) == 2.0 and not rest.metrics.cut_off
+    # Speech carried on across the cut, so the rest has no onset either
+    assert rest.metrics.clipped_start
+
+
+def test_microphone_calibration_becomes_preroll():
+    from src.lib.stt import Endpointer
+
+    ep = Endpointer(8000, preroll_sec=0.5)
+    ep.calibrate(bytes(2 * 2400), consumed=True)  # 0.3 s of silence read off the stream
+    loud = (b"\x00\x40" * (ep.frame_bytes // 2))
+    assert ep.push(loud) is None
+    segment = ep.flush()
+    assert segment.metrics.preroll == 0.3 and not segment.metrics.clipped_start
+    assert segment.offset == 0.0
+
+
+def test_listener_gate_drops_phrases():
+    from src.lib.stt import ScriptedSource, StreamingListener
+
+    with StreamingListener(ScriptedSource(["echo"]), gate=lambda: True) as listener:
+        assert listener.get(timeout=5) is None
+        assert listener.exhausted
+
+
+def test_open_listener_dry_run_script(monkeypatch):
+    from src.lib.stt import open_listener
+
+    monkeypatch.setenv("STT_DRY_RUN", "1")
+    monkeypatch.setenv("STT_DRY_RUN_SCRIPT", "hello|/done")
+    listener = open_listener("ja-JP")
+    assert list(listener) == ["hello", "/done"]
+
+
+def test_backend_registry_loads_once(monkeypatch):
+    from src.lib import stt
+
+    loads = []
+
+    class Echo:
+        name = "echo"
+
+        def load(self):
+            loads.append(1)
+
+        def transcribe(self, segment, lang):
+            return stt.Transcript(f"{len(segment.pcm)} bytes", 0.5)
+
+    monkeypatch.setattr(stt, "_REGISTRY", dict(stt._REGISTRY))
+    monkeypatch.setattr(stt, "_LOADED", {})
+    stt.register_backend("echo", Echo)
+    assert "echo" in stt.backend_names()
+    first = stt.get_backend("echo")
+    assert stt.get_backend("echo") is first
+    assert loads == [1]
+    assert first.transcribe(stt.AudioSegment(b"\0" * 4, 16000), "ja-JP").text == "4 bytes"
+
+
+def test_backend_load_failure_is_runtime_error(monkeypatch):
+    from src.lib import stt
+
+    monkeypatch.setattr(stt, "_LOADED", {})
+    monkeypatch.delenv("VOSK_MODEL", raising=False)
+    try:
+        stt.get_backend("vosk")
+    except RuntimeError as e:
+        assert "vosk" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+
+from benchmarks.legacy_prompt import legacy_build_prompt
+from src.lib.prompt_builder import build_prompt, build_prompts
+from src.lib.templates import TemplateError, TemplateRegistry, compile_template, default_registry
+
+
+def test_builtin_modes_match_legacy_output():
+    values = [None, "", "  x  ", "日本語\n", 0, 145, 12.5, True]
+    keys = ["seed", "title", "body", "genre", "bpm", "mood", "subject", "style"]
+    modes = ["chat", "diary", "music", "image", " Diary ", "MUSIC", "other", "", None]
+    for mode in modes:
+        for key, value in itertools.product(keys, values):
+            for data in ({key: value}, {key: value, "seed": " s "}):
+                try:
+                    expected = legacy_build_prompt(mode, data)
+                except AttributeError:
+                    continue  # legacy .strip() on a number
+                assert build_prompt(mode, data) == expected, (mode, data)
+    assert build_prompt("chat", {"lines": [" a ", None, "b"]}) == "a\nb"
+    assert build_prompt("music", {}) == legacy_build_prompt("music", {})
+
+
+def test_template_syntax():
+    render = compile_template("{a|b|'-':upper}{[ ({n})]} {{x}}")
+    assert render({"b": "hi", "n": 2}) == "HI (2) {x}"
+    assert render({"n": 0}) == "- {x}"
+    for bad in ["{", "{a b}", "{[ {a}", "{a:nope}", "}"]:
+        with pytest.raises(TemplateError):
+            compile_template(bad)
+
+
+def test_registry_loads_files_and_caches(tmp_path):
+    (tmp_path / "haiku.tmpl").write_text("Haiku about {topic|seed:strip}\n", encoding="utf-8")
+    registry = default_registry()
+    assert registry.load_dir(str(tmp_path)) == ["haiku"]
+    assert "haiku" in registry.modes()
+    assert registry.render("haiku", {"topic": " rain "}) == "Haiku about rain"
+
+
+def test_cacheable_renderers_are_memoized_and_bounded():
+    calls = []
+
+    def slow(data):
+        calls.append(data)
+        return repr(data.get("x"))
+
+    registry = TemplateRegistry(cache_size=2)
+    registry.register("t", slow, cache=True)
+    for x in [1, 1, 2, 3, 1]:
+        registry.render("t", {"x": x})
+    assert (registry.hits, registry.misses) == (1, 4) and len(calls) == 4
+    assert len(registry._cache) == 2
+    # 1 and True are equal keys in a dict, but render differently
+    assert registry.render("t", {"x": True}) == "True"
+    registry.render("t", {"x": [1]})  # unhashable data is rendered, not cached
+    assert len(calls) == 6
+
+
+def test_render_many_matches_single_calls():
+    records = [{"subject": f"cat {i}"} for i in range(3)] + [None]
+    assert build_prompts("image", records) == [build_prompt("image", r) for r in records]
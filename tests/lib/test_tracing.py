@@ -0,0 +1,62 @@
+import json
+import threading
+
+from src.lib import tracing
+from src.lib.tracing import Histogram, format_summary, span, traced
+
+
+def test_histogram_percentiles_within_a_bucket():
+    hist = Histogram()
+    for ms in range(1, 101):
+        hist.add(ms * 1_000_000)
+    assert hist.count == 100
+    assert 50e-3 <= hist.percentile(50) <= 50e-3 * 1.2
+    assert 99e-3 <= hist.percentile(99) <= 100e-3
+    assert hist.percentile(100) == hist.max_ns / 1e9 == 0.1
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_spans_are_recorded_only_while_enabled(tmp_path):
+    @traced("work")
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4
+    with span("idle"):
+        pass
+    tracer = tracing.enable(events=True)
+    try:
+        assert work(3) == 6
+        with span("outer"):
+            threading.Thread(target=work, args=(1,), name="helper").start()
+            work(1)
+        summary = tracer.summary()
+        assert summary["work"]["count"] >= 2 and summary["outer"]["count"] == 1
+        assert "idle" not in summary
+        path = tmp_path / "trace.json"
+        tracer.write_chrome_trace(str(path))
+    finally:
+        tracing.disable()
+    events = json.loads(path.read_text())["traceEvents"]
+    assert {e["name"] for e in events if e["ph"] == "X"} == {"work", "outer"}
+    assert any(e["ph"] == "M" for e in events)
+    assert work(1) == 2 and tracing.get_tracer() is None
+
+
+def test_event_buffer_is_capped():
+    tracer = tracing.Tracer(events=True, max_events=3)
+    for i in range(5):
+        tracer.record("x", i, i + 10)
+    assert len(tracer.events) == 3 and tracer.dropped == 2
+    assert tracer.summary()["x"]["count"] == 5
+
+
+def test_format_summary_sorts_by_total_time():
+    text = format_summary(
+        {"fast": {"count": 1, "total": 0.1, "p50": 0.1, "p95": 0.1, "p99": 0.1, "max": 0.1},
+         "slow": {"count": 1, "total": 2.0, "p50": 2.0, "p95": 2.0, "p99": 2.0, "max": 2.0}},
+        {"tts cache": {"hits": 3}},
+    )
+    lines = text.splitlines()
+    assert lines[1].startswith("slow") and lines[2].startswith("fast")
+    assert lines[-1] == "tts cache: {'hits': 3}"
@@ -0,0 +1,85 @@
+import os
+import time
+
+from src.lib import transcript_index
+from src.lib.transcript_index import TranscriptIndex, expand_inputs
+
+
+def _write(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_search_finds_japanese_substrings_with_timestamps(tmp_path):
+    src = tmp_path / "notes"
+    src.mkdir()
+    _write(src / "a.txt", ["[2024-05-01T10:00:00] 今日は公園を散歩した。", "[2024-05-01T10:05:00] 猫がいた"])
+    _write(src / "b.md", ["[2024-06-01T09:00:00] また散歩、散歩、散歩", "ＡＢＣ Walking note"])
+    with TranscriptIndex(str(tmp_path / "index")) as index:
+        index.update(expand_inputs([str(src)]))
+        hits = index.search("散歩")
+        # More occurrences in a line rank higher
+        assert [(os.path.basename(h.path), h.lineno) for h in hits] == [("b.md", 1), ("a.txt", 1)]
+        assert hits[1].timestamp == time.mktime((2024, 5, 1, 10, 0, 0, 0, 0, -1))
+        assert hits[1].format().endswith("[2024-05-01T10:00:00] 今日は公園を散歩した。")
+        assert [h.text for h in index.search("猫")] == ["猫がいた"]
+        assert [h.text for h in index.search("公園 散歩した")] == ["今日は公園を散歩した。"]
+        # NFKC + lowercase on both sides; unstamped lines fall back to the file's mtime
+        walking = index.search("abc walk")
+        assert [h.text for h in walking] == ["ＡＢＣ Walking note"] and walking[0].approximate
+        assert index.search("散策") == [] and index.search("、") == []
+
+
+def test_update_is_incremental_and_merges_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_index, "MAX_SEGMENTS", 3)
+    src = tmp_path / "notes"
+    src.mkdir()
+    paths = [_write(src / f"{i}.txt", [f"[2024-01-0{i + 1}T10:00:00] 記録{i} ことば"]) for i in range(4)]
+    root = str(tmp_path / "index")
+    with TranscriptIndex(root) as index:
+        first = index.update(paths)
+    assert (first.added, first.lines, first.segments) == (4, 4, 1)
+
+    with TranscriptIndex(root) as index:
+        again = index.update(paths)
+        assert (again.unchanged, again.lines) == (4, 0)
+        for i in range(3):
+            os.utime(_write(src / f"{i}.txt", [f"[2024-02-0{i + 1}T10:00:00] 更新{i} ことば"]), (1e9 + i, 1e9 + i))
+            index.update(paths)
+        os.remove(paths[3])
+        last = index.update(paths)
+        assert last.removed == 1
+        texts = sorted(h.text for h in index.search("ことば"))
+        assert texts == ["更新0 ことば", "更新1 ことば", "更新2 ことば"]
+        assert index.search("記録") == []
+    segments = [n for n in os.listdir(root) if n.startswith("seg-")]
+    assert len(segments) <= 3
+    # A fresh reader sees the same thing through the manifest alone
+    with TranscriptIndex(root) as index:
+        assert len(index.search("更新")) == 3
+        rebuilt = index.update(paths[:3], rebuild=True)
+        assert (rebuilt.added, rebuilt.segments) == (3, 1)
+        assert len(index.search("更新")) == 3
+    # The old segments went with the rebuild
+    assert len([n for n in os.listdir(root) if n.startswith("seg-")]) == 1
+
+
+def test_small_changes_to_a_large_index_do_not_force_a_merge(tmp_path):
+    src = tmp_path / "notes"
+    src.mkdir()
+    paths = [_write(src / f"{i}.txt", [f"行{i}-{j} ことば" for j in range(5)]) for i in range(200)]
+    root = str(tmp_path / "index")
+    with TranscriptIndex(root) as index:
+        assert index.update(paths).lines == 1000
+        small = [_write(src / f"new{i}.txt", [f"新{i} ことば"]) for i in range(3)]
+        index.update(paths + small)
+        for i, path in enumerate(small):
+            os.utime(_write(src / f"new{i}.txt", [f"改{i} ことば"]), (1e9 + i, 1e9 + i))
+        changed = index.update(paths + small)
+        # Three dead lines out of a thousand: write only the three changed lines
+        assert (changed.changed, changed.lines, changed.merged) == (3, 3, False)
+        # Changing most of the archive does warrant a merge
+        for i in range(150):
+            os.utime(_write(src / f"{i}.txt", [f"改{i} ことば"]), (1e9 + i, 1e9 + i))
+        assert index.update(paths + small).merged
+        assert len(index.search("改", limit=200)) == 153
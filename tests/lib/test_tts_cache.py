@@ -0,0 +1,50 @@
+import os
+
+from src.lib.tts_cache import AudioCache, CachedBackend, FakeRenderer
+from src.lib.speech import FakeBackend
+
+
+def test_fetch_renders_once_then_hits(tmp_path):
+    renderer = FakeRenderer()
+    cache = AudioCache(str(tmp_path), renderer)
+    first = cache.fetch("受け取りました。", voice="Kyoko", rate=180)
+    second = cache.fetch("受け取りました。", voice="Kyoko", rate=180)
+    assert first == second and os.path.exists(first)
+    assert renderer.rendered == ["受け取りました。"]
+    stats = cache.snapshot()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_key_includes_voice_and_rate(tmp_path):
+    cache = AudioCache(str(tmp_path), FakeRenderer())
+    assert cache.key("a", "Kyoko", 180) != cache.key("a", "Kyoko", 200)
+    assert cache.key("a", "Kyoko", 180) != cache.key("a", "Alex", 180)
+
+
+def test_prewarm_is_deduplicated_and_survives_restart(tmp_path):
+    renderer = FakeRenderer()
+    cache = AudioCache(str(tmp_path), renderer)
+    assert cache.prewarm(["a", "b", "a", "c"]) == 3
+    assert sorted(renderer.rendered) == ["a", "b", "c"]
+
+    reopened = AudioCache(str(tmp_path), renderer)
+    assert reopened.get("b") is not None
+    assert reopened.snapshot()["entries"] == 3
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = AudioCache(str(tmp_path), FakeRenderer(), max_bytes=40)
+    cache.fetch("x" * 10)  # 20 bytes on disk: "None|None|" + text
+    cache.fetch("y" * 10)
+    cache.get("x" * 10)  # x becomes most recently used
+    cache.fetch("z" * 10)
+    assert cache.get("y" * 10) is None
+    assert cache.get("x" * 10) is not None
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_cached_backend_sends_long_text_to_fallback(tmp_path):
+    fallback = FakeBackend()
+    backend = CachedBackend(AudioCache(str(tmp_path), FakeRenderer()), fallback, max_text_len=5)
+    assert backend.speak("x" * 6, None, None) is True
+    assert fallback.spoken == [("x" * 6, None, None)]
@@ -0,0 +1,61 @@
+import pytest
+
+from src.lib.voice_commands import ALIASES, CommandIndex, match, normalize
+
+
+def test_normalize_folds_width_case_kana_and_punctuation():
+    assert normalize("Slash, DONE.") == "slashdone"
+    assert normalize("すらっしゅ・どーん") == normalize("スラッシュ ドン")
+    assert normalize("／ｓａｖｅ") == "/save"
+
+
+@pytest.mark.parametrize(
+    "text,name",
+    [
+        ("スラッシュ ドーン", "done"),
+        ("スラッシュドーン。", "done"),
+        ("slash undo", "undo"),
+        ("すらっしゅ あんどぅ", "undo"),
+        ("スラッシュ ポーズ", "pause"),
+        ("スラッシュ・リジューム", "resume"),
+        ("slash read back", "read"),
+    ],
+)
+def test_spoken_aliases(text, name):
+    found = match(text)
+    assert found is not None and found.name == name and found.confidence == 1.0
+
+
+def test_near_miss_has_lower_confidence():
+    found = match("スラシュ ドーン")
+    assert found is not None and found.name == "done"
+    assert 0.8 <= found.confidence < 1.0
+
+
+def test_ordinary_speech_is_not_a_command():
+    for text in ["ドーン", "次に呼吸に戻ります", "スラッシュ", "slash", "今日はセーブしておこう"]:
+        assert match(text) is None
+
+
+def test_everyday_words_need_the_exact_prefix():
+    # "ラッシュ" (rush) is a word, not a clipped "スラッシュ"
+    for text in ["ラッシュ終わり", "ラッシュ 次", "スラシュ 終わり", "終わり", "次"]:
+        assert match(text) is None
+    assert match("スラッシュ 終わり").name == "done"
+
+
+def test_argument_follows_command_words():
+    found = match("スラッシュ セーブ memo.txt")
+    assert found.name == "save" and found.arg == "memo.txt"
+    assert match("スラッシュ ドーン memo.txt") is None
+
+
+def test_conflicting_aliases_are_rejected():
+    with pytest.raises(ValueError):
+        CommandIndex({"a": ("same",), "b": ("same",)})
+
+
+def test_every_alias_resolves_to_its_command():
+    for name, aliases in ALIASES.items():
+        for alias in aliases:
+            assert match("slash " + alias).name == name
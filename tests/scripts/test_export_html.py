@@ -0,0 +1,101 @@
+import gzip
+import importlib.util
+import json
+import os
+import sys
+
+_spec = importlib.util.spec_from_file_location(
+    "export_html", os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "export_html.py")
+)
+export_html = importlib.util.module_from_spec(_spec)
+sys.modules["export_html"] = export_html
+_spec.loader.exec_module(export_html)
+
+
+def test_minify_js_keeps_strings_regexes_and_templates():
+    src = """
+    // drop me
+    const a = 'x  // not a comment';   /* block */
+    const re = /\\/\\*keep*\\//g;
+    const t = `${a}  ${ {b: 1}.b }  `;
+    let i = 1
+    i
+    ++i
+    return a - -1 / 2
+    """
+    out = export_html.minify_js(src)
+    assert "drop me" not in out and "block" not in out
+    assert "'x  // not a comment'" in out
+    assert "/\\/\\*keep*\\//g" in out
+    assert "`${a}  ${ {b: 1}.b }  `" in out
+    # Newlines that may end a statement survive (ASI)
+    assert "i\n++i" in out
+    assert "a- -1/2" in out or "a- -1 / 2" in out
+
+
+def test_minify_html_and_css():
+    html = (
+        "<!doctype html>\n<!-- drop -->\n<style>\n a :hover { color: red ; }\n</style>\n"
+        '<p   title="a  b">one   two</p>\n<pre>  keep\n   this </pre>\n'
+        '<script type="application/json">{ "a":  1 }</script>'
+    )
+    out = export_html.minify_html(html)
+    assert "drop" not in out and "\n\n" not in out
+    assert "<style>a :hover{color:red}</style>" in out
+    assert '<p   title="a  b">one two</p>' in out
+    assert "<pre>  keep\n   this </pre>" in out
+    assert '{ "a":  1 }' in out
+
+
+def test_export_hashes_assets_and_rebuilds_only_changes(tmp_path):
+    src = tmp_path / "site"
+    src.mkdir()
+    (src / "app.css").write_text("body {  color: red;  }\n" * 40, encoding="utf-8")
+    (src / "index.html").write_text('<link rel="stylesheet" href="app.css">\n<p>hi</p>\n', encoding="utf-8")
+    out = tmp_path / "dist"
+
+    first = export_html.export(["site"], str(out), root=str(tmp_path), workers=1)
+    assert (first.built, first.skipped) == (2, 0)
+    manifest = json.loads((out / "manifest.json").read_text(encoding="utf-8"))
+    css = manifest["site/app.css"]
+    assert css != "site/app.css" and manifest["site/index.html"] == "site/index.html"
+    assert os.path.basename(css) in (out / "site" / "index.html").read_text(encoding="utf-8")
+    assert gzip.decompress((out / (css + ".gz")).read_bytes()) == (out / css).read_bytes()
+
+    second = export_html.export(["site"], str(out), root=str(tmp_path), workers=1)
+    assert (second.built, second.skipped) == (0, 2)
+
+    # A changed asset gets a new name, so the page referencing it is rebuilt too
+    (src / "app.css").write_text("body { color: blue }\n" * 40, encoding="utf-8")
+    third = export_html.export(["site"], str(out), root=str(tmp_path), workers=1)
+    assert (third.built, third.skipped) == (2, 0)
+    assert not (out / css).exists() and not (out / (css + ".gz")).exists()
+    new_css = json.loads((out / "manifest.json").read_text(encoding="utf-8"))["site/app.css"]
+    assert os.path.basename(new_css) in (out / "site" / "index.html").read_text(encoding="utf-8")
+
+
+def test_repeat_export_skips_unchanged_sources_without_reading_them(tmp_path, monkeypatch):
+    src = tmp_path / "site"
+    src.mkdir()
+    (src / "app.js").write_text("let x = 1;\n" * 40, encoding="utf-8")
+    (src / "index.html").write_text('<script src="app.js"></script>\n', encoding="utf-8")
+    for path in src.iterdir():
+        os.utime(path, (1e9, 1e9))
+    out = tmp_path / "dist"
+    assert export_html.export(["site"], str(out), root=str(tmp_path), workers=1).built == 2
+
+    real_open = open
+
+    def no_sources(path, *args, **kwargs):
+        assert not str(path).startswith(str(src)), path
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(export_html, "open", no_sources, raising=False)
+    again = export_html.export(["site"], str(out), root=str(tmp_path), workers=1)
+    assert (again.built, again.skipped) == (0, 2)
+    monkeypatch.undo()
+
+    # Touched but unchanged: read and hashed once more, still not rebuilt
+    os.utime(src / "app.js", (1.5e9, 1.5e9))
+    touched = export_html.export(["site"], str(out), root=str(tmp_path), workers=1)
+    assert (touched.built, touched.skipped) == (0, 2)
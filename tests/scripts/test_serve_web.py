@@ -0,0 +1,116 @@
+import gzip
+import http.client
+import importlib.util
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "serve_web", os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "serve_web.py")
+)
+serve_web = importlib.util.module_from_spec(_spec)
+sys.modules["serve_web"] = serve_web
+_spec.loader.exec_module(serve_web)
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "index.html").write_text("<h1>hi</h1>", encoding="utf-8")
+    css = tmp_path / "a.css"
+    css.write_text("body { color: red }", encoding="utf-8")
+    (tmp_path / "a.css.gz").write_bytes(gzip.compress(css.read_bytes()))
+    server = serve_web.make_server(0, str(tmp_path), host="127.0.0.1", quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield tmp_path, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _get(conn, path, headers=None):
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def test_keepalive_validators_and_304(site):
+    root, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    resp, body = _get(conn, "/")
+    assert resp.status == 200 and body == b"<h1>hi</h1>"
+    etag = resp.getheader("ETag")
+    resp, body = _get(conn, "/index.html", {"If-None-Match": etag})
+    assert resp.status == 304 and body == b""
+    resp, _ = _get(conn, "/index.html", {"If-Modified-Since": resp.getheader("Last-Modified")})
+    assert resp.status == 304
+    # Same connection throughout; a changed file gets a new ETag
+    (root / "index.html").write_text("<h1>changed</h1>", encoding="utf-8")
+    os.utime(root / "index.html", ns=(time.time_ns() + 10**9,) * 2)
+    resp, body = _get(conn, "/index.html", {"If-None-Match": etag})
+    assert resp.status == 200 and body == b"<h1>changed</h1>"
+    conn.close()
+
+
+def test_precompressed_variant(site):
+    _, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    resp, body = _get(conn, "/a.css", {"Accept-Encoding": "br;q=0, gzip"})
+    assert resp.getheader("Content-Encoding") == "gzip" and resp.getheader("Vary") == "Accept-Encoding"
+    assert gzip.decompress(body) == b"body { color: red }"
+    resp, body = _get(conn, "/a.css")
+    assert resp.getheader("Content-Encoding") is None and body == b"body { color: red }"
+    resp, _ = _get(conn, "/missing.css")
+    assert resp.status == 404
+
+
+def _post(conn, path, payload):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp, json.loads(resp.read())
+
+
+def test_prompt_api_caches_canonical_requests(site):
+    _, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    resp, out = _post(conn, "/api/prompt", {"mode": "music", "data": {"genre": "dub", "bpm": 90}})
+    assert resp.status == 200 and out == {"prompt": "Music: dub @ 90 BPM\nMood: calm"}
+    assert resp.getheader("X-Cache") == "miss"
+    # Same request with other key order and spacing is a hit
+    resp, out = _post(conn, "/api/prompt", b'{"data": {"bpm": 90,  "genre": "dub"}, "mode": "music"}')
+    assert resp.getheader("X-Cache") == "hit" and out["prompt"].startswith("Music: dub")
+    resp, out = _post(conn, "/api/prompt", b"{not json")
+    assert resp.status == 400 and "error" in out
+    resp, _ = _get(conn, "/api/prompt")
+    assert resp.status == 405 and resp.getheader("Allow") == "POST"
+    conn.close()
+
+
+def test_prompt_api_batch(site):
+    _, port = site
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    requests = [{"mode": "image", "data": {"subject": f"cat {i}"}} for i in range(30)]
+    resp, out = _post(conn, "/api/prompt/batch", {"requests": requests + [{"data": {}}]})
+    assert resp.status == 200 and len(out["results"]) == 31
+    assert out["results"][7] == {"prompt": "Image: cat 7\nStyle: photorealistic"}
+    assert out["results"][-1] == {"error": "missing mode"}
+    # Batch items populated the single-request cache
+    resp, _ = _post(conn, "/api/prompt", requests[3])
+    assert resp.getheader("X-Cache") == "hit"
+    conn.close()
+
+
+def test_slow_client_does_not_block_others(site):
+    _, port = site
+    idle = socket.create_connection(("127.0.0.1", port))
+    idle.sendall(b"GET / HTTP/1.1\r\nHost: x\r\n")  # never finishes its headers
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+        resp, _ = _get(conn, "/index.html")
+        assert resp.status == 200
+    finally:
+        idle.close()